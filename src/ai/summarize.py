@@ -1,10 +1,17 @@
 # src/ai/summarize.py
 import os
 import json
+import hashlib
+import math
+import threading
+import time
 import requests
+from collections import OrderedDict
 from typing import Optional
 from dotenv import load_dotenv
 
+from telemetry.metrics import REGISTRY
+
 # .env 자동 로드 (중복 호출해도 무해)
 load_dotenv()
 
@@ -14,6 +21,14 @@ DEPLOY = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini")
 # v1 또는 2024-10-01-preview 둘 다 가능. v1은 model에 "배포 이름"을 넣음.
 USE_V1 = True
 API_VERSION = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-10-01-preview")
+# 같은 알림/KPI 상태에 대해 요약을 다시 만들지 않도록 하는 캐시 설정
+SUMMARY_MIN_REFRESH_SEC = float(os.environ.get("SUMMARY_MIN_REFRESH_SEC", "60"))
+SUMMARY_CACHE_SIZE = int(os.environ.get("SUMMARY_CACHE_SIZE", "32"))
+# Slack 알림 발송 전 이번 알림 집합의 요약을 기다리는 최대 시간(초). 넘기면 요약 없이 보낸다
+SUMMARY_NOTIFY_WAIT_SEC = float(os.environ.get("SUMMARY_NOTIFY_WAIT_SEC", "20"))
+
+LLM_SECONDS = REGISTRY.histogram("lcs_llm_request_seconds", "Azure OpenAI summary call latency", ("status",))
+LLM_FAILURES = REGISTRY.counter("lcs_llm_failures_total", "Azure OpenAI summary call failures", ("error",))
 
 
 def _call_v1_chat(prompt: str) -> str:
@@ -61,10 +76,131 @@ def summarize_alerts(metrics: dict) -> Optional[str]:
         f"JSON 입력:\n{json.dumps(m)[:6000]}"
     )
 
+    t0 = time.perf_counter()
     try:
-        if USE_V1:
-            return _call_v1_chat(prompt)
-        return _call_preview_chat(prompt)
+        out = _call_v1_chat(prompt) if USE_V1 else _call_preview_chat(prompt)
+        LLM_SECONDS.labels("ok").observe(time.perf_counter() - t0)
+        return out
     except Exception as e:
+        LLM_SECONDS.labels("error").observe(time.perf_counter() - t0)
+        LLM_FAILURES.labels(type(e).__name__).inc()
         print("⚠️ summarize_alerts 오류:", e)
         return None
+
+
+def summary_fingerprint(metrics: dict) -> str:
+    """
+    요약 캐시 키: 알림 집합(유형/심각도/채널) + 거칠게 양자화한 KPI.
+    분마다 조금씩 흔들리는 수치로는 키가 바뀌지 않도록 한다.
+    """
+    alerts = sorted(
+        (str(a.get("type")), str(a.get("severity")), str(a.get("channel") or ""))
+        for a in metrics.get("alerts", []) or []
+    )
+    k = metrics.get("kpis", {}) or {}
+    coarse = (
+        int(math.log2(int(k.get("attempts", 0)) + 1)),            # 시도 수는 2배 단위
+        round(float(k.get("failRate", 0.0)) * 20) / 20,            # 실패율은 5%p 단위
+        int(math.log2(int(k.get("highRisk", 0)) + 1)),
+    )
+    raw = json.dumps([alerts, coarse], separators=(",", ":"))
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+class SummaryCache:
+    """
+    요약 캐시 (stale-while-revalidate).
+    - 같은 fingerprint면 캐시된 요약을 바로 반환
+    - 바뀌었으면 마지막 요약을 즉시 반환하고, 백그라운드에서 한 번만(single-flight) 새로 만든다
+    - 새로 만드는 간격은 min_refresh_sec 이상
+    - wait=True(알림 발송용)는 간격 제한 없이 이번 fingerprint 요약을 timeout까지 기다린다
+    """
+
+    def __init__(self, fn=None, min_refresh_sec: float = SUMMARY_MIN_REFRESH_SEC,
+                 maxsize: int = SUMMARY_CACHE_SIZE):
+        self.fn = fn or summarize_alerts
+        self.min_refresh_sec = min_refresh_sec
+        self.maxsize = max(1, maxsize)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._last: Optional[str] = None
+        self._last_refresh = 0.0
+        self._inflight: Optional[threading.Event] = None     # 진행 중인 갱신이 끝나면 set
+        self.stats = dict(hits=0, stale=0, refreshes=0, errors=0)
+
+    def _refresh(self, metrics: dict, fp: str, done: threading.Event) -> None:
+        try:
+            summary = self.fn(metrics)
+        except Exception as e:
+            summary = None
+            print("⚠️ summarize_alerts 오류:", e)
+        with self._lock:
+            self._inflight = None
+            if summary is None:
+                self.stats["errors"] += 1
+            else:
+                self.stats["refreshes"] += 1
+                self._cache[fp] = summary
+                self._cache.move_to_end(fp)
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+                self._last = summary
+        done.set()
+
+    def _start(self, metrics: dict, fp: str) -> threading.Event:
+        """락을 잡은 상태에서 호출: 갱신 스레드를 띄운다"""
+        done = self._inflight = threading.Event()
+        self._last_refresh = time.monotonic()
+        threading.Thread(target=self._refresh, args=(metrics, fp, done),
+                         name="summary-refresh", daemon=True).start()
+        return done
+
+    def get(self, metrics: dict, wait: bool = False, timeout: float = SUMMARY_NOTIFY_WAIT_SEC) -> Optional[str]:
+        """
+        캐시된(또는 마지막) 요약 반환.
+        wait=True면 이번 fingerprint 요약만 돌려준다: 없으면 갱신을 띄우고(다른 갱신이 진행 중이면 그것부터)
+        timeout까지 기다린 뒤, 그래도 없으면 None(지난 요약으로 대신하지 않음)
+        """
+        fp = summary_fingerprint(metrics)
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            if fp in self._cache:
+                self._cache.move_to_end(fp)
+                self.stats["hits"] += 1
+                self._last = self._cache[fp]
+                return self._last
+            self.stats["stale"] += 1
+            if not wait:
+                if self._inflight is None and time.monotonic() - self._last_refresh >= self.min_refresh_sec:
+                    self._start(metrics, fp)
+                return self._last
+        own = False
+        while True:
+            with self._lock:
+                if fp in self._cache:
+                    return self._cache[fp]
+                if own and self._inflight is None:
+                    return None                 # 이번 fingerprint로 만든 갱신이 실패
+                done = self._inflight
+                if done is None:
+                    done, own = self._start(metrics, fp), True
+            left = deadline - time.monotonic()
+            if left <= 0 or not done.wait(left):
+                return None
+
+
+_default_cache = SummaryCache()
+
+
+def summarize_alerts_cached(metrics: dict) -> Optional[str]:
+    """summarize_alerts의 캐시 버전. LLM 호출을 기다리지 않는다."""
+    if not ENDPOINT or not API_KEY or not DEPLOY:
+        return None
+    return _default_cache.get(metrics)
+
+
+def summarize_alerts_for_notify(metrics: dict) -> Optional[str]:
+    """알림 발송용: 이번 알림 집합의 요약을 SUMMARY_NOTIFY_WAIT_SEC까지 기다린다. 새 CRIT 알림에 지난('정상') 요약이 붙지 않게"""
+    if not ENDPOINT or not API_KEY or not DEPLOY:
+        return None
+    return _default_cache.get(metrics, wait=True)
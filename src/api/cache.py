@@ -0,0 +1,105 @@
+# src/api/cache.py
+import hashlib
+import json
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable
+
+from fastapi import Request, Response
+
+
+class CachedResponse:
+    __slots__ = ("key", "body", "etag", "last_modified", "created")
+
+    def __init__(self, key: Hashable, body: bytes):
+        self.key = key
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.created = time.time()
+        self.last_modified = formatdate(self.created, usegmt=True)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        # 매번 재검증(If-None-Match)하도록 → 바뀌지 않았으면 304
+        return {"ETag": self.etag, "Last-Modified": self.last_modified, "Cache-Control": "no-cache",
+                "Vary": "Accept"}
+
+
+def _dumps(payload: Any) -> bytes:
+    # FastAPI 기본 JSONResponse와 같은 직렬화
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class ResponseCache:
+    """
+    키가 바뀔 때까지 응답 원본(payload)과 포맷별 직렬화 결과를 재사용하는 단일 엔트리 캐시.
+    같은 키에 대한 동시 미스는 하나의 계산으로 합친다(single-flight).
+    """
+
+    def __init__(self, serializers: Dict[str, Callable[[Any], bytes]] | None = None):
+        self.serializers = serializers or {"json": _dumps}
+        self._lock = threading.Lock()
+        self._key: Hashable | None = None
+        self._payload: Any = None
+        self._bodies: Dict[str, CachedResponse] = {}
+        self._inflight: Dict[Hashable, threading.Event] = {}
+        self.stats = dict(hits=0, misses=0, waits=0)
+
+    def _payload_for(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        while True:
+            with self._lock:
+                if self._key == key:
+                    return self._payload
+                ev = self._inflight.get(key)
+                leader = ev is None
+                if leader:
+                    ev = self._inflight[key] = threading.Event()
+                    self.stats["misses"] += 1
+                else:
+                    self.stats["waits"] += 1
+            if not leader:
+                ev.wait(timeout=30)
+                continue        # 리더가 채운 엔트리를 다시 확인(실패했다면 다음 대기자가 리더가 됨)
+            try:
+                payload = build()
+                with self._lock:
+                    self._key, self._payload, self._bodies = key, payload, {}
+                return payload
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                ev.set()
+
+    def get(self, key: Hashable, build: Callable[[], Any], fmt: str = "json") -> CachedResponse:
+        with self._lock:
+            e = self._bodies.get(fmt) if self._key == key else None
+            if e is not None:
+                self.stats["hits"] += 1
+                return e
+        payload = self._payload_for(key, build)
+        entry = CachedResponse(key, self.serializers[fmt](payload))
+        with self._lock:
+            if self._key == key:
+                entry = self._bodies.setdefault(fmt, entry)
+        return entry
+
+
+def conditional_response(request: Request, entry: CachedResponse,
+                         media_type: str = "application/json") -> Response:
+    """If-None-Match / If-Modified-Since를 확인해 304 또는 본문 응답"""
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+        if "*" in tags or entry.etag in tags:
+            return Response(status_code=304, headers=entry.headers)
+    else:
+        ims = request.headers.get("if-modified-since")
+        if ims:
+            try:
+                if int(entry.created) <= parsedate_to_datetime(ims).timestamp():
+                    return Response(status_code=304, headers=entry.headers)
+            except (TypeError, ValueError):
+                pass
+    return Response(content=entry.body, media_type=media_type, headers=entry.headers)
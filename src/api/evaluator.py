@@ -0,0 +1,96 @@
+# src/api/evaluator.py
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from ml.anomaly import compute_metrics
+from store.alerts import save_alerts
+from telemetry.metrics import stage
+
+MINUTE_MS = 60_000
+
+
+class AlertEvaluator:
+    """
+    규칙/ML 알림 평가를 분당 1회로 고정하는 평가기.
+    - 스케줄러가 분이 닫힐 때마다 run_once()를 호출한다(대시보드 트래픽과 무관).
+    - 결과(알림/요약)는 alerts 테이블과 메모리 상태에 남기고, GET /metrics는 state()만 읽는다.
+    """
+
+    def __init__(self, engine, aggregator=None, model=None, stream=None, segments=None,
+                 summarize: Optional[Callable[[dict], Optional[str]]] = None,
+                 notify: Optional[Callable[[dict, Optional[str], dict], None]] = None,
+                 notify_summary: Optional[Callable[[dict], Optional[str]]] = None):
+        self.engine = engine
+        self.aggregator = aggregator
+        self.model = model
+        self.stream = stream
+        self.segments = segments
+        self.summarize = summarize
+        self.notify = notify
+        # 알림에 붙일 요약: summarize는 바뀐 상황에도 지난 요약을 돌려줄 수 있어(대시보드용) 따로 받는다.
+        # 이번 알림 집합의 요약이 나올 때까지 (제한 시간 안에서) 기다리는 함수를 넘긴다
+        self.notify_summary = notify_summary
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._state: Dict[str, Any] = dict(alerts=[], summary=None, evaluatedAt=None, generation=0)
+
+    def run_once(self) -> Dict[str, Any]:
+        with self._run_lock:        # 수동 호출과 스케줄 실행이 겹치지 않도록
+            t0 = time.perf_counter()
+            now = datetime.now(timezone.utc)
+            minute_ms = (int(now.timestamp() * 1000) // MINUTE_MS) * MINUTE_MS
+
+            with stage("evaluator.compute"):
+                base = compute_metrics(self.engine, aggregator=self.aggregator,
+                                       model=self.model, stream=self.stream, segments=self.segments)
+            summary = None
+            if self.summarize:
+                try:
+                    with stage("evaluator.summarize"):
+                        summary = self.summarize(base)
+                except Exception as e:
+                    print(f"[evaluator] summarize error: {e}", flush=True)
+            base["summary"] = summary
+
+            alerts = base.get("alerts", [])
+            try:
+                with stage("evaluator.save_alerts"):
+                    save_alerts(self.engine, minute_ms, alerts)
+            except Exception as e:
+                print(f"[evaluator] save_alerts error: {e}", flush=True)
+
+            if self.notify:
+                with stage("evaluator.notify"):
+                    note = summary
+                    if self.notify_summary and alerts:
+                        try:
+                            note = self.notify_summary(base)
+                        except Exception as e:
+                            note = None
+                            print(f"[evaluator] notify summary error: {e}", flush=True)
+                    for a in alerts:
+                        try:
+                            self.notify(a, note, base.get("kpis", {}))
+                        except Exception as e:
+                            print("notify_slack_blocks error:", e, flush=True)
+
+            with self._lock:
+                self._state = dict(
+                    alerts=alerts, summary=summary, evaluatedAt=now.isoformat(),
+                    generation=self._state["generation"] + 1,
+                    durationMs=round((time.perf_counter() - t0) * 1000, 1),
+                )
+            return base
+
+    def safe_run(self) -> None:
+        """스케줄러용: 예외가 스케줄러 스레드로 새지 않게 감싼다."""
+        try:
+            self.run_once()
+        except Exception as e:
+            print(f"[evaluator] run error: {e}", flush=True)
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._state)
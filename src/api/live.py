@@ -0,0 +1,143 @@
+# src/api/live.py
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+MINUTE_MS = 60_000
+
+
+def _iso(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()
+
+
+def sse_format(event: str, data: Any, event_id: int | None = None) -> bytes:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class LiveHub:
+    """
+    대시보드 라이브 업데이트(SSE) 허브.
+    - interval마다 한 번만 델타를 계산해 모든 구독자 큐에 같은 바이트를 넣는다(뷰어 수와 무관한 CPU).
+    - 델타 종류: tick(진행 중인 분의 변경된 카운터), minute(방금 닫힌 분), alerts(새 알림/요약)
+    - 큐가 넘치는 느린 구독자는 끊고, 재접속 시 snapshot부터 다시 받게 한다.
+    """
+
+    def __init__(self, aggregator, evaluator, interval: float = 1.0, max_queue: int = 256):
+        self.aggregator = aggregator
+        self.evaluator = evaluator
+        self.interval = interval
+        self.max_queue = max_queue
+        self._subs: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+        self._seq = 0
+        self._version = -1
+        self._minute = (int(time.time() * 1000) // MINUTE_MS) * MINUTE_MS
+        self._generation = -1
+        self._sent_alert_ids: List[str] = []
+        self._summary = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subs)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """접속 직후 1회 보내는 전체 창(분별 채널 카운터 포함)"""
+        state = self.evaluator.state()
+        window = self.aggregator.window_detail()
+        for w in window:
+            w["ts"] = _iso(w.pop("minute"))
+        return dict(window=window, alerts=state["alerts"], summary=state["summary"],
+                    evaluatedAt=state["evaluatedAt"])
+
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subs.add(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue) -> None:
+        self._subs.discard(q)
+
+    def _publish(self, event: str, data: Any) -> None:
+        self._seq += 1
+        msg = sse_format(event, data, self._seq)
+        for q in list(self._subs):
+            try:
+                q.put_nowait(msg)
+            except asyncio.QueueFull:
+                # 느린 구독자: 끊김 신호(None)만 남기고 제거
+                self._subs.discard(q)
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait(None)
+
+    def _collect(self) -> None:
+        now_ms = int(time.time() * 1000)
+        current = (now_ms // MINUTE_MS) * MINUTE_MS
+
+        # 분이 닫혔으면 닫힌 분의 최종값
+        if current > self._minute:
+            closed = self.aggregator.minute_detail(self._minute)
+            if closed is not None:
+                closed["ts"] = _iso(closed.pop("minute"))
+                self._publish("minute", closed)
+            self._minute = current
+            self._version = -1
+
+        # 진행 중인 분은 집계가 바뀌었을 때만
+        version = self.aggregator.version
+        if version != self._version:
+            self._version = version
+            cur = self.aggregator.minute_detail(current)
+            if cur is not None:
+                cur["ts"] = _iso(cur.pop("minute"))
+                self._publish("tick", cur)
+
+        # 평가기가 새 결과를 냈으면 새 알림만 + 바뀐 요약
+        state = self.evaluator.state()
+        if state["generation"] != self._generation:
+            self._generation = state["generation"]
+            sent = set(self._sent_alert_ids)
+            new = [a for a in state["alerts"] if a.get("id") not in sent]
+            summary_changed = state["summary"] != self._summary
+            if new or summary_changed:
+                payload: Dict[str, Any] = {"alerts": new, "evaluatedAt": state["evaluatedAt"]}
+                if summary_changed:
+                    payload["summary"] = state["summary"]
+                    self._summary = state["summary"]
+                self._publish("alerts", payload)
+            self._sent_alert_ids = (self._sent_alert_ids + [a.get("id") for a in new])[-500:]
+
+    def _sync(self) -> None:
+        """구독자가 없을 때는 기준점만 현재로 맞춘다(새 구독자는 snapshot으로 시작)"""
+        self._minute = (int(time.time() * 1000) // MINUTE_MS) * MINUTE_MS
+        self._version = -1
+        state = self.evaluator.state()
+        self._generation = state["generation"]
+        self._summary = state["summary"]
+        self._sent_alert_ids = [a.get("id") for a in state["alerts"]]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if self._subs:
+                    self._collect()
+                else:
+                    self._sync()
+            except Exception as e:
+                print(f"[live] collect error: {e}", flush=True)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,85 @@
+# src/api/login.py
+"""
+POST /login 처리(단일 프로세스 server.py와 멀티 워커 worker.py가 공유).
+이벤트 기록 방법만 submit 콜백으로 주입받는다: 단일 프로세스는 writer 큐, 워커는 owner 전달 큐.
+guard는 acheck/arecord를 가진 객체: 단일 프로세스는 LoginGuard, 워커는 owner에 묻는 OwnerLoginGuard.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from api.ratelimit import RATE_LIMIT_ENABLED
+from store.db import to_epoch_ms
+from telemetry.metrics import REGISTRY
+
+Submit = Callable[[dict], Awaitable[bool]]
+
+LOGIN_SECONDS = REGISTRY.histogram("lcs_login_seconds", "POST /login handler latency", ("outcome",))
+_OUTCOMES = {o: LOGIN_SECONDS.labels(o) for o in ("success", "fail", "rate_limited", "locked", "rejected")}
+# 속도 제한/잠금으로 거절한 시도의 fail_reason (잠금은 일반 인증 실패 LOCKED와 구분)
+GUARD_FAIL_REASONS = {"LOCKED": "LOCKOUT", "RATE_LIMITED": "RATE_LIMITED"}
+
+
+class LoginReq(BaseModel):
+    email: str | None = None
+    password: str | None = None
+    channel: str = "WEB"
+    fingerprint: str = "anon"
+    ua: str | None = None
+    ip: str | None = None
+
+
+async def handle_login(req: LoginReq, request: Request, guard, submit: Submit):
+    """판정 + 이벤트 기록. 처리 시간은 결과별로 lcs_login_seconds 에 남긴다"""
+    t0 = time.perf_counter()
+    resp, outcome = await _handle(req, request, guard, submit)
+    _OUTCOMES[outcome].observe(time.perf_counter() - t0)
+    return resp
+
+
+async def _handle(req: LoginReq, request: Request, guard, submit: Submit):
+    user_hash = hashlib.sha256((req.email or "").encode()).hexdigest()
+    # 이메일이 없으면 user 차원 제한/잠금 대상이 아니다(sha256("")을 모든 익명 요청이 공유하게 됨)
+    user_key = user_hash if req.email else None
+    ip = req.ip or request.client.host
+    ua = req.ua or request.headers.get("user-agent", "")
+    now = datetime.now(timezone.utc)
+    row = dict(ts=now.isoformat(), ts_ms=to_epoch_ms(now), channel=req.channel, user_hash=user_hash, ip=ip, ua=ua,
+               fingerprint=req.fingerprint)
+
+    # 자격 증명 판정 전에 속도 제한/잠금 확인 → 429 + Retry-After, 이벤트는 그대로 기록
+    if RATE_LIMIT_ENABLED:
+        blocked, retry_after = await guard.acheck(dict(ip=ip, fingerprint=req.fingerprint, user_hash=user_key))
+        if blocked:
+            # 자격 증명 확인을 하지 않았으므로 지연은 없음(None: 지연 통계/특성에서 빠짐).
+            # 사유는 RATE_LIMITED / LOCKOUT(일반 잠금 실패 LOCKED와 구분)
+            row.update(result="FAIL", fail_reason=GUARD_FAIL_REASONS[blocked], latency_ms=None)
+            await submit(row)
+            return JSONResponse(
+                status_code=429,
+                content={"ok": False, "result": "FAIL", "reason": blocked},
+                headers={"Retry-After": str(retry_after)},
+            ), blocked.lower()
+
+    # 토이 규칙: user@example.com / pass123 → SUCCESS 그 외 FAIL
+    ok = (req.email == "user@example.com" and req.password == "pass123")
+    result = "SUCCESS" if ok else "FAIL"
+    fail_reason = "NONE" if ok else "INVALID_PW"
+    latency_ms = 80 if ok else 120
+    if RATE_LIMIT_ENABLED:
+        await guard.arecord(user_key, ok)
+
+    row.update(result=result, fail_reason=fail_reason, latency_ms=latency_ms)
+    # 큐가 가득 차면 잠시 대기 후 503으로 백프레셔
+    if not await submit(row):
+        return JSONResponse(
+            status_code=503,
+            content={"ok": False, "error": "ingest queue full"},
+            headers={"Retry-After": "1"},
+        ), "rejected"
+    return {"ok": ok, "result": result}, result.lower()
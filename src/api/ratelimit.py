@@ -0,0 +1,170 @@
+# src/api/ratelimit.py
+"""
+/login 앞단 인프로세스 속도 제한/잠금.
+- SlidingWindowLimiter: key별 고정 창 2개를 가중 합한 슬라이딩 윈도 카운터. 검사/증가 O(1)
+- 유휴 key는 LRU로 밀어내 메모리는 max_keys개로 고정
+- LoginGuard: IP/fingerprint/user_hash 제한 + user_hash 연속 실패 잠금
+이벤트 루프(단일 스레드)에서만 호출한다고 가정해 락을 두지 않는다.
+"""
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+# 기본은 꺼짐: 데모 트래픽(traffic_gen/loadgen)은 대부분 한 계정이라 켜면 429가 된다. 운영에서는 1로 켠다
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "0") == "1"
+RATE_LIMIT_WINDOW_SEC = int(os.getenv("RATE_LIMIT_WINDOW_SEC", "60"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))     # 차원별 LRU 한도(key당 ~200B)
+RATE_LIMITS = {                                                             # window당 허용 시도
+    "ip": int(os.getenv("RATE_LIMIT_IP", "120")),
+    "fingerprint": int(os.getenv("RATE_LIMIT_FINGERPRINT", "60")),
+    "user_hash": int(os.getenv("RATE_LIMIT_USER", "20")),
+}
+LOCKOUT_FAILURES = int(os.getenv("LOCKOUT_FAILURES", "10"))     # window 안 실패 수
+LOCKOUT_SEC = int(os.getenv("LOCKOUT_SEC", "300"))
+# 식별력이 없는 기본값은 제한하지 않는다(모든 익명 클라이언트가 한 key를 공유하게 됨)
+UNKEYED = {"", "anon", None}
+
+
+class SlidingWindowLimiter:
+    """
+    key → [현재 창 시작, 직전 창 카운트, 현재 창 카운트].
+    창 경계에서 직전 창 카운트를 남은 비율만큼 섞는 슬라이딩 윈도 근사(고정 창 2개)라
+    key당 정수 3개, 검사/증가는 분기 몇 개로 끝난다.
+    """
+
+    def __init__(self, limit: int, window_sec: float = 60, max_keys: int = 100_000):
+        self.limit = limit
+        self.window = float(window_sec)
+        self.max_keys = max_keys
+        self._keys: "OrderedDict[str, list]" = OrderedDict()
+        self.evictions = 0
+
+    def _state(self, key: str, now: float) -> list:
+        st = self._keys.get(key)
+        w = self.window
+        if st is None:
+            st = self._keys[key] = [now - now % w, 0, 0]
+            if len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)      # 가장 오래 안 쓰인 key
+                self.evictions += 1
+            return st
+        self._keys.move_to_end(key)
+        if now - st[0] >= w:
+            # 한 창만 지났으면 현재 → 직전, 그 이상이면 둘 다 비움
+            st[1] = st[2] if now - st[0] < 2 * w else 0
+            st[2] = 0
+            st[0] = now - now % w
+        return st
+
+    def _estimate(self, st: list, now: float) -> float:
+        return st[1] * (1.0 - (now - st[0]) / self.window) + st[2]
+
+    def _retry_after(self, st: list, now: float) -> int:
+        """추정치가 limit 아래로 내려갈 때까지 남은 초(그 시각에 다시 시도하면 허용)"""
+        w, start, prev, cur = self.window, st[0], st[1], st[2]
+        if cur < self.limit and prev > 0:
+            # 이번 창 안에서 직전 창 몫이 줄어들며 풀리는 시점
+            t = start + w * (1.0 - (self.limit - cur) / prev)
+        else:
+            # 다음 창에서 이번 창 카운트가 직전 몫으로 줄어드는 시점
+            t = start + w + w * max(0.0, 1.0 - self.limit / cur)
+        # 추정치 < limit 은 t "이후"부터 성립(t 정각은 아직 limit) → 정수 초로 올릴 때 t 정각을 넘긴다
+        return max(1, math.floor(t - now) + 1)
+
+    def retry_after(self, key: str, now: float | None = None) -> int:
+        """카운트하지 않고 검사만: 허용이면 0, 초과면 Retry-After(초)"""
+        if key not in self._keys:
+            return 0
+        now = now if now is not None else time.time()
+        st = self._state(key, now)
+        return self._retry_after(st, now) if self._estimate(st, now) >= self.limit else 0
+
+    def hit(self, key: str, now: float | None = None) -> int:
+        """허용이면 카운트하고 0, 초과면 카운트하지 않고 Retry-After(초)"""
+        now = now if now is not None else time.time()
+        st = self._state(key, now)
+        if st[1] * (1.0 - (now - st[0]) / self.window) + st[2] >= self.limit:
+            return self._retry_after(st, now)
+        st[2] += 1
+        return 0
+
+    def count(self, key: str, now: float | None = None) -> float:
+        if key not in self._keys:
+            return 0.0
+        now = now if now is not None else time.time()
+        return self._estimate(self._state(key, now), now)
+
+    def reset(self, key: str) -> None:
+        self._keys.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class LoginGuard:
+    """자격 증명 판정 전에 check(), 판정 후 record()"""
+
+    def __init__(self, limits: Dict[str, int] | None = None, window_sec: int = RATE_LIMIT_WINDOW_SEC,
+                 max_keys: int = RATE_LIMIT_MAX_KEYS, lockout_failures: int = LOCKOUT_FAILURES,
+                 lockout_sec: int = LOCKOUT_SEC):
+        limits = limits or RATE_LIMITS
+        self.limiters = {dim: SlidingWindowLimiter(n, window_sec, max_keys)
+                         for dim, n in limits.items() if n > 0}
+        self.failures = SlidingWindowLimiter(lockout_failures, window_sec, max_keys)
+        self.lockout_sec = lockout_sec
+        self._locked: "OrderedDict[str, float]" = OrderedDict()   # user_hash → 해제 시각
+        self.max_keys = max_keys
+        self.stats = dict(allowed=0, rate_limited=0, locked=0)
+
+    def check(self, keys: Dict[str, str | None], now: float | None = None) -> Tuple[str | None, int]:
+        """(None, 0) 허용 / ("LOCKED" | "RATE_LIMITED", Retry-After 초)"""
+        now = now if now is not None else time.time()
+        user = keys.get("user_hash")
+        until = self._locked.get(user)
+        if until is not None:
+            if until > now:
+                self.stats["locked"] += 1
+                return "LOCKED", math.ceil(until - now)
+            del self._locked[user]
+        # 모든 차원을 먼저 검사하고, 전부 허용일 때만 카운트(뒤 차원에서 막힌 시도가 앞 차원 한도를 깎지 않게)
+        hits = [(lim, keys.get(dim)) for dim, lim in self.limiters.items() if keys.get(dim) not in UNKEYED]
+        retry = max((lim.retry_after(key, now) for lim, key in hits), default=0)
+        if retry:
+            self.stats["rate_limited"] += 1
+            return "RATE_LIMITED", retry
+        for lim, key in hits:
+            lim.hit(key, now)
+        self.stats["allowed"] += 1
+        return None, 0
+
+    def record(self, user_hash: str | None, ok: bool, now: float | None = None) -> None:
+        """판정 결과 반영: 성공이면 실패 누적 초기화, 실패가 한도에 닿으면 잠금"""
+        if user_hash in UNKEYED:
+            return
+        if ok:
+            self.failures.reset(user_hash)
+            return
+        now = now if now is not None else time.time()
+        self.failures.hit(user_hash, now)
+        if self.failures.count(user_hash, now) >= self.failures.limit:
+            self._locked[user_hash] = now + self.lockout_sec
+            self._locked.move_to_end(user_hash)
+            if len(self._locked) > self.max_keys:
+                self._locked.popitem(last=False)
+            self.failures.reset(user_hash)
+
+    # handle_login은 await로 부른다(워커의 OwnerLoginGuard와 같은 모양). 이벤트 루프 안에서 바로 끝난다
+    async def acheck(self, keys: Dict[str, str | None]) -> Tuple[str | None, int]:
+        return self.check(keys)
+
+    async def arecord(self, user_hash: str | None, ok: bool) -> None:
+        self.record(user_hash, ok)
+
+    def info(self) -> dict:
+        return dict(
+            enabled=RATE_LIMIT_ENABLED, **self.stats, locked_users=len(self._locked),
+            keys={dim: len(lim) for dim, lim in self.limiters.items()},
+            evictions=sum(lim.evictions for lim in self.limiters.values()),
+        )
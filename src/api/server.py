@@ -1,10 +1,15 @@
 # src/api/server.py
-from fastapi import FastAPI, Request
-from pydantic import BaseModel
-from sqlalchemy import create_engine, text
-from datetime import datetime, timezone
+from apscheduler.schedulers.background import BackgroundScheduler
+from fastapi import Body, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Any, Literal
+import asyncio
 import hashlib
+import json
 import os
 import random
 import time
@@ -13,9 +18,27 @@ import threading
 from dotenv import load_dotenv
 load_dotenv()  # .env 자동 로드
 
-from ml.anomaly import compute_metrics
-from ai.summarize import summarize_alerts
-from notify.webhook import notify_slack_blocks
+from api.cache import ResponseCache, conditional_response
+from api.evaluator import AlertEvaluator
+from api.live import LiveHub, sse_format
+from api.login import LoginReq, handle_login
+from api.ratelimit import LoginGuard
+from api.wire import ENCODERS, MEDIA_TYPES, negotiate
+from ml.aggregate import MinuteAggregator
+from ml.anomaly import snapshot_frames
+from ml.model import ModelManager
+from ml.segments import SegmentDetector
+from ml.stream import StreamDetectorEngine
+from ai.summarize import summarize_alerts_cached, summarize_alerts_for_notify
+from notify.webhook import dispatcher as slack_dispatcher, notify_slack_blocks
+from store.alerts import read_alerts
+from store.db import make_engine, to_epoch_ms
+from store.partitions import maintain_partitions, partition_stats
+from store.rollup import apply_rollups, compact_rollups, query_range
+from store.schema import migrate
+from store.writer import BatchWriter
+from telemetry.metrics import CONTENT_TYPE, REGISTRY, stage
+from telemetry.profiler import PROFILE_ENABLED, profiler
 
 # ====== DB 경로 설정 (src/data/events.sqlite) ======
 DEF_AZURE_DIR = Path("/home/site")
@@ -29,39 +52,116 @@ DB_DIR.mkdir(parents=True, exist_ok=True)
 
 DB_PATH = Path(os.getenv("DB_PATH", DB_DIR / "events.sqlite"))
 
-engine = create_engine(
-    f"sqlite:///{DB_PATH}", 
-    future=True,
-    connect_args={"check_same_thread": False},
-    pool_pre_ping=True,
-)
+engine = make_engine(DB_PATH)
 
 print(f"[startup] Using DB at: {DB_PATH}", flush=True)
 
-# ====== 초기 테이블 생성 ======
-with engine.begin() as conn:
-    conn.exec_driver_sql("""
-    CREATE TABLE IF NOT EXISTS login_events(
-      id INTEGER PRIMARY KEY AUTOINCREMENT,
-      ts TEXT NOT NULL,
-      channel TEXT,
-      user_hash TEXT,
-      ip TEXT,
-      ua TEXT,
-      fingerprint TEXT,
-      result TEXT,
-      fail_reason TEXT,
-      latency_ms INTEGER
-    );
-    """)
+# ====== 스키마 마이그레이션 (테이블 생성 + ts_ms/인덱스 backfill) ======
+schema_version = migrate(engine)
+
+# ====== 그룹 커밋 writer (POST /login → 큐 → 배치 INSERT) ======
+writer = BatchWriter(
+    engine,
+    max_queue=int(os.getenv("INGEST_QUEUE_MAX", "10000")),
+    batch_size=int(os.getenv("INGEST_BATCH_MAX", "500")),
+    max_wait_ms=int(os.getenv("INGEST_BATCH_WAIT_MS", "50")),
+)
+# 1분/5분/1시간 롤업은 INSERT와 같은 트랜잭션에서 증분 갱신
+writer.add_tx_hook(apply_rollups)
+
+# 세그먼트(채널, 선택적으로 채널×실패 사유/UA 계열)별 IsolationForest — 차원 설정은 SEGMENT_DIMS
+segment_detector = SegmentDetector()
+
+# 커밋된 배치로 분 단위 집계를 갱신 → /metrics는 원시 행을 다시 읽지 않음
+aggregator = MinuteAggregator(minutes=60, segment_dims=segment_detector.extra_dims)
+writer.add_listener(aggregator.add)
+
+# 채널별 온라인 탐지기(분이 닫힐 때마다 O(1) 갱신)
+stream_detectors = StreamDetectorEngine()
+
+INGEST_SUBMIT_TIMEOUT = float(os.getenv("INGEST_SUBMIT_TIMEOUT_MS", "100")) / 1000.0
+EVENTS_BATCH_MAX = int(os.getenv("EVENTS_BATCH_MAX", "10000"))      # /events/batch 1회 최대 건수
+EVENTS_STREAM_CHUNK = int(os.getenv("EVENTS_STREAM_CHUNK", "1000"))  # NDJSON 청크당 INSERT 건수
+EVENTS_STREAM_LINE_MAX = int(os.getenv("EVENTS_STREAM_LINE_MAX", "65536"))  # NDJSON 한 줄 최대 바이트
+EVENTS_MAX_FUTURE_SEC = float(os.getenv("EVENTS_MAX_FUTURE_SEC", "5"))        # ts가 현재보다 이만큼 넘게 미래면 거부
+MAX_REPORTED_ERRORS = 20
+
+# ====== 백그라운드 스케줄러 (롤업 정리 등 주기 작업) ======
+scheduler = BackgroundScheduler(timezone="UTC")
+ROLLUP_COMPACT_INTERVAL_MIN = int(os.getenv("ROLLUP_COMPACT_INTERVAL_MIN", "10"))
+PARTITION_MAINT_INTERVAL_MIN = int(os.getenv("PARTITION_MAINT_INTERVAL_MIN", "30"))
+
+# IsolationForest는 긴 이력으로 주기 학습 → /metrics 에서는 predict만
+model = ModelManager(
+    Path(os.getenv("MODEL_DIR", DB_DIR / "models")),
+    history_hours=float(os.getenv("MODEL_HISTORY_HOURS", "24")),
+    min_points=int(os.getenv("MODEL_MIN_POINTS", "60")),
+)
+MODEL_RETRAIN_MIN = int(os.getenv("MODEL_RETRAIN_MIN", "15"))
+
+# 알림/요약/Slack은 분당 1회 백그라운드 평가 (대시보드 트래픽과 무관)
+evaluator = AlertEvaluator(
+    engine, aggregator=aggregator, model=model, stream=stream_detectors,
+    segments=segment_detector if segment_detector.dims else None,
+    summarize=summarize_alerts_cached, notify=notify_slack_blocks, notify_summary=summarize_alerts_for_notify,
+)
+
+# /metrics 응답 캐시 (분 버킷·집계 버전 단위, single-flight)
+metrics_cache = ResponseCache(serializers=ENCODERS)
+
+# /login 속도 제한/잠금 (IP·fingerprint·user_hash 슬라이딩 윈도)
+# 멀티 워커 모드(LCS_ROLE=owner)에서는 워커들이 /internal/ratelimit/* 로 이 하나를 공유한다
+login_guard = LoginGuard()
+OWNER_ROLE = os.getenv("LCS_ROLE") == "owner"
+
+# 대시보드 라이브 업데이트(SSE) — 델타만 푸시
+live_hub = LiveHub(aggregator, evaluator, interval=float(os.getenv("LIVE_INTERVAL_SEC", "1.0")))
+LIVE_KEEPALIVE_SEC = 15.0
+
+# 내부 계측(GET /internal/metrics) — 큐 깊이/누적 카운터는 스크레이프 때 stats()에서 읽는다
+REGISTRY.gauge("lcs_queue_depth", "Items waiting in in-process queues", lambda: {
+    ("writer",): writer.stats()["queue_depth"],
+    ("slack",): slack_dispatcher.stats()["queue_depth"],
+}, ("queue",))
+REGISTRY.gauge("lcs_ingest_events_total", "Events by ingest outcome", lambda: {
+    (k,): v for k, v in writer.stats().items() if k in ("enqueued", "rejected", "rows_written", "failed_rows")
+}, ("outcome",), kind="counter")
+REGISTRY.gauge("lcs_live_subscribers", "Connected SSE subscribers", lambda: live_hub.subscribers)
+REGISTRY.gauge("lcs_ratelimit_decisions_total", "/login rate limiter decisions", lambda: {
+    (k,): v for k, v in login_guard.info().items() if k in ("allowed", "rate_limited", "locked")
+}, ("decision",), kind="counter")
+REGISTRY.gauge("lcs_segments", "Segments evaluated/skipped in the last evaluation", lambda: {
+    (k,): v for k, v in segment_detector.info().items() if k in ("evaluated", "skipped", "fitted", "models")
+}, ("state",))
+REGISTRY.gauge("lcs_evaluator_duration_ms", "Duration of the last alert evaluation",
+               lambda: evaluator.state().get("durationMs"))
+
+def _train_model_job() -> None:
+    try:
+        with stage("model.train"):
+            model.train(engine)
+    except Exception as e:
+        print(f"[model] train error: {e}", flush=True)
+
+def _compact_rollups_job() -> None:
+    with stage("rollup.compact"):
+        removed = compact_rollups(engine)
+    if any(removed.values()):
+        print(f"[rollup] compacted {removed}", flush=True)
+
+def _maintain_partitions_job() -> None:
+    with stage("partitions.maintain"):
+        done = maintain_partitions(engine)
+    if any(done.values()):
+        print(f"[partitions] {done}", flush=True)
 
 # ====== FastAPI 앱 ======
 app = FastAPI(title="Login API · Anomaly Detection + Azure AI Summary")
 
 # ====== 백그라운드 더미 트래픽 생성기 ======
-def _insert_dummy_once(engine, success_ratio: float = 0.85) -> None:
+def _insert_dummy_once(sink: BatchWriter, success_ratio: float = 0.85) -> None:
     ok = random.random() < success_ratio
-    now = datetime.now(timezone.utc).isoformat()
+    now = datetime.now(timezone.utc)
 
     channel = random.choice(["WEB", "MYKT", "MEMBERSHIP"])
     email = "user@example.com" if ok else "attacker@example.com"
@@ -73,22 +173,14 @@ def _insert_dummy_once(engine, success_ratio: float = 0.85) -> None:
     fail_reason = "NONE" if ok else random.choice(["INVALID_PW", "LOCKED", "OTP_FAIL"])
     latency_ms = int(max(20, random.gauss(90 if ok else 160, 25)))
 
-    with engine.begin() as conn:
-        conn.execute(
-            text("""
-                INSERT INTO login_events
-                    (ts, channel, user_hash, ip, ua, fingerprint, result, fail_reason, latency_ms)
-                VALUES
-                    (:ts, :channel, :user_hash, :ip, :ua, :fp, :result, :fail_reason, :latency_ms)
-            """),
-            dict(
-                ts=now, channel=channel, user_hash=user_hash,
-                ip=ip, ua=ua, fp=fingerprint,
-                result=result, fail_reason=fail_reason, latency_ms=latency_ms
-            )
-        )
+    # 실제 수집과 같은 writer 경로로 넣어야 인메모리 집계에도 반영된다
+    sink.submit(dict(
+        ts=now.isoformat(), ts_ms=to_epoch_ms(now), channel=channel, user_hash=user_hash,
+        ip=ip, ua=ua, fingerprint=fingerprint,
+        result=result, fail_reason=fail_reason, latency_ms=latency_ms
+    ))
 
-def _bg_traffic_loop(engine, stop_event: threading.Event) -> None:
+def _bg_traffic_loop(sink: BatchWriter, stop_event: threading.Event) -> None:
     # 환경변수로 유량/패턴 제어
     base_sleep   = float(os.getenv("BG_BASE_SLEEP",  "2.0"))   # 기본 간격(초)
     burst_prob   = float(os.getenv("BG_BURST_PROB",  "0.12"))  # 버스트(장애/공격) 확률
@@ -101,10 +193,10 @@ def _bg_traffic_loop(engine, stop_event: threading.Event) -> None:
         try:
             if random.random() < burst_prob:
                 for _ in range(burst_batch):
-                    _insert_dummy_once(engine, success_ratio=burst_succ)
+                    _insert_dummy_once(sink, success_ratio=burst_succ)
             else:
                 for _ in range(normal_batch):
-                    _insert_dummy_once(engine, success_ratio=normal_succ)
+                    _insert_dummy_once(sink, success_ratio=normal_succ)
             time.sleep(base_sleep)
         except Exception as e:
             print(f"[bg-traffic] error: {e}", flush=True)
@@ -122,71 +214,353 @@ def _start_bg_traffic():
     if os.getenv("ENABLE_BG_TRAFFIC") == "1":
         print("[bg-traffic] enabled", flush=True)
         _bg_thread = threading.Thread(
-            target=_bg_traffic_loop, args=(engine, _stop_event), daemon=True
+            target=_bg_traffic_loop, args=(writer, _stop_event), daemon=True
         )
         _bg_thread.start()
     else:
         print("[bg-traffic] disabled (set ENABLE_BG_TRAFFIC=1 to enable)", flush=True)
 
+@app.on_event("startup")
+def _start_writer():
+    # 집계 상태는 기동 시 한 번만 DB에서 복원
+    aggregator.rebuild(engine)
+    writer.start()
+
+@app.on_event("startup")
+def _start_scheduler():
+    scheduler.add_job(_compact_rollups_job, "interval", minutes=ROLLUP_COMPACT_INTERVAL_MIN,
+                      id="rollup-compact", next_run_time=datetime.now(timezone.utc),
+                      max_instances=1, coalesce=True)
+    scheduler.add_job(_maintain_partitions_job, "interval", minutes=PARTITION_MAINT_INTERVAL_MIN,
+                      id="partition-maint", next_run_time=datetime.now(timezone.utc),
+                      max_instances=1, coalesce=True)
+    model.load()
+    scheduler.add_job(_train_model_job, "interval", minutes=MODEL_RETRAIN_MIN,
+                      id="model-train", next_run_time=datetime.now(timezone.utc),
+                      max_instances=1, coalesce=True)
+    # 분이 닫힌 직후(매분 1초) 알림 평가, 기동 직후에도 한 번
+    scheduler.add_job(evaluator.safe_run, "cron", second=1, id="alert-eval",
+                      next_run_time=datetime.now(timezone.utc), max_instances=1, coalesce=True)
+    scheduler.start()
+
+@app.on_event("startup")
+def _start_profiler():
+    if PROFILE_ENABLED:
+        profiler.start()
+
+@app.on_event("shutdown")
+def _stop_profiler():
+    profiler.stop()
+
+@app.on_event("startup")
+async def _start_live_hub():
+    live_hub.start()
+
+@app.on_event("shutdown")
+async def _stop_live_hub():
+    await live_hub.stop()
+
+@app.on_event("shutdown")
+def _stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+
 @app.on_event("shutdown")
 def _stop_bg_traffic():
     if _stop_event:
         _stop_event.set()
 
+@app.on_event("shutdown")
+def _stop_writer():
+    # 큐에 남은 이벤트를 모두 기록한 뒤 종료
+    writer.stop()
+
+@app.on_event("shutdown")
+def _stop_segment_pool():
+    segment_detector.shutdown()
+
+@app.on_event("shutdown")
+def _stop_slack_dispatcher():
+    # 대기 중인 Slack 알림을 보내고 종료
+    slack_dispatcher.stop()
+
 # ====== 모델 ======
-class LoginReq(BaseModel):
-    email: str | None = None
-    password: str | None = None
+class EventIn(BaseModel):
+    """상위 인증 계층에서 이미 판정이 끝난 로그인 이벤트"""
+    ts: datetime | None = None
     channel: str = "WEB"
-    fingerprint: str = "anon"
-    ua: str | None = None
+    user_hash: str | None = None
     ip: str | None = None
+    ua: str | None = None
+    fingerprint: str | None = None
+    result: Literal["SUCCESS", "FAIL"]
+    fail_reason: str | None = None
+    latency_ms: int | None = Field(default=None, ge=0)
+
+def _event_row(ev: EventIn) -> dict:
+    ts = ev.ts or datetime.now(timezone.utc)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)  # 타임존 없는 값은 UTC로 간주
+    fail_reason = ev.fail_reason or ("NONE" if ev.result == "SUCCESS" else "UNKNOWN")
+    ts = ts.astimezone(timezone.utc)
+    if ts > datetime.now(timezone.utc) + timedelta(seconds=EVENTS_MAX_FUTURE_SEC):
+        # 미래 시각은 집계 창/파티션을 어지럽힌다(시계 오차 EVENTS_MAX_FUTURE_SEC까지만 허용)
+        raise ValueError(f"ts is in the future (more than {EVENTS_MAX_FUTURE_SEC:g}s ahead)")
+    return dict(ts=ts.isoformat(), ts_ms=to_epoch_ms(ts), channel=ev.channel,
+                user_hash=ev.user_hash, ip=ev.ip, ua=ev.ua, fingerprint=ev.fingerprint,
+                result=ev.result, fail_reason=fail_reason, latency_ms=ev.latency_ms)
+
+def _validate_events(items: list, offset: int = 0) -> tuple[list[dict], list[dict]]:
+    """행 단위 검증 → (INSERT할 행, 거부 사유 목록)"""
+    rows, errors = [], []
+    for i, item in enumerate(items):
+        try:
+            rows.append(_event_row(EventIn.model_validate(item)))
+        except ValidationError as e:
+            errors.append({"index": offset + i, "error": e.errors(include_url=False)[0]["msg"]})
+        except ValueError as e:
+            errors.append({"index": offset + i, "error": str(e)})
+    return rows, errors
+
+def _ingest_report(accepted: int, errors: list[dict]) -> dict:
+    return {
+        "accepted": accepted,
+        "rejected": len(errors),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+    }
 
 # ====== 엔드포인트들 ======
 @app.post("/login")
 async def login(req: LoginReq, request: Request):
-    # 토이 규칙: user@example.com / pass123 → SUCCESS 그 외 FAIL
-    ok = (req.email == "user@example.com" and req.password == "pass123")
-    result = "SUCCESS" if ok else "FAIL"
-    fail_reason = "NONE" if ok else "INVALID_PW"
-    latency_ms = 80 if ok else 120
-
-    user_hash = hashlib.sha256((req.email or "").encode()).hexdigest()
-    ip = req.ip or request.client.host
-    ua = req.ua or request.headers.get("user-agent", "")
-    now = datetime.now(timezone.utc).isoformat()
-
-    with engine.begin() as conn:
-        conn.execute(
-            text("""INSERT INTO login_events
-              (ts, channel, user_hash, ip, ua, fingerprint, result, fail_reason, latency_ms)
-              VALUES (:ts, :channel, :user_hash, :ip, :ua, :fp, :result, :fail, :lat)"""),
-            dict(ts=now, channel=req.channel, user_hash=user_hash, ip=ip, ua=ua,
-                 fp=req.fingerprint, result=result, fail=fail_reason, lat=latency_ms)
-        )
-    return {"ok": ok, "result": result}
+    return await handle_login(req, request, login_guard, _submit_login)
+
+async def _submit_login(row: dict) -> bool:
+    return await writer.asubmit(row, timeout=INGEST_SUBMIT_TIMEOUT)
+
+if OWNER_ROLE:
+    class RateLimitKeys(BaseModel):
+        ip: str | None = None
+        fingerprint: str | None = None
+        user_hash: str | None = None
+
+    class RateLimitRecord(BaseModel):
+        user_hash: str | None = None
+        ok: bool
+
+    class RateLimitBatch(BaseModel):
+        records: list[RateLimitRecord] = []
+        checks: list[RateLimitKeys] = []
+
+    # async: LoginGuard는 이벤트 루프에서만 호출(락 없음)
+    @app.post("/internal/ratelimit/batch")
+    async def ratelimit_batch(batch: RateLimitBatch):
+        """워커가 묶어 보낸 판정 결과(record)를 먼저 반영한 뒤 검사(check) → {decisions: [[blocked, retry_after], ...]}"""
+        for rec in batch.records:
+            login_guard.record(rec.user_hash, rec.ok)
+        return {"decisions": [list(login_guard.check(k.model_dump())) for k in batch.checks]}
+
+@app.post("/events/batch")
+def ingest_batch(items: list[Any] = Body(...)):
+    """
+    이벤트 JSON 배열 일괄 수집.
+    행 단위로 검증하고, 통과한 행은 한 트랜잭션의 단일 executemany로 기록한다.
+    """
+    if len(items) > EVENTS_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"batch too large (max {EVENTS_BATCH_MAX})")
+    rows, errors = _validate_events(items)
+    writer.write_batch(rows)
+    return _ingest_report(len(rows), errors)
+
+@app.post("/events/stream")
+async def ingest_stream(request: Request):
+    """
+    NDJSON(한 줄에 이벤트 1건) chunked 스트리밍 수집.
+    EVENTS_STREAM_CHUNK 건마다 한 트랜잭션으로 기록한다. 한 줄이 EVENTS_STREAM_LINE_MAX를 넘으면 413
+    (그 전까지 기록된 건은 남는다).
+    """
+    accepted, errors = 0, []
+    pending: list[dict] = []
+    buf = bytearray()
+    line_no = 0
+
+    def _take_line(raw: bytes) -> None:
+        nonlocal line_no
+        raw = raw.strip()
+        if not raw:
+            return
+        idx = line_no
+        line_no += 1
+        try:
+            item = json.loads(raw)
+        except ValueError:
+            errors.append({"index": idx, "error": "invalid JSON"})
+            return
+        rows, errs = _validate_events([item], offset=idx)
+        pending.extend(rows)
+        errors.extend(errs)
+
+    def _too_long() -> HTTPException:
+        return HTTPException(status_code=413, detail=f"line {line_no} too long (max {EVENTS_STREAM_LINE_MAX} bytes)")
+
+    async for chunk in request.stream():
+        # 새 청크에서만 줄을 나눈다(미완성 줄 buf를 매번 다시 복사/분할하지 않음)
+        *lines, tail = chunk.split(b"\n")
+        if lines:
+            buf += lines[0]
+            lines[0] = bytes(buf)
+            buf = bytearray()
+        for raw in lines:
+            if len(raw) > EVENTS_STREAM_LINE_MAX:
+                raise _too_long()
+            _take_line(raw)
+        buf += tail
+        if len(buf) > EVENTS_STREAM_LINE_MAX:
+            raise _too_long()
+        while len(pending) >= EVENTS_STREAM_CHUNK:
+            accepted += await run_in_threadpool(writer.write_batch, pending[:EVENTS_STREAM_CHUNK])
+            del pending[:EVENTS_STREAM_CHUNK]
+    _take_line(buf)
+    if pending:
+        accepted += await run_in_threadpool(writer.write_batch, pending)
+    return _ingest_report(accepted, errors)
 
 @app.get("/health")
 def health():
     return {"ok": True}
 
+@app.get("/model")
+def model_info():
+    """현재 서비스 중인 이상치 모델 정보(fingerprint/학습 시각)"""
+    return model.info()
+
+@app.get("/model/segments")
+def segment_info():
+    """세그먼트별 최근 점수/평가·건너뜀 수(SEGMENT_DIMS)"""
+    return segment_detector.info()
+
+@app.get("/ingest/stats")
+def ingest_stats():
+    """writer 큐 깊이/배치 크기 통계"""
+    return writer.stats()
+
+@app.get("/storage/stats")
+def storage_stats():
+    """원시 이벤트 파티션 목록/보존 설정과 DB 파일 크기"""
+    return partition_stats(engine)
+
+@app.get("/ratelimit/stats")
+def ratelimit_stats():
+    """/login 속도 제한/잠금 카운터와 추적 중인 key 수"""
+    return login_guard.info()
+
+def _build_metrics() -> dict:
+    base = snapshot_frames(engine, aggregator=aggregator)
+    state = evaluator.state()
+    base["alerts"] = state["alerts"]
+    base["summary"] = state["summary"]
+    base["evaluatedAt"] = state["evaluatedAt"]
+    return base
+
+@app.get("/internal/metrics")
+def internal_metrics():
+    """서비스 자체 계측(Prometheus 텍스트 포맷). 제품 지표인 /metrics 와 별개"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/internal/profiler")
+def profiler_info():
+    """샘플링 프로파일러 상태와 단계별 샘플 수"""
+    return profiler.info()
+
+@app.post("/internal/profiler")
+def profiler_toggle(enabled: bool = Query(...), interval_ms: float | None = Query(None, gt=0),
+                    reset: bool = False):
+    """프로파일러 켜기/끄기(옵트인). reset=true면 모은 스택을 비운다"""
+    if reset:
+        profiler.reset()
+    if enabled:
+        profiler.start(interval_ms)
+    else:
+        profiler.stop()
+    return profiler.info()
+
+@app.get("/internal/profiler/flame", response_class=PlainTextResponse)
+def profiler_flame(stage: str | None = None):
+    """단계별 folded stacks(flamegraph.pl / speedscope 입력). stage 접두사로 거를 수 있다"""
+    return PlainTextResponse(profiler.dump(stage))
+
+def _metrics_cache_key() -> tuple:
+    # 현재 분 버킷이 바뀌거나, 집계에 새 이벤트가 들어오거나(열린 분 포인트), 평가기가 새 결과를 내면 무효화
+    return (int(time.time()) // 60, aggregator.version, evaluator.state()["generation"])
+
+FORMAT_QUERY = Query(None, description="json|columns|msgpack|arrow (없으면 Accept 헤더로 협상)")
+
 @app.get("/metrics")
-def metrics():
+def metrics(request: Request, format: str | None = FORMAT_QUERY):
     """
-    최근 ~60분 데이터를 바탕으로 KPI/시계열/채널별 현황 및 알림을 생성하고,
-    Azure OpenAI로 요약(summary)을 덧붙여 반환한다.
+    최근 ~60분 KPI/시계열/채널별 현황에, 백그라운드 평가기가 분마다 만든
+    알림(alerts)과 Azure OpenAI 요약(summary)을 덧붙여 반환한다.
+    (평가/요약/Slack 발송은 이 요청에서 일어나지 않는다)
+    새 이벤트가 없는 동안은 직렬화된 응답을 재사용하고 ETag/Last-Modified로 304를 지원한다.
+    포맷: json(행 배열, 기본) / columns / msgpack / arrow — api/wire.py 참고
     """
-    base = compute_metrics(engine)
-    try:
-        base["summary"] = summarize_alerts(base)
-    except Exception:
-        base["summary"] = None
+    fmt = negotiate(request, format)
+    entry = metrics_cache.get(_metrics_cache_key(), _build_metrics, fmt)
+    return conditional_response(request, entry, media_type=MEDIA_TYPES[fmt])
+
+@app.get("/metrics/stream")
+async def metrics_stream(request: Request):
+    """
+    Server-Sent Events 라이브 스트림.
+    접속 시 snapshot(분별 창 전체) 1회, 이후 tick/minute/alerts 델타만 보낸다.
+    """
+    q = live_hub.subscribe()
 
-    # 슬랙 Block Kit 알림
-    for a in base.get("alerts", []):
+    async def events():
         try:
-            notify_slack_blocks(a, base.get("summary"), base.get("kpis", {}))
-        except Exception as e:
-            print("notify_slack_blocks error:", e, flush=True)
+            yield sse_format("snapshot", live_hub.snapshot())
+            while True:
+                try:
+                    msg = await asyncio.wait_for(q.get(), timeout=LIVE_KEEPALIVE_SEC)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keep-alive\n\n"
+                    continue
+                if msg is None:     # 너무 느린 구독자 → 끊고 재접속 유도
+                    break
+                yield msg
+        finally:
+            live_hub.unsubscribe(q)
 
-    return base
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/alerts")
+def alerts_history(minutes: int = Query(60, ge=1, le=7 * 24 * 60), limit: int = Query(500, ge=1, le=5000)):
+    """alerts 테이블의 최근 알림 이력"""
+    since_ms = to_epoch_ms(datetime.now(timezone.utc) - timedelta(minutes=minutes))
+    return {"alerts": read_alerts(engine, since_ms, limit)}
+
+@app.get("/metrics/range")
+def metrics_range(
+    request: Request,
+    start: datetime | None = Query(None, description="ISO-8601, 기본값 end-24h"),
+    end: datetime | None = Query(None, description="ISO-8601, 기본값 현재"),
+    resolution: str | None = Query(None, description="1m|5m|15m|1h|6h|1d|auto"),
+    format: str | None = FORMAT_QUERY,
+):
+    """
+    롤업 테이블 기반 기간 조회.
+    요청 해상도를 만족하는 가장 거친 롤업(1m/5m/1h)에서 읽어 원시 이벤트량과 무관하게 응답한다.
+    """
+    end = end or datetime.now(timezone.utc)
+    start = start or (end - timedelta(hours=24))
+    start_ms, end_ms = to_epoch_ms(start), to_epoch_ms(end)
+    if start_ms >= end_ms:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    fmt = negotiate(request, format)
+    try:
+        out = query_range(engine, start_ms, end_ms, resolution, frames=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=ENCODERS[fmt](out), media_type=MEDIA_TYPES[fmt], headers={"Vary": "Accept"})
@@ -0,0 +1,129 @@
+# src/api/wire.py
+"""
+/metrics, /metrics/range 응답 포맷 협상과 직렬화.
+- json    : 기존 행(dict) 배열 (기본값, 프론트 호환)
+- columns : 필드당 배열 하나인 컬럼형 JSON
+- msgpack : columns와 같은 구조를 MessagePack으로
+- arrow   : timeseries를 Arrow IPC stream으로, 나머지 필드는 스키마 메타데이터(JSON)로
+컬럼형 포맷은 DataFrame 열을 그대로 옮기며 ts는 epoch ms(정수)다.
+"""
+from typing import Any, Callable, Dict
+
+import pandas as pd
+from fastapi import HTTPException, Request
+
+from api.cache import _dumps
+from store.db import iso_from_ms
+
+try:
+    import msgpack
+except ImportError:         # 선택 의존성: 없으면 msgpack 요청만 406
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columns": "application/vnd.login-control.columns+json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+# Accept 헤더에서 인식하는 별칭
+_ACCEPT = {
+    "application/json": "json",
+    "application/vnd.login-control.columns+json": "columns",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.apache.arrow.stream": "arrow",
+}
+
+
+def available(fmt: str) -> bool:
+    return fmt in MEDIA_TYPES and not (
+        (fmt == "msgpack" and msgpack is None) or (fmt == "arrow" and pa is None))
+
+
+def negotiate(request: Request, fmt: str | None = None) -> str:
+    """?format= 가 있으면 우선, 없으면 Accept 헤더(q 값 순). 모르면 json"""
+    if fmt:
+        if fmt not in MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"unknown format {fmt!r}")
+        if not available(fmt):
+            raise HTTPException(status_code=406, detail=f"format {fmt!r} is not available on this server")
+        return fmt
+    ranked = []
+    for i, part in enumerate(request.headers.get("accept", "").split(",")):
+        media, _, params = part.strip().partition(";")
+        q = 1.0
+        for p in params.split(";"):
+            k, _, v = p.strip().partition("=")
+            if k == "q":
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        ranked.append((-q, i, media.strip().lower()))
+    for _, _, media in sorted(ranked):
+        f = _ACCEPT.get(media)
+        if f and available(f):
+            return f
+    return "json"
+
+
+def _jsonable(v: Any) -> Any:
+    if isinstance(v, pd.DataFrame):
+        return {c: v[c].tolist() for c in v.columns}
+    return v
+
+
+def to_columns(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """DataFrame 필드를 {열: 리스트}로 (배열 단위 tolist, 행 단위 루프 없음)"""
+    return {k: _jsonable(v) for k, v in payload.items()}
+
+
+def to_rows(payload: Dict[str, Any]) -> Dict[str, Any]:
+    out = {}
+    for k, v in payload.items():
+        if isinstance(v, pd.DataFrame):
+            if "ts" in v.columns:
+                v = v.assign(ts=iso_from_ms(v["ts"]))
+            v = v.to_dict("records")
+        out[k] = v
+    return out
+
+
+def encode_json(payload: Dict[str, Any]) -> bytes:
+    return _dumps(to_rows(payload))
+
+
+def encode_columns(payload: Dict[str, Any]) -> bytes:
+    return _dumps(to_columns(payload))
+
+
+def encode_msgpack(payload: Dict[str, Any]) -> bytes:
+    return msgpack.packb(to_columns(payload), use_bin_type=True)
+
+
+def encode_arrow(payload: Dict[str, Any]) -> bytes:
+    series = payload["timeseries"]
+    table = pa.Table.from_pandas(series, preserve_index=False)
+    if "ts" in series.columns:
+        i = table.schema.get_field_index("ts")
+        table = table.set_column(i, "ts", table.column("ts").cast(pa.timestamp("ms", tz="UTC")))
+    meta = {k: v for k, v in payload.items() if k != "timeseries"}
+    table = table.replace_schema_metadata({"meta": _dumps(to_columns(meta))})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as w:
+        w.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+ENCODERS: Dict[str, Callable[[Dict[str, Any]], bytes]] = {
+    "json": encode_json,
+    "columns": encode_columns,
+    "msgpack": encode_msgpack,
+    "arrow": encode_arrow,
+}
@@ -0,0 +1,263 @@
+# src/api/worker.py
+"""
+멀티 워커 모드의 프런트 워커 앱 (gunicorn -c gunicorn_conf.py).
+- DB/집계/스케줄러는 owner 프로세스(api.server:app, Unix 소켓) 하나만 가진다.
+- 워커는 /login을 직접 처리하고 이벤트를 배치로 모아 owner의 /events/stream(NDJSON)으로 넘긴다.
+- 속도 제한/잠금은 owner의 LoginGuard 하나가 판정한다(워커 수와 무관하게 같은 한도). 워커는 Unix 소켓으로
+  /internal/ratelimit/batch를 부른다(동시 요청의 check·record를 한 호출로 묶음). owner에 닿지 못할 때만
+  워커 로컬 LoginGuard로 판정한다.
+- 그 밖의 요청(/metrics, /metrics/range, /alerts, SSE 등)은 owner로 그대로 프록시한다.
+"""
+import asyncio
+import json
+import os
+import posixpath
+import time
+from typing import Any, Dict, List, Tuple
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+
+from api.login import LoginReq, handle_login
+from api.ratelimit import LoginGuard
+from telemetry.metrics import CONTENT_TYPE, REGISTRY
+
+OWNER_SOCKET = os.getenv("OWNER_SOCKET", "/tmp/login-control-owner.sock")
+FORWARD_QUEUE_MAX = int(os.getenv("FORWARD_QUEUE_MAX", "10000"))
+FORWARD_BATCH = int(os.getenv("FORWARD_BATCH", "500"))
+FORWARD_MAX_WAIT_MS = float(os.getenv("FORWARD_MAX_WAIT_MS", "50"))
+FORWARD_RETRIES = int(os.getenv("FORWARD_RETRIES", "8"))         # 백오프 합계 ≈ 7초
+INGEST_SUBMIT_TIMEOUT = float(os.getenv("INGEST_SUBMIT_TIMEOUT_MS", "100")) / 1000.0
+
+RATELIMIT_TIMEOUT = float(os.getenv("RATELIMIT_OWNER_TIMEOUT_MS", "200")) / 1000.0
+
+# 워커 → owner 전용(외부 요청은 프록시하지 않는다: 잠금 해제/우회 방지)
+OWNER_ONLY_PATHS = ("internal/ratelimit/",)
+
+# 프록시가 그대로 넘기면 안 되는 hop-by-hop 헤더
+HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "te", "trailer", "upgrade",
+               "proxy-authorization", "proxy-authenticate", "host", "content-length"}
+
+
+class EventForwarder:
+    """워커 → owner 이벤트 전달 큐. 배치 단위 NDJSON POST, 실패 시 백오프 재시도"""
+
+    def __init__(self, client: httpx.AsyncClient, max_queue: int = FORWARD_QUEUE_MAX,
+                 batch_size: int = FORWARD_BATCH, max_wait_ms: float = FORWARD_MAX_WAIT_MS):
+        self.client = client
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._task: asyncio.Task | None = None
+        self._stats = dict(forwarded=0, batches=0, rejected=0, dropped=0, retries=0)
+
+    async def submit(self, row: Dict[str, Any], timeout: float = INGEST_SUBMIT_TIMEOUT) -> bool:
+        try:
+            self.queue.put_nowait(row)
+            return True
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(self.queue.put(row), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self._stats["rejected"] += 1
+            return False
+
+    async def _collect(self) -> List[Dict[str, Any]]:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), left))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _send(self, batch: List[Dict[str, Any]]) -> None:
+        body = "\n".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) for r in batch).encode("utf-8")
+        for attempt in range(FORWARD_RETRIES + 1):
+            try:
+                r = await self.client.post("/events/stream", content=body,
+                                           headers={"Content-Type": "application/x-ndjson"})
+                r.raise_for_status()
+                self._stats["forwarded"] += r.json().get("accepted", 0)
+                self._stats["batches"] += 1
+                return
+            except (httpx.HTTPError, ValueError) as e:
+                if attempt == FORWARD_RETRIES:
+                    self._stats["dropped"] += len(batch)
+                    print(f"[worker {os.getpid()}] forward failed, dropped {len(batch)} events: {e}", flush=True)
+                    return
+                self._stats["retries"] += 1
+                await asyncio.sleep(min(2.0, 0.05 * 2 ** attempt))   # owner 재시작 등 일시 장애
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            await self._send(batch)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """남은 이벤트를 전달하고 종료"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        pending = []
+        while not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+        for i in range(0, len(pending), self.batch_size):
+            await self._send(pending[i:i + self.batch_size])
+
+    def stats(self) -> dict:
+        return dict(self._stats, queue_depth=self.queue.qsize())
+
+
+class OwnerLoginGuard:
+    """handle_login용 guard: 판정은 owner의 LoginGuard에 맡긴다. owner 장애 시에는 로컬 LoginGuard로
+    - 그룹 커밋: owner 호출이 진행 중인 동안 쌓인 check·record를 다음 한 번의 /internal/ratelimit/batch로 묶는다
+      (요청마다 왕복 2회 → 부하가 걸릴수록 요청당 왕복이 1회 미만으로 줄어든다)
+    - record는 기다리지 않는다(fire-and-forget). 같은 배치에서는 record를 check보다 먼저 반영한다
+    """
+
+    def __init__(self, client: httpx.AsyncClient, timeout: float = RATELIMIT_TIMEOUT):
+        self.client = client
+        self.timeout = timeout
+        self.local = LoginGuard()
+        self._checks: List[Tuple[Dict[str, str | None], asyncio.Future]] = []
+        self._records: List[Dict[str, Any]] = []
+        self._task: asyncio.Task | None = None
+        self._stats = dict(remote=0, fallback=0, calls=0, checks=0, records=0)
+
+    def _kick(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self) -> None:
+        while self._checks or self._records:
+            checks, self._checks = self._checks, []
+            records, self._records = self._records, []
+            decisions = await self._call(records, [k for k, _ in checks])
+            if decisions is None:
+                for rec in records:
+                    self.local.record(rec["user_hash"], rec["ok"])
+                decisions = [self.local.check(k) for k, _ in checks]
+            for (_, fut), d in zip(checks, decisions):
+                if not fut.done():
+                    fut.set_result((d[0], d[1]))
+
+    async def _call(self, records: List[Dict[str, Any]], checks: List[Dict[str, str | None]]) -> List | None:
+        try:
+            r = await self.client.post("/internal/ratelimit/batch", json=dict(records=records, checks=checks),
+                                       timeout=self.timeout)
+            r.raise_for_status()
+            decisions = r.json()["decisions"]
+            if len(decisions) != len(checks):
+                raise ValueError(f"expected {len(checks)} decisions, got {len(decisions)}")
+            self._stats["remote"] += len(checks) + len(records)
+            self._stats["calls"] += 1
+            return decisions
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            if self._stats["fallback"] == 0:
+                print(f"[worker {os.getpid()}] ratelimit via owner failed, using local guard: {e}", flush=True)
+            self._stats["fallback"] += len(checks) + len(records)
+            return None
+
+    async def acheck(self, keys: Dict[str, str | None]) -> Tuple[str | None, int]:
+        fut = asyncio.get_running_loop().create_future()
+        self._checks.append((keys, fut))
+        self._stats["checks"] += 1
+        self._kick()
+        return await fut
+
+    async def arecord(self, user_hash: str | None, ok: bool) -> None:
+        self._records.append(dict(user_hash=user_hash, ok=ok))
+        self._stats["records"] += 1
+        self._kick()
+
+    async def drain(self) -> None:
+        """남은 record를 owner로 보내고 종료"""
+        if self._task is not None:
+            await self._task
+
+    def info(self) -> dict:
+        s = dict(self._stats, local=self.local.info())
+        s["per_call"] = round((s["checks"] + s["records"]) / s["calls"], 2) if s["calls"] else 0.0
+        return s
+
+
+owner = httpx.AsyncClient(
+    transport=httpx.AsyncHTTPTransport(uds=OWNER_SOCKET),
+    base_url="http://owner",
+    timeout=httpx.Timeout(30.0, read=None),     # SSE(/metrics/stream)는 읽기 타임아웃 없음
+)
+forwarder = EventForwarder(owner)
+login_guard = OwnerLoginGuard(owner)
+
+REGISTRY.gauge("lcs_queue_depth", "Items waiting in in-process queues",
+               lambda: {("forward",): forwarder.queue.qsize()}, ("queue",))
+REGISTRY.gauge("lcs_forward_events_total", "Worker to owner event forwarding", lambda: {
+    (k,): v for k, v in forwarder.stats().items() if k in ("forwarded", "rejected", "dropped", "retries")
+}, ("outcome",), kind="counter")
+
+app = FastAPI(title="Login API · worker")
+
+
+@app.on_event("startup")
+async def _start_forwarder():
+    forwarder.start()
+
+
+@app.on_event("shutdown")
+async def _stop_forwarder():
+    await login_guard.drain()
+    await forwarder.stop()
+    await owner.aclose()
+
+
+@app.post("/login")
+async def login(req: LoginReq, request: Request):
+    return await handle_login(req, request, login_guard, forwarder.submit)
+
+
+@app.get("/worker/stats")
+def worker_stats():
+    """이 워커의 전달 큐/속도 제한 통계"""
+    return dict(pid=os.getpid(), forward=forwarder.stats(), ratelimit=login_guard.info())
+
+
+@app.get("/internal/metrics/worker")
+def internal_metrics_worker():
+    """
+    응답한 워커 프로세스의 계측(/login 지연, 전달 큐). /internal/metrics 는 owner 것이 프록시된다.
+    워커별 값은 pid 라벨 없이 나가므로 스크레이프마다 다른 워커가 응답할 수 있다.
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE, headers={"X-Worker-Pid": str(os.getpid())})
+
+
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"])
+async def proxy(path: str, request: Request):
+    """나머지는 owner로 그대로(요청/응답 본문 모두 스트리밍)"""
+    if posixpath.normpath("/" + path).lstrip("/").startswith(OWNER_ONLY_PATHS):
+        return Response(status_code=404)
+    headers = [(k, v) for k, v in request.headers.items() if k.lower() not in HOP_HEADERS]
+    body = request.stream() if request.method in ("POST", "PUT", "PATCH") else None
+    req = owner.build_request(request.method, "/" + path, params=request.query_params,
+                              headers=headers, content=body)
+    resp = await owner.send(req, stream=True)
+    out_headers = {k: v for k, v in resp.headers.items() if k.lower() not in HOP_HEADERS}
+    return StreamingResponse(resp.aiter_raw(), status_code=resp.status_code, headers=out_headers,
+                             background=BackgroundTask(resp.aclose))
@@ -1,8 +1,10 @@
 # src/dashboard/streamlit_app.py
+import json
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 
 import pandas as pd
+import pyarrow as pa
 import requests
 import streamlit as st
 from dotenv import load_dotenv
@@ -26,25 +28,56 @@ with st.sidebar:
         help="예: https://login-control.azurewebsites.net",
         placeholder="https://<your-fastapi-app>.azurewebsites.net",
     )
-    manual = st.button("🔄 Refresh now")  # 수동 새로고침만 유지
+    mode = st.radio("Update mode", ["Polling", "Live (SSE)"],
+                    help="Live: /metrics/stream 구독, 서버가 바뀐 분/알림만 푸시")
+    manual = st.button("🔄 Refresh now")  # Polling 모드: 수동 새로고침
 
 status = st.empty()
 kpi_area = st.empty()
 left, right = st.columns([2, 1])
+left_area = left.empty()
+right_area = right.empty()
 alerts_area = st.empty()
 summary_area = st.empty()
 
 # =========================
 # API fetch
 # =========================
+@st.cache_resource
+def _http_state():
+    # 세션 간 공유: 커넥션 재사용 + URL별 (ETag, 마지막 응답)
+    return requests.Session(), {}
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+def _decode_arrow(body: bytes) -> dict:
+    """timeseries는 Arrow 테이블 → DataFrame, 나머지 필드는 스키마 메타데이터(JSON)"""
+    table = pa.ipc.open_stream(body).read_all()
+    data = json.loads(table.schema.metadata[b"meta"])
+    data["timeseries"] = table.to_pandas()
+    data["byChannel"] = pd.DataFrame(data.get("byChannel") or {})
+    return data
+
 @st.cache_data(ttl=10)
 def fetch_metrics_from_api(base_url: str):
     if not base_url:
         raise ValueError("API Base URL이 비어 있습니다. 사이드바에 입력하세요.")
     url = f"{base_url.rstrip('/')}/metrics"
-    r = requests.get(url, timeout=10)
+    session, last = _http_state()
+    headers = {"If-None-Match": last[url][0]} if url in last else {}
+    # Arrow IPC 우선(시계열을 행 dict 없이 바로 DataFrame으로), 구버전 서버면 JSON
+    headers["Accept"] = f"{ARROW_STREAM}, application/json;q=0.5"
+    r = session.get(url, headers=headers, timeout=10)
+    if r.status_code == 304:      # 서버 측 값이 그대로면 본문 없이 재사용
+        return last[url][1]
     r.raise_for_status()
-    return r.json()
+    if r.headers.get("Content-Type", "").startswith(ARROW_STREAM):
+        data = _decode_arrow(r.content)
+    else:
+        data = r.json()
+    if r.headers.get("ETag"):
+        last[url] = (r.headers["ETag"], data)
+    return data
 
 def render(data: dict):
     k = data.get("kpis", {}) or {}
@@ -62,9 +95,10 @@ def render(data: dict):
         c4.metric("High-Risk (est.)", f"{high_risk:,}")
 
     # Charts: Timeseries
-    with left:
+    with left_area.container():
         st.subheader("Attempts & Failures (last ~60m)")
-        ts = pd.DataFrame(data.get("timeseries", []))
+        ts = data.get("timeseries", [])
+        ts = ts if isinstance(ts, pd.DataFrame) else pd.DataFrame(ts)
         if not ts.empty:
             ts["ts"] = pd.to_datetime(ts["ts"], utc=True, errors="coerce")
             ts = ts.dropna(subset=["ts"]).set_index("ts").sort_index()
@@ -77,9 +111,10 @@ def render(data: dict):
             st.info("No data yet. /login 호출로 데이터를 생성하세요.")
 
     # Charts: By Channel
-    with right:
+    with right_area.container():
         st.subheader("By Channel")
-        bc = pd.DataFrame(data.get("byChannel", []))
+        bc = data.get("byChannel", [])
+        bc = bc if isinstance(bc, pd.DataFrame) else pd.DataFrame(bc)
         if not bc.empty:
             idxed = bc.set_index("channel")
             cols = [c for c in ["attempts", "failures"] if c in idxed.columns]
@@ -120,13 +155,103 @@ def render(data: dict):
             st.caption("요약 없음 (서버 측 환경변수 미설정 또는 데이터 부족/호출 실패)")
 
 # =========================
-# Run (manual refresh only)
+# Live (SSE)
+# =========================
+LIVE_MAX_ALERTS = 50
+
+def _iter_sse(lines):
+    """text/event-stream 줄 단위 파싱 → (event, data)"""
+    event, data = None, []
+    for raw in lines:
+        line = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        if not line:
+            if data:
+                yield event or "message", json.loads("\n".join(data))
+            event, data = None, []
+        elif line.startswith(":"):
+            continue                  # keep-alive 주석
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+
+def _alert_key(a: dict) -> tuple:
+    # 유형·시각 + 대상(채널/heavy hitter key): 같은 분의 서로 다른 원천 알림은 따로 둔다
+    return (a.get("type"), a.get("time"), a.get("channel"), a.get("key"))
+
+def _merge_alerts(current: list, new: list) -> list:
+    """같은 알림(_alert_key)은 한 번만. 재연결/재전송으로 온 중복은 최신 내용으로 덮어쓴다"""
+    merged = {_alert_key(a): a for a in current}
+    for a in new:
+        merged.pop(_alert_key(a), None)
+        merged[_alert_key(a)] = a
+    return list(merged.values())[-LIVE_MAX_ALERTS:]
+
+def _live_view(live: dict) -> dict:
+    """분별 창(live["window"])에서 /metrics와 같은 모양의 dict를 만든다"""
+    window = [live["window"][k] for k in sorted(live["window"])][-60:]
+    # KPI는 마지막 닫힌 분(진행 중인 분은 아직 덜 찼다). 시계열/채널 합계에는 진행 중인 분도 포함
+    last = next((w for w in reversed(window) if w["ts"] not in live["open"]), {})
+    attempts, failures = int(last.get("attempts", 0)), int(last.get("failures", 0))
+    kpis = dict(attempts=attempts, failures=failures,
+                failRate=(failures / attempts) if attempts else 0.0,
+                highRisk=int(max(0, round(failures * 0.3))))
+    totals: dict = {}
+    for w in window:
+        for ch, (a, f) in (w.get("channels") or {}).items():
+            t = totals.setdefault(ch, [0, 0])
+            t[0] += a
+            t[1] += f
+    byChannel = [dict(channel=ch, attempts=a, failures=f, failRate=(f / a) if a else 0.0)
+                 for ch, (a, f) in sorted(totals.items())]
+    timeseries = [dict(ts=w["ts"], attempts=w["attempts"], failures=w["failures"]) for w in window]
+    return dict(kpis=kpis, timeseries=timeseries, byChannel=byChannel,
+                alerts=live["alerts"], summary=live["summary"])
+
+def run_live(base_url: str):
+    if not base_url:
+        raise ValueError("API Base URL이 비어 있습니다. 사이드바에 입력하세요.")
+    url = f"{base_url.rstrip('/')}/metrics/stream"
+    live = dict(window={}, open=set(), alerts=[], summary=None)    # open: 아직 닫히지 않은 분의 ts
+    session, _ = _http_state()
+    with session.get(url, stream=True, timeout=(10, 60),
+                     headers={"Accept": "text/event-stream"}) as r:
+        r.raise_for_status()
+        status.caption("🟢 Live (SSE) 연결됨")
+        for event, data in _iter_sse(r.iter_lines()):
+            if event == "snapshot":
+                live["window"] = {w["ts"]: w for w in data.get("window", [])}
+                # 스냅샷에는 진행 중인 분이 섞여 있다: 현재 분 이후는 열린 분으로
+                now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+                live["open"] = {ts for ts in live["window"] if datetime.fromisoformat(ts) >= now}
+                live["alerts"] = _merge_alerts([], data.get("alerts", []))
+                live["summary"] = data.get("summary")
+            elif event in ("tick", "minute"):
+                live["window"][data["ts"]] = data      # 같은 분은 덮어쓰기(멱등)
+                if event == "tick":
+                    live["open"].add(data["ts"])
+                else:
+                    live["open"] = {ts for ts in live["open"] if ts > data["ts"]}
+                for k in sorted(live["window"])[:-62]:
+                    del live["window"][k]
+            elif event == "alerts":
+                live["alerts"] = _merge_alerts(live["alerts"], data.get("alerts", []))
+                if "summary" in data:
+                    live["summary"] = data["summary"]
+            render(_live_view(live))
+
+# =========================
+# Run
 # =========================
 try:
-    if manual:
-        st.cache_data.clear()  # 캐시만 지우고 같은 실행 내에서 다시 가져옴
-    data = fetch_metrics_from_api(base)
-    render(data)
+    if mode == "Live (SSE)":
+        run_live(base)                  # 서버가 끊으면 아래 except에서 안내 후 종료
+        status.warning("Live stream closed. 새로고침하면 다시 연결합니다.")
+    else:
+        if manual:
+            st.cache_data.clear()  # 캐시만 지우고 같은 실행 내에서 다시 가져옴
+        data = fetch_metrics_from_api(base)
+        render(data)
 except Exception as e:
     status.error(f"Fetch error: {e}")
     st.stop()
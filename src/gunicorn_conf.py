@@ -0,0 +1,68 @@
+# src/gunicorn_conf.py
+"""
+멀티 워커 실행 설정:  cd src && gunicorn -c gunicorn_conf.py
+
+- 마스터가 시작될 때(on_starting) owner 프로세스(uvicorn api.server:app --uds OWNER_SOCKET)를 띄운다.
+  DB 마이그레이션/writer/인메모리 집계/평가 스케줄러는 owner 하나에서만 돈다.
+- 워커(api.worker:app)는 /login을 처리해 이벤트를 owner로 배치 전달하고, 읽기는 owner로 프록시한다.
+  속도 제한/잠금 판정은 owner 한 곳(워커가 Unix 소켓으로 묻는다).
+"""
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+OWNER_SOCKET = os.environ.setdefault("OWNER_SOCKET", "/tmp/login-control-owner.sock")
+OWNER_START_TIMEOUT = float(os.getenv("OWNER_START_TIMEOUT", "60"))
+
+wsgi_app = "api.worker:app"
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+graceful_timeout = 30
+
+_owner: subprocess.Popen | None = None
+
+
+def on_starting(server):
+    global _owner
+    if os.path.exists(OWNER_SOCKET):
+        os.unlink(OWNER_SOCKET)
+    # uvicorn은 WEB_CONCURRENCY를 --workers 기본값으로 읽는다 → owner는 반드시 단일 프로세스
+    env = {k: v for k, v in os.environ.items() if k != "WEB_CONCURRENCY"}
+    env["LCS_ROLE"] = "owner"      # 워커 전용 엔드포인트(/internal/ratelimit/*)는 owner에서만 연다
+    _owner = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.server:app", "--uds", OWNER_SOCKET,
+         "--workers", "1", "--no-access-log"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+    )
+    # 워커가 첫 요청을 받기 전에 owner가 기동을 마쳐야 한다(마이그레이션/집계 복구 포함)
+    deadline = time.monotonic() + OWNER_START_TIMEOUT
+    with httpx.Client(transport=httpx.HTTPTransport(uds=OWNER_SOCKET), base_url="http://owner",
+                      timeout=2.0) as client:
+        while True:
+            if _owner.poll() is not None:
+                raise RuntimeError(f"owner process exited with code {_owner.returncode}")
+            try:
+                if client.get("/health").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                _owner.terminate()
+                raise RuntimeError(f"owner on {OWNER_SOCKET} not ready after {OWNER_START_TIMEOUT}s")
+            time.sleep(0.1)
+    server.log.info("owner process %s ready on %s", _owner.pid, OWNER_SOCKET)
+
+
+def on_exit(server):
+    # 워커가 모두 내려가 전달 큐를 비운 뒤에 owner를 정리(writer flush는 owner shutdown 훅)
+    if _owner is not None and _owner.poll() is None:
+        _owner.terminate()
+        try:
+            _owner.wait(timeout=graceful_timeout)
+        except subprocess.TimeoutExpired:
+            _owner.kill()
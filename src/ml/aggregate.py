@@ -0,0 +1,503 @@
+# src/ml/aggregate.py
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from ml.segments import ua_family
+from ml.sketch import DDSketch, HeavyHitters, HyperLogLog
+from store.partitions import events_source
+
+MINUTE_MS = 60_000
+
+# 실패 이벤트의 공격 원천/대상별 heavy hitter (분 버킷당 차원별 고정 크기 스케치)
+OFFENDER_DIMS = ("ip", "fingerprint", "user_hash")
+OFFENDER_TOP_K = int(os.getenv("OFFENDER_TOP_K", "32"))
+OFFENDER_CMS_WIDTH = int(os.getenv("OFFENDER_CMS_WIDTH", "512"))
+OFFENDER_CMS_DEPTH = int(os.getenv("OFFENDER_CMS_DEPTH", "4"))
+
+
+# 분/채널별 고유 사용자·IP·fingerprint 수 (HyperLogLog, 출력 열 이름)
+DISTINCT_DIMS = {"user_hash": "distinct_users", "ip": "distinct_ips", "fingerprint": "distinct_fingerprints"}
+HLL_PRECISION = int(os.getenv("HLL_PRECISION", "10"))   # 2^p 레지스터(바이트), 오차 ≈ 1.04/√2^p
+
+
+# 분/채널별 지연 분위수 (DDSketch, 상대오차 LATENCY_SKETCH_ALPHA)
+LATENCY_QUANTILES = {"latency_p50": 0.50, "latency_p95": 0.95, "latency_p99": 0.99}
+LATENCY_SKETCH_ALPHA = float(os.getenv("LATENCY_SKETCH_ALPHA", "0.01"))
+
+
+def _new_sketch() -> HeavyHitters:
+    return HeavyHitters(OFFENDER_TOP_K, OFFENDER_CMS_WIDTH, OFFENDER_CMS_DEPTH)
+
+
+def _merge_hll(sketches: Iterable[HyperLogLog]) -> int:
+    out = None
+    for h in sketches:
+        if out is None:
+            out = h.copy()
+        else:
+            out.merge(h)
+    return out.estimate() if out is not None else 0
+
+
+def _merge_quantiles(sketches: Iterable[DDSketch]) -> list:
+    out = None
+    for d in sketches:
+        if out is None:
+            out = d.copy()
+        else:
+            out.merge(d)
+    if out is None:
+        return [0.0] * len(LATENCY_QUANTILES)
+    return out.quantiles(LATENCY_QUANTILES.values())
+
+
+class _Bucket:
+    __slots__ = ("minute", "attempts", "failures", "lat_sum", "lat_cnt", "channels", "offenders",
+                 "uniques", "latency", "segments")
+
+    def __init__(self, minute: int):
+        self.minute = minute
+        self.attempts = 0
+        self.failures = 0
+        self.lat_sum = 0.0
+        self.lat_cnt = 0
+        # channel -> [attempts, failures, lat_sum, lat_cnt]
+        self.channels: Dict[str, list] = {}
+        # dim -> HeavyHitters (실패 이벤트만)
+        self.offenders: Dict[str, HeavyHitters] = {}
+        # (channel, dim) -> HyperLogLog, channel "*"는 전체
+        self.uniques: Dict[tuple, HyperLogLog] = {}
+        # channel -> DDSketch, "*"는 전체
+        self.latency: Dict[str, DDSketch] = {}
+        # (dim, channel, value) -> [attempts, failures, lat_sum, lat_cnt]  (segment_dims를 켠 경우만)
+        self.segments: Dict[tuple, list] = {}
+
+
+class MinuteAggregator:
+    """
+    분 단위 링버퍼 집계기.
+    - INSERT 시점에 add()로 갱신하고, DB는 기동 시 rebuild()에서만 읽는다.
+    - frames()는 _make_timeseries와 같은 (ts, bc) DataFrame을 O(버킷 수)로 만든다.
+    - segment_dims("fail_reason", "ua_family")를 주면 채널×값별 카운트도 세어 segment_series()로 낸다.
+    """
+
+    def __init__(self, minutes: int = 60, segment_dims: Iterable[str] = ()):
+        self.minutes = minutes
+        self.segment_dims = tuple(segment_dims)
+        self._size = minutes + 2          # 창 경계의 부분 분 + 현재 분 여유
+        self._ring: list[_Bucket | None] = [None] * self._size
+        self._lock = threading.Lock()
+        self.version = 0                  # 갱신될 때마다 증가
+
+    # ---- 갱신 ----
+    def _bucket_for(self, minute: int) -> _Bucket | None:
+        slot = (minute // MINUTE_MS) % self._size
+        b = self._ring[slot]
+        if b is None or b.minute < minute:
+            b = _Bucket(minute)
+            self._ring[slot] = b
+        elif b.minute > minute:
+            return None                   # 링에서 이미 밀려난(만료된) 분
+        return b
+
+    def _add_counts(self, minute: int, channel: str, attempts: int, failures: int,
+                    lat_sum: float, lat_cnt: int) -> None:
+        b = self._bucket_for(minute)
+        if b is None:
+            return
+        b.attempts += attempts
+        b.failures += failures
+        b.lat_sum += lat_sum
+        b.lat_cnt += lat_cnt
+        ch = b.channels.get(channel)
+        if ch is None:
+            ch = b.channels[channel] = [0, 0, 0.0, 0]
+        ch[0] += attempts
+        ch[1] += failures
+        ch[2] += lat_sum
+        ch[3] += lat_cnt
+
+    def _add_segments(self, values: Dict[tuple, list]) -> None:
+        """(minute, dim, channel, value) → [attempts, failures, lat_sum, lat_cnt] 반영"""
+        for (minute, *key), v in values.items():
+            b = self._bucket_for(minute)
+            if b is None:
+                continue
+            acc = b.segments.get(tuple(key))
+            if acc is None:
+                b.segments[tuple(key)] = list(v)
+            else:
+                for i in range(4):
+                    acc[i] += v[i]
+
+    def _add_offenders(self, counts: Counter) -> None:
+        """(minute, dim, key) → 실패 수를 스케치에 반영(배치 안에서 미리 합쳐 호출 수를 줄인다)"""
+        for (minute, dim, key), n in counts.items():
+            b = self._bucket_for(minute)
+            if b is None:
+                continue
+            hh = b.offenders.get(dim)
+            if hh is None:
+                hh = b.offenders[dim] = _new_sketch()
+            hh.add(key, n)
+
+    def _add_uniques(self, keys: set) -> None:
+        """(minute, channel, dim, key) 집합을 전체/채널 HLL에 반영"""
+        for minute, channel, dim, key in keys:
+            b = self._bucket_for(minute)
+            if b is None:
+                continue
+            for ch in ("*", channel):
+                if ch is None:
+                    continue
+                h = b.uniques.get((ch, dim))
+                if h is None:
+                    h = b.uniques[(ch, dim)] = HyperLogLog(HLL_PRECISION)
+                h.add(key)
+
+    def _add_latency(self, values: Counter) -> None:
+        """(minute, channel, latency_ms) → 개수를 전체/채널 DDSketch에 반영"""
+        for (minute, channel, lat), n in values.items():
+            b = self._bucket_for(minute)
+            if b is None:
+                continue
+            for ch in ("*", channel):
+                if ch is None:
+                    continue
+                d = b.latency.get(ch)
+                if d is None:
+                    d = b.latency[ch] = DDSketch(LATENCY_SKETCH_ALPHA)
+                d.add(lat, n)
+
+    def add(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """기록된 이벤트 행(ts_ms, channel, result, latency_ms, ip, fingerprint, user_hash)을 반영"""
+        current = (int(time.time() * 1000) // MINUTE_MS) * MINUTE_MS
+        oldest = current - (self._size - 1) * MINUTE_MS
+        offenders: Counter = Counter()
+        uniques: set = set()
+        latency: Counter = Counter()     # 같은 값(ms 정수가 대부분)은 한 번에
+        segments: Dict[tuple, list] = {}
+        seg_dims = self.segment_dims
+        with self._lock:
+            for r in rows:
+                minute = (r["ts_ms"] // MINUTE_MS) * MINUTE_MS
+                # 링보다 오래됐거나 미래 분이면 버린다(미래 분은 같은 슬롯의 창 안 버킷을 덮어쓴다)
+                if minute < oldest or minute > current:
+                    continue
+                lat = r.get("latency_ms")
+                failed = r.get("result") == "FAIL"
+                self._add_counts(
+                    minute, r.get("channel"), 1, int(failed),
+                    float(lat) if lat is not None else 0.0, int(lat is not None),
+                )
+                if lat is not None:
+                    latency[(minute, r.get("channel"), lat)] += 1
+                if failed:
+                    for dim in OFFENDER_DIMS:
+                        key = r.get(dim)
+                        if key:
+                            offenders[(minute, dim, key)] += 1
+                for dim in DISTINCT_DIMS:
+                    key = r.get(dim)
+                    if key:
+                        uniques.add((minute, r.get("channel"), dim, key))
+                for dim in seg_dims:
+                    if dim == "fail_reason":
+                        if not failed:
+                            continue
+                        value = r.get("fail_reason") or "UNKNOWN"
+                    else:
+                        value = ua_family(r.get("ua"))
+                    k = (minute, dim, r.get("channel"), value)
+                    acc = segments.get(k)
+                    if acc is None:
+                        acc = segments[k] = [0, 0, 0.0, 0]
+                    acc[0] += 1
+                    acc[1] += failed
+                    if lat is not None:
+                        acc[2] += lat
+                        acc[3] += 1
+            self._add_offenders(offenders)
+            self._add_segments(segments)
+            self._add_uniques(uniques)
+            self._add_latency(latency)
+            self.version += 1
+
+    def rebuild(self, engine, now_ms: int | None = None) -> None:
+        """기동 시 DB에서 최근 창을 다시 읽어 링버퍼를 채운다."""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        since = (now_ms // MINUTE_MS - self._size + 1) * MINUTE_MS
+        until = (now_ms // MINUTE_MS + 1) * MINUTE_MS         # 미래 시각 행은 add()처럼 제외
+        with engine.begin() as conn:
+            source = events_source(conn, since, until)     # 창과 겹치는 파티션만
+            rows = conn.execute(text(f"""
+                SELECT (ts_ms / 60000) * 60000 AS minute, channel,
+                       COUNT(*), SUM(result = 'FAIL'),
+                       COALESCE(SUM(latency_ms), 0), COUNT(latency_ms)
+                  FROM {source}
+                 WHERE ts_ms >= :since AND ts_ms < :until
+                 GROUP BY minute, channel
+            """), {"since": since, "until": until}).fetchall()
+            fails = conn.execute(text(f"""
+                SELECT (ts_ms / 60000) * 60000 AS minute, {", ".join(OFFENDER_DIMS)}
+                  FROM {source}
+                 WHERE ts_ms >= :since AND ts_ms < :until AND result = 'FAIL'
+            """), {"since": since, "until": until}).fetchall()
+            distinct = conn.execute(text(f"""
+                SELECT DISTINCT (ts_ms / 60000) * 60000 AS minute, channel, {", ".join(DISTINCT_DIMS)}
+                  FROM {source}
+                 WHERE ts_ms >= :since AND ts_ms < :until
+            """), {"since": since, "until": until}).fetchall()
+            latencies = conn.execute(text(f"""
+                SELECT (ts_ms / 60000) * 60000 AS minute, channel, latency_ms, COUNT(*)
+                  FROM {source}
+                 WHERE ts_ms >= :since AND ts_ms < :until AND latency_ms IS NOT NULL
+                 GROUP BY minute, channel, latency_ms
+            """), {"since": since, "until": until}).fetchall()
+            seg_rows = {}
+            for dim in self.segment_dims:
+                col, cond = ("fail_reason", "AND result = 'FAIL'") if dim == "fail_reason" else ("ua", "")
+                seg_rows[dim] = conn.execute(text(f"""
+                    SELECT (ts_ms / 60000) * 60000 AS minute, channel, {col},
+                           COUNT(*), SUM(result = 'FAIL'), COALESCE(SUM(latency_ms), 0), COUNT(latency_ms)
+                      FROM {source}
+                     WHERE ts_ms >= :since AND ts_ms < :until {cond}
+                     GROUP BY minute, channel, {col}
+                """), {"since": since, "until": until}).fetchall()
+        segments: Dict[tuple, list] = {}
+        for dim, found in seg_rows.items():
+            for minute, channel, value, attempts, failures, lat_sum, lat_cnt in found:
+                # UA 원문은 계열로 묶는다(여러 원문이 한 계열로 합쳐짐)
+                value = (value or "UNKNOWN") if dim == "fail_reason" else ua_family(value)
+                acc = segments.setdefault((int(minute), dim, channel, value), [0, 0, 0.0, 0])
+                acc[0] += int(attempts)
+                acc[1] += int(failures or 0)
+                acc[2] += float(lat_sum)
+                acc[3] += int(lat_cnt)
+        offenders: Counter = Counter()
+        for minute, *keys in fails:
+            for dim, key in zip(OFFENDER_DIMS, keys):
+                if key:
+                    offenders[(int(minute), dim, key)] += 1
+        uniques = {(int(minute), channel, dim, key)
+                   for minute, channel, *keys in distinct
+                   for dim, key in zip(DISTINCT_DIMS, keys) if key}
+        with self._lock:
+            self._ring = [None] * self._size
+            for minute, channel, attempts, failures, lat_sum, lat_cnt in rows:
+                self._add_counts(int(minute), channel, int(attempts), int(failures or 0),
+                                 float(lat_sum), int(lat_cnt))
+            self._add_offenders(offenders)
+            self._add_uniques(uniques)
+            self._add_latency(Counter({(int(m), ch, lat): int(n) for m, ch, lat, n in latencies}))
+            self._add_segments(segments)
+            self.version += 1
+
+    # ---- 조회 ----
+    def buckets(self, now_ms: int | None = None) -> list[_Bucket]:
+        """창(최근 minutes분) 안의 비어 있지 않은 버킷을 시간순으로 반환"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        start = ((now_ms - self.minutes * MINUTE_MS) // MINUTE_MS) * MINUTE_MS
+        with self._lock:
+            found = [b for b in self._ring if b is not None and b.minute >= start and b.attempts > 0]
+        return sorted(found, key=lambda b: b.minute)
+
+    def closed_channel_minutes(self, after_ms: int, now_ms: int | None = None) -> list[tuple[int, dict]]:
+        """
+        after_ms 이후 ~ 현재 분 이전의 닫힌 분별 채널 값 [(minute, {channel: (attempts, failures, latency_mean)})].
+        데이터가 없는 분도 빈 dict로 포함한다(스트리밍 탐지기 입력용).
+        """
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        current = (now_ms // MINUTE_MS) * MINUTE_MS
+        oldest = current - (self._size - 1) * MINUTE_MS
+        start = max(after_ms + MINUTE_MS, oldest) if after_ms >= 0 else oldest
+        start = (start // MINUTE_MS) * MINUTE_MS
+        with self._lock:
+            by_minute = {
+                b.minute: {ch: (v[0], v[1], v[2] / v[3] if v[3] else 0.0) for ch, v in b.channels.items()}
+                for b in self._ring if b is not None and start <= b.minute < current
+            }
+        if after_ms < 0 and by_minute:
+            start = min(by_minute)          # 첫 호출은 데이터가 있는 첫 분부터
+        return [(m, by_minute.get(m, {})) for m in range(start, current, MINUTE_MS)]
+
+    def segment_series(self, dims: Iterable[str], now_ms: int | None = None) -> tuple:
+        """
+        창 안 닫힌 분별 세그먼트 특성 (minutes, {(dim, channel, value): 분 수 × [attempts, failures,
+        fail_rate, latency_ms]}). dim "channel"은 value None. fail_reason 세그먼트의 attempts는 채널
+        전체 시도 수라 fail_rate는 그 사유의 비중. 데이터가 없는 분은 0.
+        """
+        dims = set(dims)
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        current = (now_ms // MINUTE_MS) * MINUTE_MS
+        start = ((now_ms - self.minutes * MINUTE_MS) // MINUTE_MS) * MINUTE_MS
+        with self._lock:
+            found = [(b.minute, {ch: tuple(v) for ch, v in b.channels.items() if ch is not None},
+                      {k: tuple(v) for k, v in b.segments.items() if k[0] in dims})
+                     for b in self._ring if b is not None and start <= b.minute < current and b.attempts > 0]
+        if not found:
+            return np.zeros(0, dtype=np.int64), {}
+        first = min(m for m, _, _ in found)
+        n = (current - first) // MINUTE_MS
+        raw: Dict[tuple, np.ndarray] = {}
+        ch_attempts: Dict[str, np.ndarray] = {}
+
+        def row(key):
+            arr = raw.get(key)
+            if arr is None:
+                arr = raw[key] = np.zeros((n, 4))
+            return arr
+
+        for minute, channels, segs in found:
+            i = (minute - first) // MINUTE_MS
+            for ch, v in channels.items():
+                ch_attempts.setdefault(ch, np.zeros(n))[i] = v[0]
+                if "channel" in dims:
+                    row(("channel", ch, None))[i] = v
+            for key, v in segs.items():
+                row(key)[i] = v
+        out = {}
+        for key, (a, f, ls, lc) in ((k, arr.T) for k, arr in raw.items()):
+            if key[0] == "fail_reason":
+                a = ch_attempts.get(key[1], np.zeros(n))
+            out[key] = np.column_stack([
+                a, f, np.where(a > 0, f / np.maximum(a, 1), 0.0), np.where(lc > 0, ls / np.maximum(lc, 1), 0.0),
+            ])
+        return first + np.arange(n, dtype=np.int64) * MINUTE_MS, out
+
+    def offenders(self, start_ms: int, end_ms: int, n: int = 10) -> Dict[str, dict]:
+        """
+        [start_ms, end_ms) 분 버킷의 스케치를 합쳐 차원별 실패 상위 n개.
+        {dim: {"failures": 창 안 실패 합, "top": [(key, 추정 실패 수)]}}
+        """
+        merged: Dict[str, HeavyHitters] = {}
+        with self._lock:
+            for b in self._ring:
+                if b is None or not (start_ms <= b.minute < end_ms):
+                    continue
+                for dim, hh in b.offenders.items():
+                    if dim in merged:
+                        merged[dim].merge(hh)
+                    else:
+                        merged[dim] = hh.copy()
+        return {dim: {"failures": merged[dim].total if dim in merged else 0,
+                      "top": merged[dim].top(n) if dim in merged else []}
+                for dim in OFFENDER_DIMS}
+
+    def distinct(self, start_ms: int, end_ms: int, channel: str = "*") -> Dict[str, int]:
+        """[start_ms, end_ms) 분 버킷의 HLL을 합쳐 고유 개수 {distinct_users, distinct_ips, ...}"""
+        with self._lock:
+            found = [b for b in self._ring if b is not None and start_ms <= b.minute < end_ms]
+            return {col: _merge_hll(b.uniques[(channel, dim)] for b in found if (channel, dim) in b.uniques)
+                    for dim, col in DISTINCT_DIMS.items()}
+
+    @staticmethod
+    def _detail(b: _Bucket) -> dict:
+        return dict(
+            minute=b.minute, attempts=b.attempts, failures=b.failures,
+            latency_ms=(b.lat_sum / b.lat_cnt) if b.lat_cnt else 0.0,
+            channels={ch: [v[0], v[1]] for ch, v in b.channels.items() if ch is not None},
+        )
+
+    def minute_detail(self, minute_ms: int) -> dict | None:
+        """한 분 버킷의 합계 + 채널별 [attempts, failures] (라이브 델타용)"""
+        with self._lock:
+            b = self._ring[(minute_ms // MINUTE_MS) % self._size]
+            if b is None or b.minute != minute_ms:
+                return None
+            return self._detail(b)
+
+    def window_detail(self, now_ms: int | None = None) -> list[dict]:
+        """창 안의 분별 상세(라이브 스냅샷용)"""
+        found = self.buckets(now_ms)
+        with self._lock:
+            return [self._detail(b) for b in found]
+
+    @staticmethod
+    def _snapshot(b: _Bucket) -> tuple:
+        """
+        락 안에서 뜨는 버킷 값. 전체("*") 고유 개수/분위수는 원본에서 바로 계산(결과가 원본에 캐시돼
+        닫힌 분은 다음 호출부터 공짜), 채널별 스케치는 병합용 사본.
+        """
+        return (
+            b.minute, b.attempts, b.failures, b.lat_sum / b.lat_cnt if b.lat_cnt else 0.0,
+            {ch: (v[0], v[1]) for ch, v in b.channels.items() if ch is not None},
+            {dim: h.estimate() for (ch, dim), h in b.uniques.items() if ch == "*"},
+            b.latency["*"].quantiles(LATENCY_QUANTILES.values()) if "*" in b.latency else None,
+            {k: h.copy() for k, h in b.uniques.items() if k[0] != "*"},
+            {ch: d.copy() for ch, d in b.latency.items() if ch != "*"},
+        )
+
+    def frames(self, now_ms: int | None = None):
+        """_make_timeseries(df)와 동일한 (ts, bc)"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        start = ((now_ms - self.minutes * MINUTE_MS) // MINUTE_MS) * MINUTE_MS
+        # writer 스레드가 현재 분(늦게 온 이벤트면 지난 분도)을 계속 갱신하므로 락 안에서 값/사본을 뜬다
+        with self._lock:
+            found = [self._snapshot(b) for b in self._ring if b is not None and b.minute >= start and b.attempts > 0]
+        found.sort(key=lambda v: v[0])
+        if not found:
+            empty_idx = pd.DatetimeIndex([], tz="UTC")
+            ts = pd.DataFrame(index=empty_idx, columns=["attempts", "failures", "latency_ms"]).fillna(0)
+            bc = pd.DataFrame(columns=["channel", "attempts", "failures", "failRate"])
+            return ts, bc
+
+        # 첫 ~ 마지막 버킷 사이의 빈 분은 0으로 채움(pd.Grouper와 동일)
+        first, last = found[0][0], found[-1][0]
+        n = (last - first) // MINUTE_MS + 1
+        attempts = np.zeros(n, dtype=np.int64)
+        failures = np.zeros(n, dtype=np.int64)
+        latency = np.zeros(n, dtype=np.float64)
+        distinct = {col: np.zeros(n, dtype=np.int64) for col in DISTINCT_DIMS.values()}
+        quantiles = np.zeros((n, len(LATENCY_QUANTILES)), dtype=np.float64)
+        ch_latency: Dict[str, list] = {}
+        per_channel: Dict[str, list] = {}
+        ch_uniques: Dict[tuple, list] = {}
+        for minute, a, f, lat, channels, est, q, uniques, sketches in found:
+            i = (minute - first) // MINUTE_MS
+            attempts[i], failures[i], latency[i] = a, f, lat
+            for dim, v in est.items():
+                distinct[DISTINCT_DIMS[dim]][i] = v
+            if q is not None:
+                quantiles[i] = q
+            for key, h in uniques.items():
+                ch_uniques.setdefault(key, []).append(h)
+            for ch, d in sketches.items():
+                ch_latency.setdefault(ch, []).append(d)
+            # groupby와 동일하게 채널 없는 행은 채널 표에서 제외(_snapshot에서 뺐다)
+            for ch, (ca, cf) in channels.items():
+                acc = per_channel.setdefault(ch, [0, 0])
+                acc[0] += ca
+                acc[1] += cf
+
+        idx = pd.date_range(pd.Timestamp(first, unit="ms", tz="UTC"), periods=n, freq="1min")
+        ts = pd.DataFrame({"attempts": attempts, "failures": failures, "latency_ms": latency}, index=idx)
+        ts["fail_rate"] = np.where(ts["attempts"] > 0, ts["failures"] / np.maximum(ts["attempts"], 1), 0.0)
+        for col, v in distinct.items():
+            ts[col] = v
+        for j, col in enumerate(LATENCY_QUANTILES):
+            ts[col] = quantiles[:, j]
+
+        channels = sorted(per_channel)
+        bc = pd.DataFrame({
+            "channel": channels,
+            "attempts": [per_channel[c][0] for c in channels],
+            "failures": [per_channel[c][1] for c in channels],
+        })
+        bc["failRate"] = np.where(bc["attempts"] > 0, bc["failures"] / bc["attempts"], 0.0)
+        # 채널별 창 전체 고유 개수(분 버킷 HLL 병합)
+        for dim, col in DISTINCT_DIMS.items():
+            bc[col] = [_merge_hll(ch_uniques.get((c, dim), ())) for c in channels]
+        # 채널별 창 전체 지연 분위수(분 버킷 DDSketch 병합)
+        ch_q = np.array([_merge_quantiles(ch_latency.get(c, ())) for c in channels],
+                        dtype=np.float64).reshape(len(channels), len(LATENCY_QUANTILES))
+        for j, col in enumerate(LATENCY_QUANTILES):
+            bc[col] = ch_q[:, j]
+        return ts, bc
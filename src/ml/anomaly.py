@@ -1,27 +1,66 @@
+import os
 from sqlalchemy import text
 import pandas as pd
 from datetime import datetime, timedelta, timezone
 from sklearn.ensemble import IsolationForest
 import numpy as np
 
-def _read_last_minutes(engine, minutes=60):
-    since = (datetime.now(timezone.utc) - timedelta(minutes=minutes)).isoformat()
+from store.db import iso_from_ms
+from store.partitions import events_source
+from telemetry.metrics import stage
+
+MINUTE_MS = 60_000
+
+# 공격 원천/대상 집중(heavy hitter) — aggregator의 분 버킷 스케치 기반
+OFFENDER_WINDOW_MIN = int(os.getenv("OFFENDER_WINDOW_MIN", "5"))       # topOffenders 창(분)
+OFFENDER_TOP_N = int(os.getenv("OFFENDER_TOP_N", "10"))
+OFFENDER_MIN_FAILURES = int(os.getenv("OFFENDER_MIN_FAILURES", "20"))  # 직전 1분 실패 수
+OFFENDER_MIN_SHARE = float(os.getenv("OFFENDER_MIN_SHARE", "0.2"))     # 직전 1분 실패 중 비중
+# aggregator HLL 고유 개수 열 → 응답 필드
+DISTINCT_FIELDS = {
+    "distinct_users": "distinctUsers",
+    "distinct_ips": "distinctIps",
+    "distinct_fingerprints": "distinctFingerprints",
+}
+# aggregator DDSketch 지연 분위수 열 → 응답 필드
+LATENCY_FIELDS = {"latency_p50": "latencyP50", "latency_p95": "latencyP95", "latency_p99": "latencyP99"}
+# 실패율 급증 알림: 마지막 분 실패율 > 임계값 이면서 시도 수 하한 이상
+FAIL_RATE_THRESHOLD = float(os.getenv("FAIL_RATE_THRESHOLD", "0.4"))
+FAIL_RATE_MIN_ATTEMPTS = int(os.getenv("FAIL_RATE_MIN_ATTEMPTS", "30"))
+# ML 알림: 최근 ML_RECENT_MIN분 중 최고 이상치 점수 > 컷오프 (tools/backtest.py로 조정)
+ML_SCORE_CUTOFF = float(os.getenv("ML_SCORE_CUTOFF", "0.6"))
+ML_RECENT_MIN = int(os.getenv("ML_RECENT_MIN", "10"))
+# 지연 꼬리 알림: p99가 절대 하한과 창 기준(p99 중앙값)의 배수를 모두 넘을 때
+LATENCY_TAIL_P99_MS = float(os.getenv("LATENCY_TAIL_P99_MS", "300"))
+LATENCY_TAIL_RATIO = float(os.getenv("LATENCY_TAIL_RATIO", "2.0"))
+LATENCY_TAIL_MIN_ATTEMPTS = int(os.getenv("LATENCY_TAIL_MIN_ATTEMPTS", "30"))
+OFFENDER_ALERT_TYPES = {
+    "ip": "HEAVY_HITTER_IP",
+    "fingerprint": "HEAVY_HITTER_FINGERPRINT",
+    "user_hash": "TARGETED_USER",
+}
+
+def _read_last_minutes(engine, minutes=60, now_ms: int | None = None):
+    # 창과 겹치는 파티션만, 각 파티션의 ts_ms 인덱스(ts_ms, channel, result, latency_ms)로 범위 스캔
+    # now_ms는 기준 시각 고정용(벤치마크 등). 기본은 현재 시각
+    now = datetime.now(timezone.utc) if now_ms is None else datetime.fromtimestamp(now_ms / 1000, tz=timezone.utc)
+    since_ms = int((now - timedelta(minutes=minutes)).timestamp() * 1000)
     with engine.begin() as conn:
+        source = events_source(conn, since_ms)
         df = pd.read_sql_query(
-            text("SELECT * FROM login_events WHERE ts >= :since"),
-            conn, params={"since": since}
+            text(f"""SELECT ts_ms, channel, result, latency_ms
+                      FROM {source} WHERE ts_ms >= :since_ms"""),
+            conn, params={"since_ms": since_ms}
         )
     if df.empty:
         return pd.DataFrame({
             "ts": pd.Series(dtype="datetime64[ns, UTC]"),
             "channel": pd.Series(dtype="object"),
             "result": pd.Series(dtype="object"),
-            "fingerprint": pd.Series(dtype="object"),
-            "user_hash": pd.Series(dtype="object"),
             "latency_ms": pd.Series(dtype="float64"),
         })
 
-    df["ts"] = pd.to_datetime(df["ts"], errors="coerce", utc=True)
+    df["ts"] = pd.to_datetime(df.pop("ts_ms"), unit="ms", utc=True)
     df["latency_ms"] = pd.to_numeric(df.get("latency_ms", pd.Series(dtype="float64")), errors="coerce")
     return df
 
@@ -74,28 +113,164 @@ def _iforest_scores(ts: pd.DataFrame):
     score = -model.score_samples(feats)      # 값 클수록 이상
     return pd.Series(score, index=ts.index)
 
-def compute_metrics(engine):
-    df = _read_last_minutes(engine, minutes=60)
-    ts, bc = _make_timeseries(df)
+def _load_frames(engine, aggregator=None, now_ms: int | None = None):
+    if aggregator is not None:
+        return aggregator.frames(now_ms)
+    df = _read_last_minutes(engine, minutes=60, now_ms=now_ms)
+    return _make_timeseries(df)
+
+def _ips_per_user(ips, users):
+    """사용자당 고유 IP 수(스프레이/공유 계정 신호). users가 0이면 0"""
+    ips = np.asarray(ips, dtype=np.float64)
+    users = np.asarray(users, dtype=np.float64)
+    return np.divide(ips, users, out=np.zeros(ips.shape), where=users > 0)
+
+def _closed_minutes(ts: pd.DataFrame, now_ms: int | None = None) -> pd.DataFrame:
+    """진행 중인 분(과 그 이후)을 뺀 닫힌 분만. 평가기는 분이 바뀐 직후에 돌아 마지막 버킷은 수 초 분량뿐"""
+    return ts[ts.index < pd.Timestamp(_minute_now(now_ms), unit="ms", tz="UTC")]
 
-    # KPI (마지막 1분)
-    last = ts.tail(1)
+def _kpis(ts: pd.DataFrame, now_ms: int | None = None) -> dict:
+    # KPI (마지막으로 닫힌 1분)
+    last = _closed_minutes(ts, now_ms).tail(1)
     if last.empty:
-        kpis = dict(attempts=0, failures=0, failRate=0.0, highRisk=0)
+        return dict(attempts=0, failures=0, failRate=0.0, highRisk=0)
+    kpis = dict(
+        attempts=int(last["attempts"].iloc[0]),
+        failures=int(last["failures"].iloc[0]),
+        failRate=float(last["fail_rate"].iloc[0]),
+        highRisk=int(max(0, round(last["failures"].iloc[0]*0.3)))
+    )
+    if "distinct_users" in ts.columns:
+        for col, name in DISTINCT_FIELDS.items():
+            kpis[name] = int(last[col].iloc[0])
+        kpis["ipsPerUser"] = float(_ips_per_user(last["distinct_ips"], last["distinct_users"])[0])
+    return kpis
+
+def _distinct_window_kpis(aggregator, now_ms: int | None = None) -> dict:
+    """창 전체(최근 60분) 고유 개수 — 분 버킷 HLL 병합이라 중복 없이 센다"""
+    end = _minute_now(now_ms) + MINUTE_MS
+    d = aggregator.distinct(end - (aggregator.minutes + 1) * MINUTE_MS, end)
+    out = {f"{name}Window": d[col] for col, name in DISTINCT_FIELDS.items()}
+    out["ipsPerUserWindow"] = float(_ips_per_user(d["distinct_ips"], d["distinct_users"]))
+    return out
+
+def _frames(ts: pd.DataFrame, bc: pd.DataFrame, now_ms: int | None = None) -> dict:
+    """응답용 컬럼 프레임(ts는 epoch ms). 행 단위 dict 없이 배열만 옮긴다"""
+    timeseries = pd.DataFrame({
+        "ts": ts.index.asi8 // 1_000_000,
+        "attempts": ts["attempts"].to_numpy(dtype=np.int64),
+        "failures": ts["failures"].to_numpy(dtype=np.int64),
+    })
+    # aggregator 경로에만 있는 HLL 고유 개수
+    if "distinct_users" in ts.columns:
+        for col, name in DISTINCT_FIELDS.items():
+            timeseries[name] = ts[col].to_numpy(dtype=np.int64)
+        timeseries["ipsPerUser"] = _ips_per_user(ts["distinct_ips"], ts["distinct_users"])
+    if "latency_p99" in ts.columns:
+        for col, name in LATENCY_FIELDS.items():
+            timeseries[name] = ts[col].to_numpy(dtype=np.float64)
+    byChannel = pd.DataFrame({
+        "channel": bc["channel"].to_numpy(dtype=object),
+        "attempts": bc["attempts"].to_numpy(dtype=np.int64),
+        "failures": bc["failures"].to_numpy(dtype=np.int64),
+        "failRate": bc["failRate"].to_numpy(dtype=np.float64),
+    }) if not bc.empty else pd.DataFrame(columns=["channel", "attempts", "failures", "failRate"])
+    if not bc.empty and "distinct_users" in bc.columns:
+        for col, name in DISTINCT_FIELDS.items():
+            byChannel[name] = bc[col].to_numpy(dtype=np.int64)
+        byChannel["ipsPerUser"] = _ips_per_user(bc["distinct_ips"], bc["distinct_users"])
+    if not bc.empty and "latency_p99" in bc.columns:
+        for col, name in LATENCY_FIELDS.items():
+            byChannel[name] = bc[col].to_numpy(dtype=np.float64)
+    return {"kpis": _kpis(ts, now_ms), "timeseries": timeseries, "byChannel": byChannel}
+
+def _format(ts: pd.DataFrame, bc: pd.DataFrame, now_ms: int | None = None) -> dict:
+    # 응답 포맷(프론트 호환)
+    out = _frames(ts, bc, now_ms)
+    series = out["timeseries"]
+    out["timeseries"] = series.assign(ts=iso_from_ms(series["ts"])).to_dict("records")
+    out["byChannel"] = out["byChannel"].to_dict("records")
+    return out
+
+def _minute_now(now_ms: int | None = None) -> int:
+    if now_ms is None:
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    return (now_ms // MINUTE_MS) * MINUTE_MS
+
+def top_offenders(aggregator, minutes: int = OFFENDER_WINDOW_MIN, n: int = OFFENDER_TOP_N,
+                  now_ms: int | None = None) -> dict:
+    """최근 minutes분(진행 중인 분 포함) 실패 상위 IP/fingerprint/user_hash"""
+    end = _minute_now(now_ms) + MINUTE_MS
+    found = aggregator.offenders(end - (minutes + 1) * MINUTE_MS, end, n)
+    out = {"windowMinutes": minutes}
+    for dim, v in found.items():
+        total = v["failures"]
+        out[dim] = [dict(key=k, failures=int(c), share=(c / total) if total else 0.0) for k, c in v["top"]]
+    return out
+
+def _offender_alerts(aggregator, now_ms: int | None = None) -> list:
+    """직전에 닫힌 1분에서 실패가 한 원천/대상에 몰린 경우"""
+    closed = _minute_now(now_ms) - MINUTE_MS
+    alerts = []
+    for dim, v in aggregator.offenders(closed, closed + MINUTE_MS, 3).items():
+        total = v["failures"]
+        for key, c in v["top"]:
+            if c < OFFENDER_MIN_FAILURES or c / total < OFFENDER_MIN_SHARE:
+                continue
+            alerts.append({
+                "id": f"HH-{dim}-{key[:16]}-{closed // 1000}",
+                "time": datetime.fromtimestamp(closed / 1000, tz=timezone.utc).isoformat(),
+                "severity": "WARN",
+                "type": OFFENDER_ALERT_TYPES[dim],
+                "dimension": dim,
+                "key": key,
+                "failures": int(c),
+                "message": f"{dim} {key[:16]} caused {c} failures ({c / total * 100:.0f}% of last minute)",
+            })
+    return alerts
+
+def snapshot_frames(engine, aggregator=None):
+    """알림 평가 없이 KPI/시계열/채널별 현황을 DataFrame 그대로 (컬럼형/msgpack/Arrow 직렬화용)"""
+    ts, bc = _load_frames(engine, aggregator)
+    out = _frames(ts, bc)
+    if aggregator is not None:
+        out["kpis"].update(_distinct_window_kpis(aggregator))
+        out["topOffenders"] = top_offenders(aggregator)
+    return out
+
+def compute_metrics(engine, aggregator=None, model=None, stream=None, segments=None, now_ms: int | None = None):
+    """
+    최근 60분 KPI/시계열/채널별 현황 + 알림.
+    aggregator(MinuteAggregator)가 있으면 원시 행을 다시 읽지 않고 분 버킷에서 만든다.
+    model(ModelManager)에 학습된 모델이 있으면 매 요청 fit 대신 캐시된 모델로 점수만 낸다.
+    stream(StreamDetectorEngine)은 aggregator의 닫힌 분으로 채널별 온라인 탐지기를 갱신한다.
+    segments(SegmentDetector)는 채널(×실패 사유/UA 계열) 세그먼트마다 따로 학습한 모델로 ML_SEGMENT_ANOMALY를 낸다.
+    aggregator가 있으면 실패 heavy hitter(topOffenders)와 HEAVY_HITTER_*/TARGETED_USER 알림,
+    HLL 기반 고유 사용자/IP/fingerprint 수(kpis, timeseries)도 낸다.
+    now_ms는 기준 시각(창/닫힌 분 판정) 고정용 — 서버는 생략(현재 시각), 벤치마크는 고정 값을 넘긴다.
+    """
+    # 단계별 시간은 lcs_stage_seconds{stage="compute_metrics.*"} (telemetry)
+    if aggregator is not None:
+        with stage("compute_metrics.aggregate"):
+            ts, bc = aggregator.frames(now_ms)
     else:
-        kpis = dict(
-            attempts=int(last["attempts"].iloc[0]),
-            failures=int(last["failures"].iloc[0]),
-            failRate=float(last["fail_rate"].iloc[0]),
-            highRisk=int(max(0, round(last["failures"].iloc[0]*0.3)))
-        )
+        with stage("compute_metrics.read"):
+            df = _read_last_minutes(engine, minutes=60, now_ms=now_ms)
+        with stage("compute_metrics.aggregate"):
+            ts, bc = _make_timeseries(df)
 
     # 이상치 점수
-    ts["anom_score"] = _iforest_scores(ts)
+    with stage("compute_metrics.score"):
+        scores = model.score(ts) if model is not None else None
+        ts["anom_score"] = scores if scores is not None else _iforest_scores(ts)
+    # 규칙/ML 판단은 닫힌 분으로(평가기가 분이 바뀐 직후에 돌아 진행 중인 분은 수 초 분량)
+    closed = _closed_minutes(ts, now_ms)
+    last = closed.tail(1)
 
     # 알람 생성 규칙 (간단)
     alerts = []
-    if not last.empty and (last["fail_rate"].iloc[0] > 0.4 and last["attempts"].iloc[0] >= 30):
+    if not last.empty and (last["fail_rate"].iloc[0] > FAIL_RATE_THRESHOLD
+                            and last["attempts"].iloc[0] >= FAIL_RATE_MIN_ATTEMPTS):
         alerts.append({
             "id": f"FR-{int(datetime.now().timestamp())}",
             "time": datetime.now(timezone.utc).isoformat(),
@@ -103,9 +278,26 @@ def compute_metrics(engine):
             "type": "FAIL_RATE_SPIKE",
             "message": f"Fail rate {(last['fail_rate'].iloc[0]*100):.1f}% over threshold"
         })
-    # 최근 10분 내 IsolationForest 점수 상위 포인트
-    recent = ts.tail(10).sort_values("anom_score", ascending=False).head(1)
-    if not recent.empty and recent["anom_score"].iloc[0] > 0.6:
+    # 지연 꼬리(p99) — 분 버킷 DDSketch가 있을 때(최근 닫힌 두 분 중 표본이 충분한 가장 최근 분)
+    if "latency_p99" in ts.columns:
+        cand = closed.tail(2)
+        cand = cand[cand["attempts"] >= LATENCY_TAIL_MIN_ATTEMPTS].tail(1)
+        if not cand.empty:
+            p99 = float(cand["latency_p99"].iloc[0])
+            base = ts.loc[ts.index < cand.index[0], "latency_p99"]
+            base = float(base[base > 0].median()) if (base > 0).any() else 0.0
+            if p99 >= LATENCY_TAIL_P99_MS and (base == 0.0 or p99 >= LATENCY_TAIL_RATIO * base):
+                alerts.append({
+                    "id": f"LT-{int(cand.index[0].timestamp())}",
+                    "time": cand.index[0].to_pydatetime().isoformat(),
+                    "severity": "WARN",
+                    "type": "LATENCY_TAIL",
+                    "message": (f"Latency p99 {p99:.0f}ms (p50 {float(cand['latency_p50'].iloc[0]):.0f}ms, "
+                                f"baseline p99 {base:.0f}ms)")
+                })
+    # 최근 ML_RECENT_MIN분 내 IsolationForest 점수 상위 포인트
+    recent = closed.tail(ML_RECENT_MIN).sort_values("anom_score", ascending=False).head(1)
+    if not recent.empty and recent["anom_score"].iloc[0] > ML_SCORE_CUTOFF:
         alerts.append({
             "id": f"ML-{int(datetime.now().timestamp())}",
             "time": recent.index[-1].to_pydatetime().isoformat(),
@@ -114,20 +306,26 @@ def compute_metrics(engine):
             "message": f"Model anomaly score {recent['anom_score'].iloc[0]:.2f}"
         })
 
-    # 응답 포맷(프론트 호환)
-    timeseries = [
-        dict(ts=i.isoformat(), attempts=int(r.attempts), failures=int(r.failures))
-        for i, r in ts.iterrows()
-    ]
-    byChannel = [
-        dict(channel=row.channel, attempts=int(row.attempts),
-             failures=int(row.failures), failRate=float(row.failRate))
-        for _, row in bc.iterrows()
-    ] if not bc.empty else []
-
-    return {
-        "kpis": kpis,
-        "timeseries": timeseries,
-        "byChannel": byChannel,
-        "alerts": alerts
-    }
+    # 채널별 스트리밍 탐지기(EWMA/robust z, Half-Space Trees)
+    if stream is not None and aggregator is not None:
+        with stage("compute_metrics.stream"):
+            stream.advance(aggregator, now_ms)
+            alerts.extend(stream.alerts())
+
+    # 세그먼트별 IsolationForest(전체 합계에 묻히는 작은 채널/사유/UA 계열 이상)
+    if segments is not None and aggregator is not None:
+        with stage("compute_metrics.segments"):
+            alerts.extend(segments.evaluate(aggregator, now_ms))
+
+    # IP/fingerprint/user_hash 실패 집중(크리덴셜 스터핑·표적 계정)
+    if aggregator is not None:
+        with stage("compute_metrics.offenders"):
+            alerts.extend(_offender_alerts(aggregator, now_ms))
+
+    with stage("compute_metrics.format"):
+        out = _format(ts, bc, now_ms)
+    if aggregator is not None:
+        out["kpis"].update(_distinct_window_kpis(aggregator, now_ms))
+        out["topOffenders"] = top_offenders(aggregator, now_ms=now_ms)
+    out["alerts"] = alerts
+    return out
@@ -0,0 +1,163 @@
+# src/ml/model.py
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import IsolationForest
+from sqlalchemy import text
+
+FEATURES = ["attempts", "failures", "fail_rate", "latency_ms"]
+MINUTE_MS = 60_000
+
+
+def _features(ts: pd.DataFrame) -> np.ndarray:
+    feats = ts[FEATURES].to_numpy(dtype=float)
+    return np.nan_to_num(feats, copy=False, nan=0.0, posinf=1e9, neginf=-1e9)
+
+
+def read_minute_history(engine, hours: float, until_ms: int | None = None) -> pd.DataFrame:
+    """rollup_1m에서 분 단위 학습용 시계열(채널 합계)을 읽는다. 빈 분은 0으로 채움."""
+    until_ms = until_ms if until_ms is not None else (int(time.time() * 1000) // MINUTE_MS) * MINUTE_MS
+    since_ms = until_ms - int(hours * 3600 * 1000)
+    with engine.begin() as conn:
+        rows = conn.execute(text("""
+            SELECT bucket_ms, SUM(attempts), SUM(failures), SUM(lat_sum), SUM(lat_cnt)
+              FROM rollup_1m
+             WHERE bucket_ms >= :since AND bucket_ms < :until
+             GROUP BY bucket_ms ORDER BY bucket_ms
+        """), {"since": since_ms, "until": until_ms}).fetchall()
+    if not rows:
+        return pd.DataFrame(columns=FEATURES, index=pd.DatetimeIndex([], tz="UTC"))
+    arr = np.array(rows, dtype=float)
+    idx = pd.to_datetime(arr[:, 0].astype(np.int64), unit="ms", utc=True)
+    ts = pd.DataFrame({
+        "attempts": arr[:, 1],
+        "failures": arr[:, 2],
+        "latency_ms": np.where(arr[:, 4] > 0, arr[:, 3] / np.maximum(arr[:, 4], 1), 0.0),
+    }, index=idx)
+    full = pd.date_range(idx[0], idx[-1], freq="1min")
+    ts = ts.reindex(full, fill_value=0.0)
+    ts["fail_rate"] = np.where(ts["attempts"] > 0, ts["failures"] / ts["attempts"].clip(lower=1), 0.0)
+    return ts
+
+
+class ModelManager:
+    """
+    IsolationForest 주기 학습/캐시.
+    - 스케줄러가 train()을 호출해 긴 이력(rollup_1m)으로 학습하고, 디스크에 원자적으로 저장 후 교체한다.
+    - 요청 시에는 score()로 새로 닫힌 분만 predict 하고 나머지는 캐시된 점수를 쓴다.
+    """
+
+    def __init__(self, model_dir: Path, history_hours: float = 24.0, min_points: int = 60,
+                 n_estimators: int = 100, contamination: float = 0.08):
+        self.path = Path(model_dir) / "iforest.joblib"
+        self.history_hours = history_hours
+        self.min_points = min_points
+        self.params = dict(n_estimators=n_estimators, contamination=contamination, random_state=42)
+        self._lock = threading.Lock()
+        self._bundle: dict | None = None     # {model, fingerprint, trained_at, n_points}
+        self._scores: dict[int, float] = {}  # 닫힌 분(ns) → 점수 (현재 모델 기준)
+
+    @property
+    def fingerprint(self) -> str | None:
+        b = self._bundle
+        return b["fingerprint"] if b else None
+
+    def _fingerprint(self, feats: np.ndarray) -> str:
+        h = hashlib.sha256()
+        h.update(repr(sorted(self.params.items())).encode())
+        h.update(sklearn.__version__.encode())
+        h.update(np.ascontiguousarray(feats).tobytes())
+        return h.hexdigest()[:16]
+
+    def _swap(self, bundle: dict) -> None:
+        with self._lock:
+            self._bundle = bundle
+            self._scores = {}
+
+    def load(self) -> bool:
+        """디스크에 저장된 모델 복원(기동 시). 버전이 다르면 무시하고 재학습을 기다린다."""
+        if not self.path.exists():
+            return False
+        try:
+            bundle = joblib.load(self.path)
+        except Exception as e:
+            print(f"[model] load failed: {e}", flush=True)
+            return False
+        if bundle.get("sklearn") != sklearn.__version__ or bundle.get("params") != self.params:
+            return False
+        self._swap(bundle)
+        print(f"[model] loaded {bundle['fingerprint']} ({bundle['n_points']} points)", flush=True)
+        return True
+
+    def train(self, engine) -> bool:
+        """이력으로 학습. 학습 데이터가 바뀌지 않았으면 건너뛴다. 교체 여부를 반환"""
+        hist = read_minute_history(engine, self.history_hours)
+        if len(hist) < self.min_points:
+            return False
+        feats = _features(hist)
+        fp = self._fingerprint(feats)
+        if fp == self.fingerprint:
+            return False
+
+        t0 = time.perf_counter()
+        model = IsolationForest(**self.params)
+        model.fit(feats)
+        bundle = dict(model=model, fingerprint=fp, trained_at=time.time(), n_points=len(feats),
+                      params=self.params, sklearn=sklearn.__version__)
+
+        # 임시 파일에 쓴 뒤 rename → 읽는 쪽은 항상 완전한 파일만 본다
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".tmp{os.getpid()}")
+        joblib.dump(bundle, tmp)
+        os.replace(tmp, self.path)
+        self._swap(bundle)
+        print(f"[model] trained {fp} on {len(feats)} points in {time.perf_counter() - t0:.2f}s", flush=True)
+        return True
+
+    def score(self, ts: pd.DataFrame) -> pd.Series | None:
+        """분 시계열 점수(클수록 이상). 모델이 없으면 None"""
+        with self._lock:
+            bundle, cache = self._bundle, self._scores
+        if bundle is None:
+            return None
+        if ts.empty:
+            return pd.Series([], index=ts.index, dtype=float)
+
+        keys = ts.index.asi8
+        last = len(keys) - 1
+        out = np.empty(len(ts), dtype=float)
+        # 마지막(진행 중인) 분은 값이 계속 바뀌므로 항상 다시 계산
+        todo = []
+        for i, k in enumerate(keys):
+            sc = cache.get(k) if i != last else None
+            if sc is None:
+                todo.append(i)
+            else:
+                out[i] = sc
+        if todo:
+            scores = -bundle["model"].score_samples(_features(ts.iloc[todo]))
+            out[todo] = scores
+            with self._lock:
+                if self._scores is cache:       # 그 사이 모델이 교체됐으면 캐시하지 않음
+                    for i, sc in zip(todo, scores):
+                        if i != last:
+                            cache[keys[i]] = float(sc)
+                    # 창 밖으로 밀려난 분은 정리
+                    if len(cache) > 2 * len(keys):
+                        for k in [k for k in cache if k < keys[0]]:
+                            del cache[k]
+        return pd.Series(out, index=ts.index)
+
+    def info(self) -> dict:
+        b = self._bundle
+        if not b:
+            return {"loaded": False}
+        return {"loaded": True, "fingerprint": b["fingerprint"], "trained_at": b["trained_at"],
+                "n_points": b["n_points"], "cached_scores": len(self._scores)}
@@ -0,0 +1,183 @@
+# src/ml/segments.py
+"""
+세그먼트별 IsolationForest 이상 탐지.
+- 전체 합계 시계열 하나로 학습하면 작은 채널(MEMBERSHIP 등)의 장애가 큰 채널(WEB)에 묻힌다.
+  채널(기본), 선택적으로 채널×실패 사유, 채널×UA 계열마다 따로 학습/점수를 낸다.
+- 입력은 aggregator.segment_series()의 닫힌 분 특성(attempts, failures, fail_rate, latency_ms).
+  실패 사유 세그먼트의 attempts는 채널 전체 시도 수(fail_rate = 그 사유의 비중).
+- 창 안 이벤트가 SEGMENT_MIN_EVENTS 미만이거나 데이터가 있는 분이 SEGMENT_MIN_POINTS 미만인 세그먼트는
+  건너뛰고, 볼륨 상위 SEGMENT_MAX개만 평가한다(채널/값이 늘어도 CPU 예산 고정).
+- 학습은 SEGMENT_WORKERS개 스레드 풀에서 병렬로 돌고, 세그먼트 모델은 SEGMENT_RETRAIN_MIN분 동안
+  재사용해 그 사이 분은 점수만 낸다.
+- 가장 최근에 닫힌 분 점수가 SEGMENT_SCORE_CUTOFF를 넘으면 segment 필드가 붙은 ML_SEGMENT_ANOMALY 알림.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+from telemetry.metrics import REGISTRY
+
+MINUTE_MS = 60_000
+
+# "channel", "channel_fail_reason", "channel_ua" 중 쉼표 구분(빈 값이면 끔)
+SEGMENT_DIMS = tuple(d.strip() for d in os.getenv("SEGMENT_DIMS", "channel").split(",") if d.strip())
+SEGMENT_WORKERS = int(os.getenv("SEGMENT_WORKERS", str(min(4, os.cpu_count() or 1))))
+SEGMENT_MAX = int(os.getenv("SEGMENT_MAX", "32"))                     # 평가당 세그먼트 수 상한(볼륨 순)
+SEGMENT_MIN_EVENTS = int(os.getenv("SEGMENT_MIN_EVENTS", "300"))      # 창 안 최소 이벤트(실패 사유는 실패) 수
+SEGMENT_MIN_POINTS = int(os.getenv("SEGMENT_MIN_POINTS", "30"))       # 데이터가 있는 최소 분 수
+SEGMENT_RETRAIN_MIN = int(os.getenv("SEGMENT_RETRAIN_MIN", "5"))
+SEGMENT_N_ESTIMATORS = int(os.getenv("SEGMENT_N_ESTIMATORS", "50"))
+SEGMENT_SCORE_CUTOFF = float(os.getenv("SEGMENT_SCORE_CUTOFF", "0.65"))
+
+# 설정 이름 → aggregator 세그먼트 차원(채널은 aggregator가 항상 센다)
+DIM_COLUMNS = {"channel": "channel", "channel_fail_reason": "fail_reason", "channel_ua": "ua_family"}
+
+FIT_SECONDS = REGISTRY.histogram("lcs_segment_fit_seconds", "Per-segment IsolationForest fit duration")
+
+
+@lru_cache(maxsize=4096)
+def ua_family(ua: str | None) -> str:
+    """User-Agent → 대략적인 계열(앱/브라우저/자동화). 순서가 중요(Chrome UA에도 Safari가 들어 있음)"""
+    if not ua:
+        return "unknown"
+    s = ua.lower()
+    if "ktapp" in s:
+        return "app-ios" if "ios" in s or "iphone" in s else "app-android"
+    for key, fam in (("bot", "bot"), ("curl", "script"), ("python", "script"), ("okhttp", "script"),
+                     ("headless", "headless"), ("edg/", "edge"), ("firefox", "firefox"),
+                     ("chrome", "chrome"), ("safari", "safari")):
+        if key in s:
+            return fam
+    return "other"
+
+
+def segment_label(key: tuple) -> str:
+    dim, channel, value = key
+    return channel if dim == "channel" else f"{channel}/{dim}={value}"
+
+
+def _fit_score(feats: np.ndarray, model: IsolationForest | None) -> Tuple[IsolationForest, float, bool]:
+    """모델이 없으면 창으로 학습. 마지막(가장 최근 닫힌) 분 점수(클수록 이상) 반환"""
+    fitted = model is None
+    if fitted:
+        t0 = time.perf_counter()
+        model = IsolationForest(n_estimators=SEGMENT_N_ESTIMATORS, random_state=42).fit(feats)
+        FIT_SECONDS.observe(time.perf_counter() - t0)
+    return model, float(-model.score_samples(feats[-1:])[0]), fitted
+
+
+class SegmentDetector:
+    """세그먼트 모델 캐시 + 제한된 스레드 풀. compute_metrics가 분당 1회 evaluate()를 호출한다."""
+
+    def __init__(self, dims=SEGMENT_DIMS, workers: int = SEGMENT_WORKERS, max_segments: int = SEGMENT_MAX,
+                 min_events: int = SEGMENT_MIN_EVENTS, min_points: int = SEGMENT_MIN_POINTS,
+                 retrain_min: int = SEGMENT_RETRAIN_MIN, cutoff: float = SEGMENT_SCORE_CUTOFF):
+        self.dims = tuple(DIM_COLUMNS[d] for d in dims)
+        self.workers = max(1, workers)
+        self.max_segments = max_segments
+        self.min_events = min_events
+        self.min_points = min_points
+        self.retrain_ms = retrain_min * MINUTE_MS
+        self.cutoff = cutoff
+        self._pool: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._models: Dict[tuple, tuple] = {}       # key → (model, 학습 시점 분)
+        self._last: Dict[str, dict] = {}
+        self._stats = dict(evaluated=0, skipped=0, fitted=0, last_minute=None, duration_ms=0.0)
+
+    @property
+    def extra_dims(self) -> tuple:
+        """aggregator가 채널 외에 따로 세어야 하는 차원"""
+        return tuple(d for d in self.dims if d != "channel")
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="segment-fit")
+        return self._pool
+
+    def _select(self, series: Dict[tuple, np.ndarray]) -> Tuple[List[tuple], int]:
+        """저볼륨 세그먼트 제외 후 볼륨 상위 max_segments개. (선택, 건너뛴 수)"""
+        volume = {}
+        for key, f in series.items():
+            # 실패 사유 세그먼트는 attempts가 채널 전체라 실패 수로 본다
+            col = 1 if key[0] == "fail_reason" else 0
+            if f[:, col].sum() >= self.min_events and np.count_nonzero(f[:, col]) >= self.min_points:
+                volume[key] = f[:, col].sum()
+        keep = sorted(volume, key=volume.get, reverse=True)[:self.max_segments]
+        return keep, len(series) - len(keep)
+
+    def evaluate(self, aggregator, now_ms: int | None = None) -> List[dict]:
+        """가장 최근에 닫힌 분 기준 세그먼트별 점수 → 알림 목록"""
+        t0 = time.perf_counter()
+        minutes, series = aggregator.segment_series(self.dims, now_ms)
+        if len(minutes) == 0:
+            return []
+        last_minute = int(minutes[-1])
+        keep, skipped = self._select(series)
+
+        with self._lock:
+            models = {k: self._models.get(k) for k in keep}
+        jobs = {}
+        pool = self._executor()
+        for key in keep:
+            cached = models[key]
+            model = cached[0] if cached and last_minute - cached[1] < self.retrain_ms else None
+            # 실패 사유 세그먼트의 attempts는 채널 전체 값이라 빼고(채널 세그먼트가 이미 본다) 건수/비중/지연만
+            feats = series[key][:, 1:] if key[0] == "fail_reason" else series[key]
+            jobs[key] = pool.submit(_fit_score, feats, model)
+
+        alerts, last, fitted = [], {}, 0
+        new_models = {}
+        for key, fut in jobs.items():
+            try:
+                model, score, was_fit = fut.result()
+            except Exception as e:
+                print(f"[segments] {segment_label(key)} error: {e}", flush=True)
+                continue
+            if was_fit:
+                fitted += 1
+                new_models[key] = (model, last_minute)
+            f = series[key][-1]
+            label = segment_label(key)
+            last[label] = dict(score=round(score, 3), attempts=int(f[0]), failures=int(f[1]),
+                               fail_rate=round(float(f[2]), 4), latency_ms=round(float(f[3]), 1))
+            if score > self.cutoff:
+                dim, channel, value = key
+                alerts.append({
+                    "id": f"SEG-{label}-{last_minute // 1000}",
+                    "time": datetime.fromtimestamp(last_minute / 1000, tz=timezone.utc).isoformat(),
+                    "severity": "WARN",
+                    "type": "ML_SEGMENT_ANOMALY",
+                    "channel": channel,
+                    "segment": {"channel": channel, "dim": dim, "value": value},
+                    "message": (f"{label} segment anomaly score {score:.2f} "
+                                f"(attempts {int(f[0])}, fail rate {f[2] * 100:.1f}%, latency {f[3]:.0f}ms)"),
+                })
+
+        with self._lock:
+            # 창에서 사라진 세그먼트 모델은 버린다
+            self._models = {k: v for k, v in self._models.items() if k in series}
+            self._models.update(new_models)
+            self._last = last
+            self._stats.update(
+                evaluated=len(keep), skipped=skipped, fitted=fitted, last_minute=last_minute,
+                duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+            )
+        return sorted(alerts, key=lambda a: a["id"])
+
+    def info(self) -> dict:
+        with self._lock:
+            return dict(dims=list(self.dims), workers=self.workers, max_segments=self.max_segments,
+                        cutoff=self.cutoff, models=len(self._models), segments=dict(self._last), **self._stats)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
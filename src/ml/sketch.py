@@ -0,0 +1,231 @@
+# src/ml/sketch.py
+"""
+고정 메모리 스트리밍 스케치.
+- CountMinSketch: 키별 빈도 상한 추정(과대추정만, 오차 ≤ e/width · 총합, 확률 1 - e^-depth)
+- SpaceSaving: 상위 k개 후보 유지(Metwally et al., 2005). 카운터가 k개를 넘지 않는다
+- HeavyHitters: 두 스케치를 묶어 후보는 SpaceSaving, 빈도는 min(SS, CMS)로 보고
+- HyperLogLog: 고유 개수(cardinality) 추정, 상대오차 ≈ 1.04/√(2^p) (Flajolet et al., 2007)
+- DDSketch: 상대오차 alpha 보장 분위수(Masson et al., 2019). 로그 간격 bin 카운트라 병합이 덧셈
+모두 같은 파라미터끼리 merge 가능(분 버킷 → 임의 창).
+해시는 파이썬 hash()라 프로세스 안에서만 일관된다(디스크에 저장하지 않음).
+"""
+import heapq
+import math
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+_MASK = (1 << 61) - 1
+_MASK64 = (1 << 64) - 1
+
+
+class CountMinSketch:
+    __slots__ = ("width", "depth", "table", "total")
+
+    def __init__(self, width: int = 512, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table: List[List[int]] = [[0] * width for _ in range(depth)]
+        self.total = 0
+
+    def _cells(self, key: str) -> Iterable[Tuple[int, int]]:
+        # 해시 두 개로 depth개 인덱스를 만든다(Kirsch–Mitzenmacher)
+        h1 = hash(key) & _MASK
+        h2 = hash((key, 1)) & _MASK | 1
+        w = self.width
+        return ((i, (h1 + i * h2) % w) for i in range(self.depth))
+
+    def add(self, key: str, n: int = 1) -> None:
+        t = self.table
+        for i, j in self._cells(key):
+            t[i][j] += n
+        self.total += n
+
+    def estimate(self, key: str) -> int:
+        t = self.table
+        return min(t[i][j] for i, j in self._cells(key))
+
+    def merge(self, other: "CountMinSketch") -> None:
+        for row, orow in zip(self.table, other.table):
+            for j, v in enumerate(orow):
+                if v:
+                    row[j] += v
+        self.total += other.total
+
+
+class SpaceSaving:
+    __slots__ = ("k", "counts", "errors")
+
+    def __init__(self, k: int = 32):
+        self.k = k
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}    # 교체로 물려받은 과대추정분
+
+    def add(self, key: str, n: int = 1) -> None:
+        c = self.counts
+        if key in c:
+            c[key] += n
+        elif len(c) < self.k:
+            c[key] = n
+            self.errors[key] = 0
+        else:
+            # 가장 작은 카운터를 새 키가 물려받는다
+            victim = min(c, key=c.__getitem__)
+            floor = c.pop(victim)
+            self.errors.pop(victim, None)
+            c[key] = floor + n
+            self.errors[key] = floor
+
+    def merge(self, other: "SpaceSaving") -> None:
+        """합친 뒤 상위 k개만 남긴다(Agarwal et al. mergeable summaries의 단순형)"""
+        for key, v in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + v
+            self.errors[key] = self.errors.get(key, 0) + other.errors.get(key, 0)
+        if len(self.counts) > self.k:
+            keep = heapq.nlargest(self.k, self.counts.items(), key=lambda kv: kv[1])
+            self.counts = dict(keep)
+            self.errors = {key: self.errors.get(key, 0) for key in self.counts}
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        return heapq.nlargest(n, self.counts.items(), key=lambda kv: kv[1])
+
+
+class HeavyHitters:
+    __slots__ = ("cms", "ss")
+
+    def __init__(self, k: int = 32, width: int = 512, depth: int = 4):
+        self.cms = CountMinSketch(width, depth)
+        self.ss = SpaceSaving(k)
+
+    @property
+    def total(self) -> int:
+        return self.cms.total
+
+    def add(self, key: str, n: int = 1) -> None:
+        self.cms.add(key, n)
+        self.ss.add(key, n)
+
+    def merge(self, other: "HeavyHitters") -> None:
+        self.cms.merge(other.cms)
+        self.ss.merge(other.ss)
+
+    def copy(self) -> "HeavyHitters":
+        out = HeavyHitters(self.ss.k, self.cms.width, self.cms.depth)
+        out.merge(self)
+        return out
+
+    def top(self, n: int = 10) -> List[Tuple[str, int]]:
+        """상위 n개 (key, 추정 빈도). 두 상한 중 작은 값을 쓴다"""
+        ranked = [(key, min(c, self.cms.estimate(key))) for key, c in self.ss.counts.items()]
+        ranked.sort(key=lambda kv: kv[1], reverse=True)
+        return ranked[:n]
+
+
+class HyperLogLog:
+    __slots__ = ("p", "m", "reg", "_est", "_shift", "_low")
+
+    def __init__(self, p: int = 10):
+        self.p = p
+        self.m = 1 << p
+        self.reg = bytearray(self.m)        # 레지스터당 1바이트(최대 64-p+1)
+        self._est: int | None = None
+        self._shift = 64 - p
+        self._low = (1 << self._shift) - 1
+
+    def add(self, key: str) -> None:
+        h = hash(key) & _MASK64
+        idx = h >> self._shift
+        rho = self._shift - (h & self._low).bit_length() + 1   # 남은 비트의 선행 0 개수 + 1
+        if rho > self.reg[idx]:
+            self.reg[idx] = rho
+            self._est = None
+
+    def merge(self, other: "HyperLogLog") -> None:
+        a = np.frombuffer(self.reg, dtype=np.uint8)
+        np.maximum(a, np.frombuffer(other.reg, dtype=np.uint8), out=a)
+        self._est = None
+
+    def copy(self) -> "HyperLogLog":
+        out = HyperLogLog(self.p)
+        out.reg[:] = self.reg
+        out._est = self._est
+        return out
+
+    def estimate(self) -> int:
+        if self._est is None:
+            regs = np.frombuffer(self.reg, dtype=np.uint8)
+            m = self.m
+            alpha = 0.7213 / (1 + 1.079 / m)
+            e = alpha * m * m / float(np.ldexp(1.0, -regs.astype(np.int32)).sum())
+            zeros = m - int(np.count_nonzero(regs))
+            if e <= 2.5 * m and zeros:
+                e = m * math.log(m / zeros)           # 작은 범위: linear counting
+            self._est = int(round(e))
+        return self._est
+
+
+class DDSketch:
+    __slots__ = ("alpha", "gamma", "_log_gamma", "max_bins", "bins", "zeros", "count", "_sorted")
+
+    def __init__(self, alpha: float = 0.01, max_bins: int = 2048):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.bins: Dict[int, int] = {}      # i -> (gamma^(i-1), gamma^i] 구간 개수
+        self.zeros = 0                      # 0 이하 값
+        self.count = 0
+        self._sorted: List[Tuple[int, int]] | None = None
+
+    def add(self, x: float, n: int = 1) -> None:
+        if x <= 0:
+            self.zeros += n
+        else:
+            i = math.ceil(math.log(x) / self._log_gamma)
+            self.bins[i] = self.bins.get(i, 0) + n
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += n
+        self._sorted = None
+
+    def _collapse(self) -> None:
+        # 가장 낮은 bin들을 하나로 합쳐 상위 꼬리(p95/p99) 정확도를 지킨다
+        keys = sorted(self.bins)
+        extra = len(keys) - self.max_bins + 1
+        merged = sum(self.bins.pop(k) for k in keys[:extra])
+        self.bins[keys[extra]] += merged
+
+    def merge(self, other: "DDSketch") -> None:
+        for i, c in other.bins.items():
+            self.bins[i] = self.bins.get(i, 0) + c
+        self.zeros += other.zeros
+        self.count += other.count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self._sorted = None
+
+    def copy(self) -> "DDSketch":
+        out = DDSketch(self.alpha, self.max_bins)
+        out.bins = dict(self.bins)          # 같은 설정이라 bin 단위 merge 없이 통째로
+        out.zeros = self.zeros
+        out.count = self.count
+        out._sorted = self._sorted          # add/merge는 교체만 하므로 공유해도 안전
+        return out
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return 0.0
+        if self._sorted is None:
+            self._sorted = sorted(self.bins.items())
+        seen = self.zeros
+        for i, c in self._sorted:
+            seen += c
+            if seen > rank:
+                return 2 * self.gamma ** i / (self.gamma + 1)   # bin 중앙(상대오차 ≤ alpha)
+        return 2 * self.gamma ** self._sorted[-1][0] / (self.gamma + 1)
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        return [self.quantile(q) for q in qs]
@@ -0,0 +1,248 @@
+# src/ml/stream.py
+"""
+채널별 스트리밍 이상 탐지기 (분이 닫힐 때마다 O(1) 갱신).
+- EwmaZ: 지수가중 평균/분산 기반 z-score
+- RobustZ: 확률적 근사 중앙값/MAD 기반 z-score (스파이크에 덜 끌려감)
+- HalfSpaceTrees: 슬라이딩 윈도 질량(mass) 기반 스트리밍 트리 (Tan et al., 2011)
+"""
+import math
+import os
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List
+
+FEATURES = ["attempts", "failures", "fail_rate", "latency_ms"]
+# 분산이 0에 가까울 때 z가 폭주하지 않도록 하는 최소 표준편차
+MIN_STD = {"attempts": 1.0, "failures": 1.0, "fail_rate": 0.02, "latency_ms": 5.0}
+# attempts는 급감(장애)도 이상, 나머지는 증가 방향만 본다
+TWO_SIDED = {"attempts"}
+
+STREAM_Z_THRESHOLD = float(os.getenv("STREAM_Z_THRESHOLD", "4.0"))
+STREAM_HST_THRESHOLD = float(os.getenv("STREAM_HST_THRESHOLD", "0.85"))
+STREAM_WARMUP = int(os.getenv("STREAM_WARMUP_MIN", "15"))          # 알림 전 최소 학습 분
+STREAM_MIN_ATTEMPTS = int(os.getenv("STREAM_MIN_ATTEMPTS", "10"))   # 저볼륨 분은 비율 노이즈가 커서 제외
+
+
+def _std_floor(name: str, mean: float, var: float) -> float:
+    return max(math.sqrt(max(var, 0.0)), MIN_STD[name] + 0.05 * abs(mean))
+
+
+def _directional(name: str, z: float) -> float:
+    return abs(z) if name in TWO_SIDED else max(z, 0.0)
+
+
+class EwmaZ:
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha
+        self.mean = {f: 0.0 for f in FEATURES}
+        self.var = {f: 0.0 for f in FEATURES}
+        self.n = 0
+
+    def update(self, x: Dict[str, float]) -> Dict[str, float]:
+        """현재 상태 기준 z를 계산한 뒤 상태를 갱신"""
+        z = {}
+        for f in FEATURES:
+            v, m = x[f], self.mean[f]
+            if self.n == 0:
+                self.mean[f] = v
+                z[f] = 0.0
+                continue
+            z[f] = _directional(f, (v - m) / _std_floor(f, m, self.var[f]))
+            d = v - m
+            self.mean[f] = m + self.alpha * d
+            self.var[f] = (1 - self.alpha) * (self.var[f] + self.alpha * d * d)
+        self.n += 1
+        return z
+
+
+class RobustZ:
+    def __init__(self, eta: float = 0.05):
+        self.eta = eta
+        self.med = {f: 0.0 for f in FEATURES}
+        self.mad = {f: 0.0 for f in FEATURES}
+        self.n = 0
+
+    def update(self, x: Dict[str, float]) -> Dict[str, float]:
+        z = {}
+        for f in FEATURES:
+            v = x[f]
+            if self.n == 0:
+                self.med[f] = v
+                z[f] = 0.0
+                continue
+            med, mad = self.med[f], self.mad[f]
+            scale = max(1.4826 * mad, MIN_STD[f] + 0.05 * abs(med))
+            z[f] = _directional(f, (v - med) / scale)
+            # 중앙값/MAD를 값의 크기에 비례한 보폭으로 한 칸씩 이동
+            step = self.eta * max(scale, MIN_STD[f])
+            self.med[f] = med + (step if v > med else -step if v < med else 0.0)
+            dev = abs(v - self.med[f])
+            self.mad[f] = mad + (self.eta * max(mad, MIN_STD[f]) if dev > mad else -self.eta * mad)
+        self.n += 1
+        return z
+
+
+class HalfSpaceTrees:
+    """
+    완전 이진트리(깊이 depth) n_trees개. 기준 윈도(r)와 최근 윈도(l)의 질량을 세고,
+    window개마다 l→r 교대. 점수는 질량이 작을수록(희귀한 영역일수록) 1에 가깝다.
+    입력은 log1p 후 지수 감쇠 최댓값으로 [0, 1] 정규화한다.
+    """
+
+    def __init__(self, n_trees: int = 25, depth: int = 8, window: int = 60, seed: int = 42):
+        self.n_trees, self.depth, self.window = n_trees, depth, window
+        self.size_limit = max(1, int(0.1 * window))
+        rng = random.Random(seed)
+        n_nodes = 2 ** (depth + 1) - 1
+        dims = len(FEATURES)
+        self.split_dim: List[List[int]] = []
+        self.split_val: List[List[float]] = []
+        for _ in range(n_trees):
+            # 작업 공간을 무작위로 흔들어 트리마다 다른 분할을 만든다
+            lo, hi = [], []
+            for _d in range(dims):
+                s = rng.random()
+                span = 2 * max(s, 1 - s)
+                lo.append(s - span)
+                hi.append(s + span)
+            sd, sv = [0] * n_nodes, [0.0] * n_nodes
+            self._build(0, 0, lo, hi, sd, sv, rng)
+            self.split_dim.append(sd)
+            self.split_val.append(sv)
+        self.r = [[0] * n_nodes for _ in range(n_trees)]
+        self.l = [[0] * n_nodes for _ in range(n_trees)]
+        self.scale = [1.0] * dims
+        self.count = 0
+        self.n = 0
+
+    def _build(self, node, d, lo, hi, sd, sv, rng):
+        if d >= self.depth:
+            return
+        q = rng.randrange(len(lo))
+        mid = (lo[q] + hi[q]) / 2
+        sd[node], sv[node] = q, mid
+        left_hi = list(hi)
+        left_hi[q] = mid
+        right_lo = list(lo)
+        right_lo[q] = mid
+        self._build(2 * node + 1, d + 1, lo, left_hi, sd, sv, rng)
+        self._build(2 * node + 2, d + 1, right_lo, hi, sd, sv, rng)
+
+    def _normalize(self, x: Dict[str, float]) -> List[float]:
+        out = []
+        for i, f in enumerate(FEATURES):
+            v = math.log1p(max(x[f], 0.0))
+            # 최댓값은 천천히 감쇠시켜 오래된 피크에 계속 눌리지 않게 한다
+            self.scale[i] = max(v, self.scale[i] * 0.999, 1e-9)
+            out.append(min(v / self.scale[i], 1.0))
+        return out
+
+    def update(self, x: Dict[str, float]) -> float:
+        p = self._normalize(x)
+        score = 0.0
+        for t in range(self.n_trees):
+            sd, sv, r, l = self.split_dim[t], self.split_val[t], self.r[t], self.l[t]
+            node, d, scored = 0, 0, False
+            while True:
+                if not scored and (r[node] <= self.size_limit or d == self.depth):
+                    score += r[node] * (2 ** d)
+                    scored = True
+                l[node] += 1
+                if d == self.depth:
+                    break
+                node = 2 * node + 1 if p[sd[node]] < sv[node] else 2 * node + 2
+                d += 1
+        self.count += 1
+        self.n += 1
+        if self.count >= self.window:
+            self.r = self.l
+            n_nodes = len(self.r[0])
+            self.l = [[0] * n_nodes for _ in range(self.n_trees)]
+            self.count = 0
+        if self.n <= self.window:
+            return 0.0                  # 첫 기준 윈도가 찰 때까지는 판단 보류
+        return max(0.0, 1.0 - score / (self.n_trees * self.window))
+
+
+class _ChannelState:
+    __slots__ = ("ewma", "robust", "hst", "n", "last")
+
+    def __init__(self):
+        self.ewma = EwmaZ()
+        self.robust = RobustZ()
+        self.hst = HalfSpaceTrees()
+        self.n = 0
+        self.last: dict | None = None
+
+
+class StreamDetectorEngine:
+    """채널별 스트리밍 탐지 상태. advance()가 aggregator에서 새로 닫힌 분만 읽어 갱신한다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels: Dict[str, _ChannelState] = {}
+        self._last_minute = -1
+
+    def update(self, channel: str, minute_ms: int, x: Dict[str, float]) -> dict:
+        st = self._channels.get(channel)
+        if st is None:
+            st = self._channels[channel] = _ChannelState()
+        ez = st.ewma.update(x)
+        rz = st.robust.update(x)
+        hs = st.hst.update(x)
+        st.n += 1
+        top = max(FEATURES, key=lambda f: max(ez[f], rz[f]))
+        z = max(ez[top], rz[top])
+        st.last = dict(
+            minute=minute_ms, attempts=x["attempts"], feature=top,
+            ewma_z=round(ez[top], 3), robust_z=round(rz[top], 3), hst=round(hs, 3),
+            score=round(max(z / STREAM_Z_THRESHOLD, hs / STREAM_HST_THRESHOLD), 3),
+            warm=st.n > STREAM_WARMUP,
+        )
+        return st.last
+
+    def advance(self, aggregator, now_ms: int | None = None) -> int:
+        """aggregator에서 아직 반영하지 않은 닫힌 분을 순서대로 반영. 처리한 분 수 반환"""
+        with self._lock:
+            closed = aggregator.closed_channel_minutes(self._last_minute, now_ms)
+            for minute, per_channel in closed:
+                # 한 번 본 채널이 이번 분에 0건이면 0으로 갱신(채널 단절도 신호)
+                for ch in self._channels:
+                    per_channel.setdefault(ch, (0, 0, 0.0))
+                for ch, (a, f, lat) in per_channel.items():
+                    if ch is None:
+                        continue
+                    self.update(ch, minute, dict(
+                        attempts=float(a), failures=float(f),
+                        fail_rate=(f / a) if a else 0.0, latency_ms=float(lat),
+                    ))
+                self._last_minute = minute
+            return len(closed)
+
+    def alerts(self) -> List[dict]:
+        """가장 최근에 닫힌 분에서 임계치를 넘은 채널별 ML_STREAM_ANOMALY 알림"""
+        out = []
+        with self._lock:
+            for ch, st in sorted(self._channels.items()):
+                s = st.last
+                if not s or not s["warm"] or s["minute"] != self._last_minute:
+                    continue
+                if s["score"] < 1.0:
+                    continue
+                if s["attempts"] < STREAM_MIN_ATTEMPTS and s["feature"] != "attempts":
+                    continue
+                out.append({
+                    "id": f"MS-{ch}-{s['minute'] // 1000}",
+                    "time": datetime.fromtimestamp(s["minute"] / 1000, tz=timezone.utc).isoformat(),
+                    "severity": "WARN",
+                    "type": "ML_STREAM_ANOMALY",
+                    "channel": ch,
+                    "message": (f"{ch} {s['feature']} stream anomaly "
+                                f"(z={max(s['ewma_z'], s['robust_z']):.1f}, hst={s['hst']:.2f})"),
+                })
+        return out
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {ch: dict(st.last) for ch, st in self._channels.items() if st.last}
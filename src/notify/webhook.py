@@ -1,31 +1,105 @@
 # src/notify/webhook.py
+import math
 import os
+import queue
+import random
+import threading
 import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, List, Optional
+
 import requests
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+from telemetry.metrics import REGISTRY
+
 load_dotenv()
 
 SLACK_URL = os.environ.get("SLACK_WEBHOOK_URL", "")
-# 같은 알림이 짧은 시간에 중복 발송되는 걸 막기 위한 초간단 디듀프(메모리)
-_LAST_SENT: Dict[str, float] = {}
-DEDUP_TTL = int(os.environ.get("SLACK_DEDUP_TTL_SEC", "180"))  # 기본 3분
+DEDUP_TTL = int(os.environ.get("SLACK_DEDUP_TTL_SEC", "180"))      # 기본 3분
+DEDUP_MAX = int(os.environ.get("SLACK_DEDUP_MAX", "1000"))          # 디듀프 키 최대 개수
+QUEUE_MAX = int(os.environ.get("SLACK_QUEUE_MAX", "1000"))          # 발송 대기 큐 크기
+COALESCE_SEC = float(os.environ.get("SLACK_COALESCE_SEC", "2.0"))   # 이 시간 안의 알림은 한 메시지로
+MAX_RETRIES = int(os.environ.get("SLACK_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.environ.get("SLACK_BACKOFF_BASE_SEC", "0.5"))
+HTTP_TIMEOUT = float(os.environ.get("SLACK_TIMEOUT_SEC", "6"))
+# Retry-After 상한(발송 스레드가 하나라 큰 값 하나가 전체 발송을 멈추지 않게) = 마지막 백오프 간격
+RETRY_AFTER_MAX = BACKOFF_BASE * (2 ** MAX_RETRIES)
+
+SLACK_SECONDS = REGISTRY.histogram("lcs_slack_post_seconds", "Slack webhook POST latency per attempt", ("status",))
+SLACK_FAILURES = REGISTRY.counter("lcs_slack_failures_total", "Slack webhook attempts that failed", ("kind",))
+
+
+class TTLCache:
+    """크기/TTL 상한이 있는 디듀프 캐시 (오래된 키부터 제거)"""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = max(1, maxsize)
+        self._d: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, key: str) -> bool:
+        """TTL 안에 본 키면 True, 아니면 기록하고 False"""
+        now = time.time()
+        with self._lock:
+            # 삽입 순서 = 시간 순서이므로 앞에서부터 만료 정리
+            while self._d:
+                k, t = next(iter(self._d.items()))
+                if now - t < self.ttl:
+                    break
+                self._d.popitem(last=False)
+            if key in self._d:
+                return True
+            self._d[key] = now
+            if len(self._d) > self.maxsize:
+                self._d.popitem(last=False)
+            return False
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+
+# 같은 알림이 짧은 시간에 중복 발송되는 걸 막기 위한 디듀프(메모리, 크기 제한)
+_DEDUP = TTLCache(DEDUP_TTL, DEDUP_MAX)
 
 def _should_skip(key: str) -> bool:
-    now = time.time()
-    last = _LAST_SENT.get(key, 0)
-    if now - last < DEDUP_TTL:
-        return True
-    _LAST_SENT[key] = now
-    return False
+    return _DEDUP.seen(key)
+
+def _retry_after(value: str | None) -> float:
+    """Retry-After 헤더(초 또는 HTTP-date) → 대기 초(0 ~ RETRY_AFTER_MAX). 해석 못 하면 0"""
+    if not value:
+        return 0.0
+    try:
+        sec = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return 0.0
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        sec = (when - datetime.now(timezone.utc)).total_seconds()
+    if not math.isfinite(sec):
+        return 0.0
+    return min(max(sec, 0.0), RETRY_AFTER_MAX)
+
+def _make_session() -> requests.Session:
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
 
 def notify_slack_text(message: str):
     """단순 텍스트 알림(백업용)"""
     if not SLACK_URL:
         return
     try:
-        r = requests.post(SLACK_URL, json={"text": message}, timeout=6)
+        r = dispatcher.session.post(SLACK_URL, json={"text": message}, timeout=HTTP_TIMEOUT)
         r.raise_for_status()
     except Exception as e:
         print("⚠️ Slack(text) notify error:", e)
@@ -71,20 +145,153 @@ def build_slack_blocks(alert: Dict[str, Any], summary: Optional[str], kpis: Dict
     ]
     return {"blocks": blocks}
 
+def build_slack_blocks_multi(alerts: List[Dict[str, Any]], summary: Optional[str], kpis: Dict[str, Any]) -> Dict[str, Any]:
+    """같은 창에 모인 여러 알림을 한 Block Kit 메시지로"""
+    worst = min((str(a.get("severity", "INFO")) for a in alerts),
+                key=lambda s: {"CRIT": 0, "WARN": 1, "INFO": 2}.get(s, 3))
+    payload = build_slack_blocks(
+        {"severity": worst, "type": f"{len(alerts)} ALERTS", "message": "", "time": alerts[-1].get("time", "")},
+        summary, kpis,
+    )
+    lines = "\n".join(
+        f"{_sev_emoji(str(a.get('severity')))} *{a.get('type', 'ALERT')}* — {a.get('message', '')} `{a.get('time', '')}`"
+        for a in alerts
+    )
+    # 헤더 다음 섹션을 알림 목록으로 교체
+    payload["blocks"][1] = {"type": "section", "text": {"type": "mrkdwn", "text": lines[:2900]}}
+    return payload
+
+class SlackDispatcher:
+    """
+    Slack 발송 백그라운드 워커.
+    - 제한된 큐 + 커넥션 풀(requests.Session) + 지수 백오프 재시도(429 Retry-After 준수)
+    - COALESCE_SEC 안에 들어온 알림은 한 메시지로 합쳐 보낸다
+    - 요청 경로에서는 enqueue만 하므로 Slack이 느려도 응답이 늦어지지 않는다
+    """
+
+    def __init__(self, maxsize: int = QUEUE_MAX):
+        self.session = _make_session()
+        self._q: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = dict(enqueued=0, dropped=0, messages=0, alerts_sent=0, failures=0, retries=0)
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    def enqueue(self, alert: Dict[str, Any], summary: Optional[str], kpis: Dict[str, Any]) -> bool:
+        self.start()
+        try:
+            self._q.put_nowait((alert, summary, kpis))
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def _post(self, payload: Dict[str, Any]) -> bool:
+        for attempt in range(MAX_RETRIES + 1):
+            delay = BACKOFF_BASE * (2 ** attempt)
+            t0 = time.perf_counter()
+            try:
+                r = self.session.post(SLACK_URL, json=payload, timeout=HTTP_TIMEOUT)
+                SLACK_SECONDS.labels(str(r.status_code)).observe(time.perf_counter() - t0)
+                if r.status_code == 429 or r.status_code >= 500:
+                    # 일시적 오류: Retry-After가 있으면 그만큼 기다린다
+                    delay = max(delay, _retry_after(r.headers.get("Retry-After")))
+                    err: Any = f"HTTP {r.status_code}"
+                    SLACK_FAILURES.labels("retryable").inc()
+                else:
+                    r.raise_for_status()
+                    return True
+            except requests.HTTPError as e:
+                # 그 외 4xx는 재시도해도 결과가 같다
+                SLACK_FAILURES.labels("client_error").inc()
+                print("⚠️ Slack(blocks) notify error:", e)
+                return False
+            except requests.RequestException as e:
+                SLACK_SECONDS.labels("network_error").observe(time.perf_counter() - t0)
+                SLACK_FAILURES.labels("network").inc()
+                err = e
+            if attempt == MAX_RETRIES:
+                print("⚠️ Slack(blocks) notify error:", err)
+                return False
+            self._count("retries")
+            # 지터를 섞어 여러 인스턴스가 동시에 재시도하지 않게 (종료 중이면 중단)
+            if self._stop.wait(delay * (0.5 + random.random() / 2)):
+                return False
+        return False
+
+    def _send(self, items: List[tuple]) -> None:
+        alerts = [a for a, _, _ in items]
+        _, summary, kpis = items[-1]   # 가장 최근 요약/KPI 사용
+        payload = build_slack_blocks(alerts[0], summary, kpis) if len(alerts) == 1 \
+            else build_slack_blocks_multi(alerts, summary, kpis)
+        if self._post(payload):
+            self._count("messages")
+            self._count("alerts_sent", len(alerts))
+            return
+        self._count("failures")
+        # 실패 시 텍스트로 폴백
+        msg = "\n".join(
+            f"[{a.get('severity')}] {a.get('type')} - {a.get('message')} @ {a.get('time')}" for a in alerts
+        ) + f"\n\n{summary or ''}"
+        notify_slack_text(msg)
+
+    def _run(self) -> None:
+        while not (self._stop.is_set() and self._q.empty()):
+            try:
+                first = self._q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            items = [first]
+            deadline = time.monotonic() + (0 if self._stop.is_set() else COALESCE_SEC)
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    items.append(self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._send(items)
+            except Exception as e:
+                print("⚠️ Slack dispatch error:", e)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="slack-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """남은 알림을 (재시도 없이 가능한 만큼) 보내고 종료"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+        s["queue_depth"] = self._q.qsize()
+        s["dedup_keys"] = len(_DEDUP)
+        return s
+
+
+dispatcher = SlackDispatcher()
+
 def notify_slack_blocks(alert: Dict[str, Any], summary: Optional[str], kpis: Dict[str, Any]):
-    """Block Kit 알림(중복 억제 포함)"""
+    """Block Kit 알림(중복 억제 포함). 발송은 백그라운드 워커가 한다."""
     if not SLACK_URL:
         return
     # 동일 유형/중요도/메시지를 TTL 내 중복 방지
     dedup_key = f"{alert.get('severity')}|{alert.get('type')}|{alert.get('message')}"
     if _should_skip(dedup_key):
         return
-    try:
-        payload = build_slack_blocks(alert, summary, kpis)
-        r = requests.post(SLACK_URL, json=payload, timeout=6)
-        r.raise_for_status()
-    except Exception as e:
-        print("⚠️ Slack(blocks) notify error:", e)
-        # 실패 시 텍스트로 폴백
-        msg = f"[{alert.get('severity')}] {alert.get('type')} - {alert.get('message')} @ {alert.get('time')}\n\n{summary or ''}"
-        notify_slack_text(msg)
+    dispatcher.enqueue(alert, summary, kpis)
@@ -0,0 +1,46 @@
+# src/store/alerts.py
+import json
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+
+
+def create_alerts_table(conn) -> None:
+    conn.exec_driver_sql("""
+    CREATE TABLE IF NOT EXISTS alerts(
+      id TEXT PRIMARY KEY,
+      ts_ms INTEGER NOT NULL,
+      time TEXT,
+      severity TEXT,
+      type TEXT,
+      channel TEXT,
+      message TEXT,
+      payload TEXT
+    )
+    """)
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS idx_alerts_ts_ms ON alerts(ts_ms)")
+
+
+def save_alerts(engine, evaluated_ms: int, alerts: List[Dict[str, Any]]) -> None:
+    """평가 결과 알림 저장(같은 id는 한 번만)"""
+    if not alerts:
+        return
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT OR IGNORE INTO alerts (id, ts_ms, time, severity, type, channel, message, payload)
+            VALUES (:id, :ts_ms, :time, :severity, :type, :channel, :message, :payload)
+        """), [
+            dict(id=a["id"], ts_ms=evaluated_ms, time=a.get("time"), severity=a.get("severity"),
+                 type=a.get("type"), channel=a.get("channel"), message=a.get("message"),
+                 payload=json.dumps(a, ensure_ascii=False))
+            for a in alerts
+        ])
+
+
+def read_alerts(engine, since_ms: int, limit: int = 500) -> List[Dict[str, Any]]:
+    """since_ms 이후 알림 중 최신 limit개를 시간순으로"""
+    with engine.begin() as conn:
+        rows = conn.execute(text("""
+            SELECT payload FROM alerts WHERE ts_ms >= :since ORDER BY ts_ms DESC, id DESC LIMIT :limit
+        """), {"since": since_ms, "limit": limit}).fetchall()
+    return [json.loads(r[0]) for r in reversed(rows)]
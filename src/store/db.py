@@ -0,0 +1,52 @@
+# src/store/db.py
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine, event
+
+# 대시보드 읽기가 writer를 막지 않도록 WAL + 적당한 동기화/캐시 설정
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")   # WAL에서는 NORMAL로도 안전
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "20000"))      # 페이지 캐시(KiB)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def make_engine(db_path: Path):
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        future=True,
+        connect_args={"check_same_thread": False},
+        pool_pre_ping=True,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cur.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+        cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.close()
+
+    return engine
+
+
+def to_epoch_ms(ts) -> int:
+    """datetime 또는 ISO-8601 문자열 → epoch milliseconds (UTC)"""
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return round(ts.timestamp() * 1000)
+
+
+def now_ms() -> int:
+    return to_epoch_ms(datetime.now(timezone.utc))
+
+
+def iso_from_ms(values) -> np.ndarray:
+    """epoch ms 배열 → ISO-8601(UTC, 초 단위) 문자열 배열. datetime.isoformat()과 같은 모양"""
+    ms = np.asarray(values, dtype=np.int64)
+    return np.char.add(np.datetime_as_string(ms.astype("datetime64[ms]"), unit="s"), "+00:00")
@@ -0,0 +1,212 @@
+# src/store/partitions.py
+"""
+login_events 시간 파티션.
+- 원시 이벤트는 EVENT_PARTITION_HOURS 단위 테이블(login_events_pYYYYMMDDHH)에 나눠 쌓고,
+  event_partitions 카탈로그에 [start_ms, end_ms) 범위를 기록한다.
+- 시간 범위 조회는 events_source()로 겹치는 파티션만 읽는다. 전 파티션 UNION ALL 뷰는 두지 않는다
+  (SQLite compound SELECT 500항 제한 — 시간 파티션 × 보존 기간이 길면 뷰 갱신이 적재를 막는다).
+- 닫힌 파티션은 롤업으로 다시 계산(compact)해 두고, 보존 기간이 지나면 DROP TABLE로 통째로 버린다.
+  비워진 페이지는 incremental_vacuum 으로 파일에서 반환한다.
+"""
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from store.rollup import DAY_MS, ROLLUP_RETENTION_DAYS, rebuild_rollups
+
+EVENT_PARTITION_HOURS = int(os.getenv("EVENT_PARTITION_HOURS", "24"))   # 24의 약수(1, 2, ... 24)
+RAW_RETENTION_DAYS = float(os.getenv("RAW_RETENTION_DAYS", "7"))        # 0이면 무기한
+# 파티션이 끝난 뒤 늦게 도착하는 이벤트를 기다렸다가 롤업을 다시 계산
+PARTITION_COMPACT_GRACE_MIN = int(os.getenv("PARTITION_COMPACT_GRACE_MIN", "10"))
+VACUUM_PAGES = int(os.getenv("PARTITION_VACUUM_PAGES", "0"))            # 0이면 빈 페이지 전부 반환
+
+PARTITION_MS = EVENT_PARTITION_HOURS * 3_600_000
+PARTITION_PREFIX = "login_events_p"
+EVENT_COLUMNS = ("id", "ts", "ts_ms", "channel", "user_hash", "ip", "ua", "fingerprint",
+                 "result", "fail_reason", "latency_ms")
+
+INSERT_COLUMNS = EVENT_COLUMNS[1:]
+
+# engine(DB)별로 이미 만든(커밋된, 카탈로그에 있는) 파티션 이름.
+# 트랜잭션 안에서 만든 이름은 conn.info[_PENDING]에 두었다가 COMMIT 때만 옮긴다(ROLLBACK이면 버림)
+_known: "WeakKeyDictionary[Any, set[str]]" = WeakKeyDictionary()
+_PENDING = "lcs_pending_partitions"
+
+
+def _on_commit(conn) -> None:
+    names = conn.info.pop(_PENDING, None)
+    if names:
+        _known_for(conn.engine).update(names)
+
+
+def _on_rollback(conn) -> None:
+    conn.info.pop(_PENDING, None)
+
+
+def _known_for(engine) -> set[str]:
+    known = _known.get(engine)
+    if known is None:
+        known = _known[engine] = set()
+        event.listen(engine, "commit", _on_commit)
+        event.listen(engine, "rollback", _on_rollback)
+    return known
+
+
+def create_partition_catalog(conn) -> None:
+    conn.exec_driver_sql("""
+    CREATE TABLE IF NOT EXISTS event_partitions(
+      name TEXT PRIMARY KEY,
+      start_ms INTEGER NOT NULL,
+      end_ms INTEGER NOT NULL,
+      compacted_ms INTEGER
+    )
+    """)
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS idx_event_partitions_range ON event_partitions(start_ms, end_ms)")
+
+
+def partition_bounds(ts_ms: int) -> tuple[str, int, int]:
+    """ts_ms가 속한 파티션 (이름, 시작, 끝). 경계는 UTC 기준"""
+    start = (ts_ms // PARTITION_MS) * PARTITION_MS
+    name = PARTITION_PREFIX + datetime.fromtimestamp(start / 1000, tz=timezone.utc).strftime("%Y%m%d%H")
+    return name, start, start + PARTITION_MS
+
+
+def ensure_partition(conn, name: str, start_ms: int, end_ms: int) -> None:
+    if name in _known_for(conn.engine) or name in conn.info.get(_PENDING, ()):
+        return
+    conn.exec_driver_sql(f"""
+    CREATE TABLE IF NOT EXISTS {name}(
+      id INTEGER PRIMARY KEY,
+      ts TEXT NOT NULL,
+      ts_ms INTEGER NOT NULL,
+      channel TEXT,
+      user_hash TEXT,
+      ip TEXT,
+      ua TEXT,
+      fingerprint TEXT,
+      result TEXT,
+      fail_reason TEXT,
+      latency_ms INTEGER
+    )
+    """)
+    conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS idx_{name}_ts_ms ON {name}(ts_ms, channel, result, latency_ms)")
+    conn.execute(text("INSERT OR IGNORE INTO event_partitions(name, start_ms, end_ms) VALUES (:n, :s, :e)"),
+                 {"n": name, "s": start_ms, "e": end_ms})
+    conn.info.setdefault(_PENDING, set()).add(name)
+
+
+def insert_events(conn, rows: List[Dict[str, Any]]) -> None:
+    """배치 rows를 파티션별로 나눠 executemany. writer 트랜잭션 안에서 호출된다."""
+    groups: Dict[tuple, list] = {}
+    for r in rows:
+        groups.setdefault(partition_bounds(r["ts_ms"]), []).append(r)
+    for (name, start, end), part in groups.items():
+        ensure_partition(conn, name, start, end)
+        sql = text(f"""
+            INSERT INTO {name} ({", ".join(INSERT_COLUMNS)})
+            VALUES ({", ".join(":" + c for c in INSERT_COLUMNS)})
+        """)
+        try:
+            conn.execute(sql, part)
+        except OperationalError as e:
+            # 캐시가 실제 DB와 어긋난 경우(다른 프로세스가 DROP 등): 잊고 다시 만들어 1회 재시도
+            if "no such table" not in str(e):
+                raise
+            _known_for(conn.engine).discard(name)
+            ensure_partition(conn, name, start, end)
+            conn.execute(sql, part)
+
+
+def partitions_overlapping(conn, start_ms: int, end_ms: int | None = None) -> List[str]:
+    hi = end_ms if end_ms is not None else 2 ** 62
+    return [r[0] for r in conn.execute(text("""
+        SELECT name FROM event_partitions WHERE end_ms > :lo AND start_ms < :hi ORDER BY start_ms
+    """), {"lo": start_ms, "hi": hi})]
+
+
+def events_source(conn, start_ms: int, end_ms: int | None = None) -> str:
+    """[start_ms, end_ms)와 겹치는 파티션만 담은 FROM 절(테이블 이름 또는 UNION ALL 서브쿼리)"""
+    names = partitions_overlapping(conn, start_ms, end_ms)
+    if len(names) == 1:
+        return names[0]
+    cols = ", ".join(EVENT_COLUMNS)
+    if not names:
+        return "(SELECT " + ", ".join(f"NULL AS {c}" for c in EVENT_COLUMNS) + " WHERE 0)"
+    return "(" + " UNION ALL ".join(f"SELECT {cols} FROM {n}" for n in names) + ")"
+
+
+def _compact(conn, name: str, start_ms: int, end_ms: int, now_ms: int) -> None:
+    # 롤업 보존 기간 안에 있는 해상도만 파티션 원본으로 다시 계산(직접 적재 등으로 어긋난 롤업 보정)
+    levels = [lvl for lvl, days in ROLLUP_RETENTION_DAYS.items() if days <= 0 or end_ms > now_ms - int(days * DAY_MS)]
+    if levels:
+        rebuild_rollups(conn, start_ms, end_ms, source=name, levels=levels)
+    conn.execute(text("UPDATE event_partitions SET compacted_ms = :now WHERE name = :n"), {"now": now_ms, "n": name})
+
+
+def maintain_partitions(engine, retention_days: float = RAW_RETENTION_DAYS, now_ms: int | None = None) -> Dict[str, list]:
+    """닫힌 파티션 롤업 재계산 + 보존 기간 지난 파티션 DROP. 처리한 파티션 이름을 반환"""
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    closed_before = now_ms - PARTITION_COMPACT_GRACE_MIN * 60_000
+    cutoff = now_ms - int(retention_days * DAY_MS) if retention_days > 0 else None
+    out: Dict[str, list] = {"compacted": [], "dropped": []}
+    with engine.begin() as conn:
+        pending = conn.execute(text("""
+            SELECT name, start_ms, end_ms FROM event_partitions
+             WHERE compacted_ms IS NULL AND end_ms <= :closed ORDER BY start_ms
+        """), {"closed": closed_before}).fetchall()
+    # 파티션마다 트랜잭션을 나눠 writer를 오래 막지 않는다
+    for name, start, end in pending:
+        with engine.begin() as conn:
+            _compact(conn, name, start, end, now_ms)
+        out["compacted"].append(name)
+    if cutoff is not None:
+        with engine.begin() as conn:
+            expired = [r[0] for r in conn.execute(text(
+                "SELECT name FROM event_partitions WHERE end_ms <= :cutoff ORDER BY start_ms"), {"cutoff": cutoff})]
+            for name in expired:
+                conn.exec_driver_sql(f"DROP TABLE IF EXISTS {name}")
+                conn.execute(text("DELETE FROM event_partitions WHERE name = :n"), {"n": name})
+                _known_for(engine).discard(name)
+        out["dropped"] = expired
+        if expired:
+            # 한 스텝에 한 페이지씩 반환되므로 executescript로 끝까지 실행한다
+            raw = engine.raw_connection()
+            try:
+                raw.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES});" if VACUUM_PAGES
+                                  else "PRAGMA incremental_vacuum;")
+            finally:
+                raw.close()
+    return out
+
+
+def partition_stats(engine) -> dict:
+    with engine.begin() as conn:
+        rows = conn.exec_driver_sql(
+            "SELECT name, start_ms, end_ms, compacted_ms FROM event_partitions ORDER BY start_ms").fetchall()
+        page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+        pages = conn.exec_driver_sql("PRAGMA page_count").scalar()
+        free = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+    return dict(
+        partition_hours=EVENT_PARTITION_HOURS,
+        retention_days=RAW_RETENTION_DAYS,
+        partitions=[dict(name=n, start_ms=s, end_ms=e, compacted=c is not None) for n, s, e, c in rows],
+        db_bytes=page_size * pages,
+        free_bytes=page_size * free,
+    )
+
+
+def enable_incremental_vacuum(engine) -> None:
+    """auto_vacuum=INCREMENTAL 은 VACUUM 후에야 적용된다(기존 DB 1회). 트랜잭션 밖에서 실행"""
+    with engine.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+            return
+        conn.commit()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    print("[schema] enabled incremental auto_vacuum", flush=True)
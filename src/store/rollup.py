@@ -0,0 +1,252 @@
+# src/store/rollup.py
+"""
+1분/5분/1시간 해상도 롤업 테이블.
+- 배치 INSERT와 같은 트랜잭션에서 upsert로 증분 갱신(apply_rollups)
+- 보존 기간이 지난 세밀한 해상도는 백그라운드 작업이 정리(compact_rollups)
+- 기간 조회는 요청을 만족하는 가장 거친 롤업에서 읽는다(query_range)
+"""
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from store.db import iso_from_ms
+
+MINUTE_MS = 60_000
+DAY_MS = 24 * 60 * MINUTE_MS
+
+# 롤업 테이블: 이름 → 버킷 크기(ms)
+ROLLUPS = {
+    "1m": MINUTE_MS,
+    "5m": 5 * MINUTE_MS,
+    "1h": 60 * MINUTE_MS,
+}
+
+# 해상도별 보존 기간(일, 0이면 무기한)
+ROLLUP_RETENTION_DAYS = {
+    "1m": float(os.getenv("ROLLUP_RETENTION_1M_DAYS", "2")),
+    "5m": float(os.getenv("ROLLUP_RETENTION_5M_DAYS", "30")),
+    "1h": float(os.getenv("ROLLUP_RETENTION_1H_DAYS", "0")),
+}
+
+# /metrics/range 에서 허용하는 응답 해상도
+RANGE_RESOLUTIONS = {
+    "1m": MINUTE_MS,
+    "5m": 5 * MINUTE_MS,
+    "15m": 15 * MINUTE_MS,
+    "1h": 60 * MINUTE_MS,
+    "6h": 6 * 60 * MINUTE_MS,
+    "1d": DAY_MS,
+}
+RANGE_MAX_POINTS = int(os.getenv("RANGE_MAX_POINTS", "1440"))
+
+
+def rollup_table(name: str) -> str:
+    return f"rollup_{name}"
+
+
+def create_rollup_tables(conn) -> None:
+    for name in ROLLUPS:
+        # 채널 없는 이벤트는 '' 로 저장(WITHOUT ROWID PK는 NULL 불가)
+        conn.exec_driver_sql(f"""
+        CREATE TABLE IF NOT EXISTS {rollup_table(name)}(
+          bucket_ms INTEGER NOT NULL,
+          channel TEXT NOT NULL,
+          attempts INTEGER NOT NULL,
+          failures INTEGER NOT NULL,
+          lat_sum REAL NOT NULL,
+          lat_cnt INTEGER NOT NULL,
+          PRIMARY KEY (bucket_ms, channel)
+        ) WITHOUT ROWID
+        """)
+
+
+def rebuild_rollups(conn, start_ms: int | None = None, end_ms: int | None = None,
+                    source: str = "login_events", levels: Iterable[str] | None = None) -> None:
+    """원시 이벤트에서 [start_ms, end_ms) 구간 롤업을 다시 계산(backfill/재계산용). levels로 해상도 제한"""
+    lo = start_ms if start_ms is not None else -(2 ** 62)
+    hi = end_ms if end_ms is not None else 2 ** 62
+    for name, step in ROLLUPS.items():
+        if levels is not None and name not in levels:
+            continue
+        # 구간 경계가 버킷 중간이면 해당 버킷 전체를 다시 계산
+        blo = (lo // step) * step
+        bhi = -(-hi // step) * step
+        conn.execute(text(f"DELETE FROM {rollup_table(name)} WHERE bucket_ms >= :lo AND bucket_ms < :hi"),
+                     {"lo": blo, "hi": bhi})
+        conn.execute(text(f"""
+            INSERT INTO {rollup_table(name)}
+                (bucket_ms, channel, attempts, failures, lat_sum, lat_cnt)
+            SELECT (ts_ms / {step}) * {step}, COALESCE(channel, ''),
+                   COUNT(*), SUM(result = 'FAIL'),
+                   COALESCE(SUM(latency_ms), 0), COUNT(latency_ms)
+              FROM {source}
+             WHERE ts_ms >= :lo AND ts_ms < :hi
+             GROUP BY 1, 2
+        """), {"lo": blo, "hi": bhi})
+
+
+def _upsert_sql(name: str):
+    return text(f"""
+        INSERT INTO {rollup_table(name)}
+            (bucket_ms, channel, attempts, failures, lat_sum, lat_cnt)
+        VALUES (:b, :ch, :a, :f, :ls, :lc)
+        ON CONFLICT(bucket_ms, channel) DO UPDATE SET
+            attempts = attempts + excluded.attempts,
+            failures = failures + excluded.failures,
+            lat_sum  = lat_sum  + excluded.lat_sum,
+            lat_cnt  = lat_cnt  + excluded.lat_cnt
+    """)
+
+
+def apply_rollups(conn, rows: List[Dict[str, Any]]) -> None:
+    """배치 rows를 (버킷, 채널)로 묶어 각 롤업에 upsert. writer 트랜잭션 안에서 호출된다."""
+    for name, step in ROLLUPS.items():
+        acc: Dict[tuple, list] = defaultdict(lambda: [0, 0, 0.0, 0])
+        for r in rows:
+            a = acc[((r["ts_ms"] // step) * step, r.get("channel") or "")]
+            a[0] += 1
+            a[1] += r.get("result") == "FAIL"
+            lat = r.get("latency_ms")
+            if lat is not None:
+                a[2] += lat
+                a[3] += 1
+        conn.execute(_upsert_sql(name),
+                     [dict(b=b, ch=ch, a=a, f=f, ls=ls, lc=lc) for (b, ch), (a, f, ls, lc) in acc.items()])
+
+
+def apply_rollup_arrays(conn, ts_ms, channel, failed, latency_ms) -> None:
+    """apply_rollups의 컬럼 배열판(대량 적재용). latency_ms의 NaN은 지연 없음으로 센다"""
+    lat = np.asarray(latency_ms, dtype=np.float64)
+    df = pd.DataFrame({
+        "ch": pd.Series(channel, dtype=object).fillna(""),
+        "f": np.asarray(failed, dtype=np.int64),
+        "ls": np.nan_to_num(lat),
+        "lc": (~np.isnan(lat)).astype(np.int64),
+    })
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    for name, step in ROLLUPS.items():
+        df["b"] = (ts_ms // step) * step
+        g = df.groupby(["b", "ch"], sort=False).agg(a=("f", "size"), f=("f", "sum"), ls=("ls", "sum"), lc=("lc", "sum"))
+        recs = g.reset_index()
+        conn.execute(_upsert_sql(name), [
+            dict(b=int(b), ch=ch, a=int(a), f=int(f), ls=float(ls), lc=int(lc))
+            for b, ch, a, f, ls, lc in recs.itertuples(index=False, name=None)
+        ])
+
+
+def compact_rollups(engine) -> Dict[str, int]:
+    """보존 기간이 지난 버킷 정리. 해상도별 삭제 건수를 반환"""
+    now = int(time.time() * 1000)
+    removed = {}
+    with engine.begin() as conn:
+        for name, days in ROLLUP_RETENTION_DAYS.items():
+            if days <= 0:
+                continue
+            cutoff = now - int(days * DAY_MS)
+            res = conn.execute(text(f"DELETE FROM {rollup_table(name)} WHERE bucket_ms < :cutoff"),
+                               {"cutoff": cutoff})
+            removed[name] = res.rowcount or 0
+    return removed
+
+
+def _pick_source(step: int, start_ms: int, now_ms: int) -> str | None:
+    """응답 해상도를 나누어떨어지게 만들면서 start까지 보존된 가장 거친 롤업"""
+    best = None
+    for name, size in ROLLUPS.items():
+        if step % size:
+            continue
+        days = ROLLUP_RETENTION_DAYS[name]
+        if days > 0 and start_ms < now_ms - int(days * DAY_MS):
+            continue
+        if best is None or size > ROLLUPS[best]:
+            best = name
+    return best
+
+
+def resolve_resolution(start_ms: int, end_ms: int, resolution: str | None, now_ms: int) -> tuple[str, str]:
+    """(응답 해상도, 원본 롤업) 결정. 지원하지 않는 해상도면 ValueError"""
+    if resolution and resolution != "auto":
+        if resolution not in RANGE_RESOLUTIONS:
+            raise ValueError(f"unsupported resolution: {resolution} (use one of {', '.join(RANGE_RESOLUTIONS)})")
+        candidates = [r for r in RANGE_RESOLUTIONS if RANGE_RESOLUTIONS[r] >= RANGE_RESOLUTIONS[resolution]]
+    else:
+        span = max(1, end_ms - start_ms)
+        candidates = [r for r, step in RANGE_RESOLUTIONS.items() if span / step <= RANGE_MAX_POINTS]
+        candidates = candidates or ["1d"]
+    # 보존 기간 때문에 요청 해상도를 만족할 수 없으면 다음 해상도로 올린다
+    for r in candidates:
+        source = _pick_source(RANGE_RESOLUTIONS[r], start_ms, now_ms)
+        if source:
+            return r, source
+    return "1d", "1h"
+
+
+def query_range(engine, start_ms: int, end_ms: int, resolution: str | None = None,
+                frames: bool = False) -> Dict[str, Any]:
+    """
+    [start_ms, end_ms) 구간 시계열/채널별 합계를 롤업에서 조회.
+    frames=True면 timeseries/byChannel을 DataFrame(ts는 epoch ms)으로 돌려준다(컬럼형 직렬화용).
+    """
+    now = int(time.time() * 1000)
+    res, source = resolve_resolution(start_ms, end_ms, resolution, now)
+    step = RANGE_RESOLUTIONS[res]
+    lo = (start_ms // step) * step
+    if (end_ms - lo) / step > RANGE_MAX_POINTS + 1:   # +1: 시작 버킷 정렬로 늘어난 한 칸
+        raise ValueError(f"too many points for resolution {res} (max {RANGE_MAX_POINTS})")
+    table = rollup_table(source)
+    params = {"lo": lo, "hi": end_ms}
+    with engine.begin() as conn:
+        series = conn.execute(text(f"""
+            SELECT (bucket_ms / {step}) * {step} AS b,
+                   SUM(attempts), SUM(failures), SUM(lat_sum), SUM(lat_cnt)
+              FROM {table}
+             WHERE bucket_ms >= :lo AND bucket_ms < :hi
+             GROUP BY b ORDER BY b
+        """), params).fetchall()
+        channels = conn.execute(text(f"""
+            SELECT channel, SUM(attempts), SUM(failures)
+              FROM {table}
+             WHERE bucket_ms >= :lo AND bucket_ms < :hi AND channel != ''
+             GROUP BY channel ORDER BY channel
+        """), params).fetchall()
+
+    # 빈 버킷은 0으로: 결과 행을 전체 버킷 축에 인덱스로 흩뿌린다
+    buckets = np.arange(lo, end_ms, step, dtype=np.int64)
+    attempts = np.zeros(len(buckets), dtype=np.int64)
+    failures = np.zeros(len(buckets), dtype=np.int64)
+    lat_sum = np.zeros(len(buckets), dtype=np.float64)
+    lat_cnt = np.zeros(len(buckets), dtype=np.int64)
+    if series:
+        b, a, f, ls, lc = (np.asarray(c) for c in zip(*series))
+        i = (b.astype(np.int64) - lo) // step
+        attempts[i], failures[i] = a.astype(np.int64), f.astype(np.int64)
+        lat_sum[i], lat_cnt[i] = ls.astype(np.float64), lc.astype(np.int64)
+    timeseries = pd.DataFrame({
+        "ts": buckets, "attempts": attempts, "failures": failures,
+        "failRate": np.divide(failures, attempts, out=np.zeros(len(buckets)), where=attempts > 0),
+        "latencyMs": np.divide(lat_sum, lat_cnt, out=np.zeros(len(buckets)), where=lat_cnt > 0),
+    })
+    ch_attempts = np.array([int(a) for _, a, _ in channels], dtype=np.int64)
+    ch_failures = np.array([int(f) for _, _, f in channels], dtype=np.int64)
+    byChannel = pd.DataFrame({
+        "channel": [ch for ch, _, _ in channels], "attempts": ch_attempts, "failures": ch_failures,
+        "failRate": np.divide(ch_failures, ch_attempts, out=np.zeros(len(channels)), where=ch_attempts > 0),
+    })
+    if not frames:
+        timeseries = timeseries.assign(ts=iso_from_ms(buckets)).to_dict("records")
+        byChannel = byChannel.to_dict("records")
+    return {
+        "start": _iso(lo), "end": _iso(end_ms),
+        "resolution": res, "source": rollup_table(source),
+        "timeseries": timeseries, "byChannel": byChannel,
+    }
+
+
+def _iso(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()
@@ -0,0 +1,114 @@
+# src/store/schema.py
+"""
+login_events 스키마 버전 관리.
+- 적용된 버전은 PRAGMA user_version 에 기록하고, 미적용 단계만 순서대로 실행한다.
+- 각 단계는 한 트랜잭션으로 실행되며 재실행해도 안전하도록 작성한다.
+"""
+from store.alerts import create_alerts_table
+from store.partitions import (
+    EVENT_COLUMNS, PARTITION_MS, create_partition_catalog, enable_incremental_vacuum, ensure_partition,
+    partition_bounds,
+)
+from store.rollup import create_rollup_tables, rebuild_rollups
+
+
+def _column_names(conn, table: str) -> set[str]:
+    return {r[1] for r in conn.exec_driver_sql(f"PRAGMA table_info({table})").fetchall()}
+
+
+def _v1_login_events(conn) -> None:
+    conn.exec_driver_sql("""
+    CREATE TABLE IF NOT EXISTS login_events(
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      ts TEXT NOT NULL,
+      channel TEXT,
+      user_hash TEXT,
+      ip TEXT,
+      ua TEXT,
+      fingerprint TEXT,
+      result TEXT,
+      fail_reason TEXT,
+      latency_ms INTEGER
+    );
+    """)
+
+
+def _v2_epoch_ms_index(conn) -> None:
+    # ISO 문자열 비교/풀스캔 대신 정수 시간 컬럼 + 시간 우선 커버링 인덱스
+    if "ts_ms" not in _column_names(conn, "login_events"):
+        conn.exec_driver_sql("ALTER TABLE login_events ADD COLUMN ts_ms INTEGER")
+    # 기존 행 backfill (julianday는 '+00:00' 오프셋/마이크로초 포함 ISO를 해석)
+    conn.exec_driver_sql("""
+    UPDATE login_events
+       SET ts_ms = CAST(round((julianday(ts) - 2440587.5) * 86400000.0) AS INTEGER)
+     WHERE ts_ms IS NULL
+    """)
+    conn.exec_driver_sql("""
+    CREATE INDEX IF NOT EXISTS idx_login_events_ts_ms
+        ON login_events(ts_ms, channel, result, latency_ms)
+    """)
+
+
+def _v3_rollups(conn) -> None:
+    # 1분/5분/1시간 롤업 테이블 생성 + 기존 이벤트로 backfill
+    create_rollup_tables(conn)
+    rebuild_rollups(conn)
+
+
+def _v4_alerts(conn) -> None:
+    # 백그라운드 평가기가 남기는 알림 이력
+    create_alerts_table(conn)
+
+
+def _v5_partitions(conn) -> None:
+    # 단일 login_events 테이블 → 시간 파티션 테이블(+ event_partitions 카탈로그)
+    create_partition_catalog(conn)
+    kind = conn.exec_driver_sql("SELECT type FROM sqlite_master WHERE name = 'login_events'").scalar()
+    if kind == "table":
+        conn.exec_driver_sql("DROP INDEX IF EXISTS idx_login_events_ts_ms")
+        conn.exec_driver_sql("ALTER TABLE login_events RENAME TO login_events_v4")
+        cols = ", ".join(EVENT_COLUMNS[1:])
+        starts = conn.exec_driver_sql(f"""
+            SELECT DISTINCT (ts_ms / {PARTITION_MS}) * {PARTITION_MS} FROM login_events_v4 WHERE ts_ms IS NOT NULL
+        """).fetchall()
+        for (start,) in starts:
+            name, lo, hi = partition_bounds(start)
+            ensure_partition(conn, name, lo, hi)
+            conn.exec_driver_sql(f"""
+                INSERT INTO {name} ({cols})
+                SELECT {cols} FROM login_events_v4 WHERE ts_ms >= {lo} AND ts_ms < {hi} ORDER BY id
+            """)
+        conn.exec_driver_sql("DROP TABLE login_events_v4")
+
+
+def _v6_drop_events_view(conn) -> None:
+    # v5의 전 파티션 UNION ALL 뷰 제거(파티션이 500개를 넘으면 뷰 갱신이 적재 트랜잭션을 깨뜨림).
+    # 원시 이벤트는 store.partitions.events_source()로 읽는다
+    conn.exec_driver_sql("DROP VIEW IF EXISTS login_events")
+
+
+MIGRATIONS = [
+    (1, _v1_login_events),
+    (2, _v2_epoch_ms_index),
+    (3, _v3_rollups),
+    (4, _v4_alerts),
+    (5, _v5_partitions),
+    (6, _v6_drop_events_view),
+]
+
+
+def migrate(engine) -> int:
+    """미적용 마이그레이션을 실행하고 최종 스키마 버전을 반환"""
+    with engine.begin() as conn:
+        current = conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+    for version, step in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+        print(f"[schema] migrated to v{version} ({step.__name__})", flush=True)
+        current = version
+    # 파티션 DROP으로 비워진 페이지를 파일에서 반환하려면 incremental auto_vacuum이 필요
+    enable_incremental_vacuum(engine)
+    return current
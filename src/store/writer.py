@@ -0,0 +1,198 @@
+# src/store/writer.py
+import asyncio
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from store.db import to_epoch_ms
+from store.partitions import insert_events
+from telemetry.metrics import REGISTRY, SIZE_BUCKETS, stage
+
+TX_SECONDS = REGISTRY.histogram("lcs_db_tx_seconds", "Event batch transaction time (insert + rollup hooks + commit)")
+COMMIT_SECONDS = REGISTRY.histogram("lcs_db_commit_seconds", "Event batch COMMIT time")
+HOOK_SECONDS = REGISTRY.histogram("lcs_db_hook_seconds", "Time spent in writer transaction hooks")
+LISTENER_SECONDS = REGISTRY.histogram("lcs_writer_listener_seconds", "Time spent in post-commit listeners")
+BATCH_ROWS = REGISTRY.histogram("lcs_writer_batch_rows", "Rows per committed batch", buckets=SIZE_BUCKETS)
+FAILED_ROWS = REGISTRY.counter("lcs_writer_failed_rows_total", "Rows dropped after a failed retry")
+
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    login_events 그룹 커밋 파이프라인.
+    - 핸들러는 submit()으로 큐에 넣기만 하고, 전용 스레드가 마이크로 배치로 모아
+      한 트랜잭션에서 시간 파티션별 executemany 로 기록한다.
+    - 배치는 batch_size 도달 또는 첫 이벤트 이후 max_wait_ms 경과 시 커밋.
+    - 큐가 가득 차면 submit()이 False를 반환(백프레셔), stop() 시 남은 이벤트를 모두 flush.
+    - add_tx_hook()으로 등록한 함수는 같은 트랜잭션 안에서(conn, rows)로 호출되고(롤업 등),
+      커밋된 배치는 add_listener()로 등록한 콜백(인메모리 집계 등)에 전달된다.
+    """
+
+    def __init__(self, engine, max_queue: int = 10000, batch_size: int = 500, max_wait_ms: int = 50):
+        self.engine = engine
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self._q: queue.Queue = queue.Queue(maxsize=max(1, max_queue))
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._tx_hooks: List[Callable[[Any, List[Dict[str, Any]]], None]] = []
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+        self._stats = dict(
+            enqueued=0, rejected=0, batches=0, rows_written=0, failed_rows=0,
+            last_batch_size=0, max_batch_size=0, last_commit_ms=0.0,
+        )
+
+    def add_tx_hook(self, fn: Callable[[Any, List[Dict[str, Any]]], None]) -> None:
+        """INSERT와 같은 트랜잭션에서 (conn, rows)를 받는 함수 등록. 실패하면 배치 전체가 롤백된다."""
+        self._tx_hooks.append(fn)
+
+    def add_listener(self, fn: Callable[[List[Dict[str, Any]]], None]) -> None:
+        """커밋 직후 배치 rows를 받는 콜백 등록"""
+        self._listeners.append(fn)
+
+    # ---- 생산자 측 ----
+    def submit(self, row: Dict[str, Any], timeout: float = 0.0) -> bool:
+        """이벤트 1건 적재. timeout 내 자리가 나지 않으면 False."""
+        try:
+            if timeout > 0:
+                self._q.put(row, block=True, timeout=timeout)
+            else:
+                self._q.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            return False
+        with self._lock:
+            self._stats["enqueued"] += 1
+        return True
+
+    async def asubmit(self, row: Dict[str, Any], timeout: float = 0.0) -> bool:
+        """이벤트 루프를 막지 않는 submit(). 큐가 찼을 때만 스레드에서 대기한다."""
+        if self.submit(row):
+            return True
+        if timeout <= 0:
+            return False
+        # 첫 시도에서 rejected로 집계된 것은 되돌림(최종 결과만 카운트)
+        with self._lock:
+            self._stats["rejected"] -= 1
+        return await asyncio.to_thread(self.submit, row, timeout)
+
+    # ---- 기록 ----
+    def write_batch(self, rows: List[Dict[str, Any]]) -> int:
+        """rows를 한 트랜잭션으로 기록하고 기록 건수를 반환."""
+        if not rows:
+            return 0
+        for r in rows:
+            if r.get("ts_ms") is None:
+                r["ts_ms"] = to_epoch_ms(r["ts"])
+        with stage("writer.batch"):
+            return self._write(rows)
+
+    def _write(self, rows: List[Dict[str, Any]]) -> int:
+        t0 = time.perf_counter()
+        with self.engine.connect() as conn:
+            with conn.begin():
+                insert_events(conn, rows)
+                t_hooks = time.perf_counter()
+                for hook in self._tx_hooks:
+                    hook(conn, rows)
+                t_commit = time.perf_counter()
+            t1 = time.perf_counter()            # with 블록을 나오며 COMMIT
+        elapsed_ms = (t1 - t0) * 1000.0
+        TX_SECONDS.observe(t1 - t0)
+        COMMIT_SECONDS.observe(t1 - t_commit)
+        HOOK_SECONDS.observe(t_commit - t_hooks)
+        BATCH_ROWS.observe(len(rows))
+        with self._lock:
+            s = self._stats
+            s["batches"] += 1
+            s["rows_written"] += len(rows)
+            s["last_batch_size"] = len(rows)
+            s["max_batch_size"] = max(s["max_batch_size"], len(rows))
+            s["last_commit_ms"] = round(elapsed_ms, 3)
+        t2 = time.perf_counter()
+        for fn in self._listeners:
+            try:
+                fn(rows)
+            except Exception as e:
+                print(f"[writer] listener error: {e}", flush=True)
+        LISTENER_SECONDS.observe(time.perf_counter() - t2)
+        return len(rows)
+
+    def _flush(self, rows: List[Dict[str, Any]]) -> None:
+        try:
+            self.write_batch(rows)
+        except Exception as e:
+            print(f"[writer] batch write error ({len(rows)} rows): {e}", flush=True)
+            # 일시적 잠금 등에 대비해 1회 재시도
+            time.sleep(0.2)
+            try:
+                self.write_batch(rows)
+            except Exception as e2:
+                print(f"[writer] batch dropped ({len(rows)} rows): {e2}", flush=True)
+                with self._lock:
+                    self._stats["failed_rows"] += len(rows)
+                FAILED_ROWS.inc(len(rows))
+
+    # ---- 소비자 스레드 ----
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._q.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    nxt = self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stopping = True
+                    break
+                batch.append(nxt)
+            self._flush(batch)
+
+        # 종료 시 남은 이벤트 flush
+        rest = []
+        while True:
+            try:
+                item = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                rest.append(item)
+        for i in range(0, len(rest), self.batch_size):
+            self._flush(rest[i:i + self.batch_size])
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="batch-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        if not self._thread:
+            return
+        # 큐가 가득 차 있어도 종료 신호는 반드시 전달
+        while self._thread.is_alive():
+            try:
+                self._q.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+        s["queue_depth"] = self._q.qsize()
+        s["queue_capacity"] = self._q.maxsize
+        s["avg_batch_size"] = round(s["rows_written"] / s["batches"], 2) if s["batches"] else 0.0
+        s["running"] = bool(self._thread and self._thread.is_alive())
+        return s
@@ -0,0 +1,232 @@
+# src/telemetry/metrics.py
+"""
+프로세스 내부 계측(카운터/히스토그램/게이지) + Prometheus 텍스트 포맷 출력.
+- 제품 지표(/metrics)와 섞이지 않게 GET /internal/metrics 로만 노출한다.
+- 핫패스 비용은 관측 1회당 bisect + 정수 증가 몇 번(락 1회). 라벨 자식은 처음 한 번만 만든다.
+- 게이지는 스크레이프 시점에 콜백을 호출한다(큐 깊이 등은 핫패스에서 갱신하지 않음).
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from telemetry.profiler import profiler
+
+# 초 단위 지연 버킷(0.5ms ~ 30s)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 5, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _fmt(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values, **kv):
+        """라벨값(위치 인자, 문자열)으로 자식을 찾는다. 핫패스에서는 자식을 미리 잡아 두고 쓴다"""
+        child = self._children.get(values) if not kv else None
+        if child is None:
+            key = tuple(str(v) for v in values) if values else tuple(str(kv[n]) for n in self.labelnames)
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1.0) -> None:
+        with self._lock:
+            self.value += n
+
+
+class Counter(_Metric):
+    """이름은 *_total 로 짓는다(텍스트 포맷 0.0.4에서는 샘플 이름 = 패밀리 이름)"""
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, n: float = 1.0) -> None:
+        self.labels().inc(n)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_fmt(c.value)}"
+                for key, c in list(self._children.items())]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)      # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, v: float) -> None:
+        i = bisect.bisect_left(self.bounds, v)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += v
+
+    @contextmanager
+    def time(self):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, v: float) -> None:
+        self.labels().observe(v)
+
+    def time(self):
+        return self.labels().time()
+
+    def _samples(self) -> List[str]:
+        out = []
+        for key, c in list(self._children.items()):
+            with c._lock:
+                counts, total = list(c.counts), c.sum
+            acc = 0
+            for bound, n in zip(self.bounds + (math.inf,), counts):
+                acc += n
+                le = 'le="%s"' % _fmt(bound)
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {acc}")
+            lbl = _labels(self.labelnames, key)
+            out.append(f"{self.name}_sum{lbl} {_fmt(total)}")
+            out.append(f"{self.name}_count{lbl} {acc}")
+        return out
+
+
+class Gauge(_Metric):
+    """
+    스크레이프 때 fn()을 호출. 라벨이 있으면 fn은 {라벨값 튜플: 값}을 반환.
+    기존 stats()의 누적값을 그대로 내보낼 때는 kind="counter".
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], object], labelnames: Iterable[str] = (),
+                 kind: str = "gauge"):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+        self.kind = kind
+
+    def _samples(self) -> List[str]:
+        try:
+            v = self.fn()
+        except Exception:
+            return []
+        items = v.items() if self.labelnames else [((), v)]
+        return [f"{self.name}{_labels(self.labelnames, tuple(str(x) for x in key))} {_fmt(val)}"
+                for key, val in items if val is not None]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # 모듈 재로딩 등으로 같은 이름을 다시 등록하면 기존 것을 돌려준다(게이지는 콜백 교체)
+            old = self._metrics.get(metric.name)
+            if old is not None and type(old) is type(metric):
+                if isinstance(old, Gauge):
+                    old.fn = metric.fn
+                return old
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, fn: Callable[[], object], labelnames: Iterable[str] = (),
+              kind: str = "gauge") -> Gauge:
+        return self.register(Gauge(name, help, fn, labelnames, kind))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for m in metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# 단계별 소요 시간(compute_metrics 읽기/집계/점수 등)
+STAGE_SECONDS = REGISTRY.histogram("lcs_stage_seconds", "Duration of instrumented code stages", ("stage",))
+
+
+@contextmanager
+def stage(name: str):
+    """단계 시간 측정. 프로파일러가 켜져 있으면 이 스레드 샘플에 단계 이름을 붙인다"""
+    child = STAGE_SECONDS.labels(name)
+    prev = profiler.enter(name) if profiler.running else None
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        child.observe(time.perf_counter() - t0)
+        if prev is not None:
+            profiler.leave(prev)
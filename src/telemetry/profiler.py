@@ -0,0 +1,136 @@
+# src/telemetry/profiler.py
+"""
+옵트인 샘플링 프로파일러.
+- 켜져 있는 동안 전용 스레드가 interval_ms마다 sys._current_frames()로 스택을 찍는다.
+- metrics.stage() 안에 있는 스레드만 샘플링하고, 스택 맨 앞에 단계 이름을 붙여 단계별로 모은다.
+- dump()는 folded stack 텍스트("stage;frame;frame count") — flamegraph.pl / speedscope에 그대로 넣는다.
+꺼져 있을 때 비용은 stage() 진입 시 bool 확인 하나뿐이다.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0") == "1"           # 기동 시 바로 켜기
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_STACKS = int(os.getenv("PROFILE_MAX_STACKS", "20000"))   # 서로 다른 스택 수 상한
+PROFILE_MAX_DEPTH = 64
+
+
+def _frame_label(f) -> str:
+    code = f.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS, max_stacks: int = PROFILE_MAX_STACKS):
+        self.interval = max(0.001, interval_ms / 1000.0)
+        self.max_stacks = max_stacks
+        self.running = False
+        self._active: Dict[int, str] = {}       # thread ident → 현재 단계
+        self._stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._stats = dict(samples=0, dropped=0, started_at=None, elapsed_sec=0.0)
+
+    # ---- 단계 표시(metrics.stage에서 호출) ----
+    def enter(self, stage: str) -> str:
+        """현재 스레드 단계를 stage로 바꾸고 이전 단계("" = 없음)를 돌려준다"""
+        ident = threading.get_ident()
+        prev = self._active.get(ident, "")
+        self._active[ident] = stage
+        return prev
+
+    def leave(self, prev: str) -> None:
+        if not self.running:        # 단계 도중 꺼졌으면 stop()이 이미 비웠다
+            return
+        ident = threading.get_ident()
+        if prev:
+            self._active[ident] = prev
+        else:
+            self._active.pop(ident, None)
+
+    # ---- 샘플링 ----
+    def _sample(self) -> None:
+        frames = sys._current_frames()
+        me = threading.get_ident()
+        for ident, stage in list(self._active.items()):
+            f = frames.get(ident)
+            if f is None or ident == me:
+                continue
+            names = []
+            while f is not None and len(names) < PROFILE_MAX_DEPTH:
+                names.append(_frame_label(f))
+                f = f.f_back
+            key = stage + ";" + ";".join(reversed(names))
+            with self._lock:
+                if key in self._stacks or len(self._stacks) < self.max_stacks:
+                    self._stacks[key] += 1
+                    self._stats["samples"] += 1
+                else:
+                    self._stats["dropped"] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception as e:
+                print(f"[profiler] sample error: {e}", flush=True)
+
+    def start(self, interval_ms: float | None = None) -> None:
+        with self._lock:
+            if self.running:
+                return
+            if interval_ms:
+                self.interval = max(0.001, interval_ms / 1000.0)
+            self._stop.clear()
+            self._stats["started_at"] = time.time()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            self.running = True
+
+    def stop(self) -> None:
+        with self._lock:
+            if not self.running:
+                return
+            self.running = False
+            self._stop.set()
+            self._stats["elapsed_sec"] += time.time() - (self._stats["started_at"] or time.time())
+            self._stats["started_at"] = None
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self._active.clear()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self._stats.update(samples=0, dropped=0, elapsed_sec=0.0)
+            if self.running:
+                self._stats["started_at"] = time.time()
+
+    def dump(self, stage: str | None = None) -> str:
+        """folded stacks. stage를 주면 그 단계(및 하위 단계 이름 접두사)만"""
+        with self._lock:
+            items = sorted(self._stacks.items())
+        if stage:
+            items = [(k, n) for k, n in items if k.split(";", 1)[0].startswith(stage)]
+        return "".join(f"{k} {n}\n" for k, n in items)
+
+    def info(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            by_stage: Counter = Counter()
+            for k, n in self._stacks.items():
+                by_stage[k.split(";", 1)[0]] += n
+        if s["started_at"]:
+            s["elapsed_sec"] += time.time() - s["started_at"]
+        s["elapsed_sec"] = round(s["elapsed_sec"], 1)
+        return dict(running=self.running, interval_ms=self.interval * 1000, stacks=len(self._stacks),
+                    by_stage=dict(by_stage), **s)
+
+
+profiler = SamplingProfiler()
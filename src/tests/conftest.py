@@ -0,0 +1,39 @@
+# src/tests/conftest.py
+"""
+pytest 공용 fixture.  실행: cd src && python -m pytest -q tests
+DB는 모두 tmp_path의 새 SQLite 파일(src/data는 건드리지 않는다).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC))
+
+from store.db import make_engine  # noqa: E402
+from store.schema import migrate  # noqa: E402
+
+MINUTE_MS = 60_000
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """최신 스키마로 마이그레이션한 빈 DB"""
+    eng = make_engine(tmp_path / "events.sqlite")
+    migrate(eng)
+    yield eng
+    eng.dispose()
+
+
+def event_row(ts_ms: int, result: str = "SUCCESS", channel: str = "WEB", **kw) -> dict:
+    """BatchWriter/MinuteAggregator 입력 모양의 이벤트 1건"""
+    from datetime import datetime, timezone
+    row = dict(
+        ts=datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).isoformat(), ts_ms=ts_ms,
+        channel=channel, user_hash="u1", ip="10.0.0.1", ua="pytest", fingerprint="fp1",
+        result=result, fail_reason="NONE" if result == "SUCCESS" else "INVALID_PW",
+        latency_ms=80 if result == "SUCCESS" else 120,
+    )
+    row.update(kw)
+    return row
@@ -0,0 +1,71 @@
+# src/tests/test_aggregate.py
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import MINUTE_MS, event_row
+from ml import aggregate
+from ml.aggregate import MinuteAggregator
+
+T0 = 1_700_000_040_000 // MINUTE_MS * MINUTE_MS
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """add()가 보는 현재 시각을 고정"""
+    now = [T0]
+    monkeypatch.setattr(aggregate, "time", SimpleNamespace(time=lambda: now[0] / 1000))
+    return now
+
+
+def _attempts(agg, minute):
+    d = agg.minute_detail(minute)
+    return None if d is None else d["attempts"]
+
+
+def test_counts_per_minute_and_channel(clock):
+    agg = MinuteAggregator(minutes=3)
+    clock[0] = T0 + 30_000
+    agg.add([event_row(T0 + 1), event_row(T0 + 2, result="FAIL", channel="MYKT"), event_row(T0 - MINUTE_MS)])
+    d = agg.minute_detail(T0)
+    assert (d["attempts"], d["failures"]) == (2, 1)
+    assert d["channels"] == {"WEB": [1, 0], "MYKT": [1, 1]}
+    assert _attempts(agg, T0 - MINUTE_MS) == 1
+    assert agg.version == 1
+
+
+def test_slot_reuse_replaces_expired_minute(clock):
+    agg = MinuteAggregator(minutes=3)             # 링 5칸: T0와 T0+5분은 같은 슬롯
+    agg.add([event_row(T0)])
+    clock[0] = T0 + 5 * MINUTE_MS
+    agg.add([event_row(T0 + 5 * MINUTE_MS)])
+    assert _attempts(agg, T0) is None
+    assert _attempts(agg, T0 + 5 * MINUTE_MS) == 1
+
+
+def test_drops_rows_older_than_ring(clock):
+    agg = MinuteAggregator(minutes=3)
+    clock[0] = T0 + 5 * MINUTE_MS
+    agg.add([event_row(T0 + 5 * MINUTE_MS)])
+    agg.add([event_row(T0), event_row(T0 + MINUTE_MS - 1)])   # 링(현재 분 - 4분)보다 오래됨
+    assert _attempts(agg, T0 + 5 * MINUTE_MS) == 1
+    assert _attempts(agg, T0) is None
+    agg.add([event_row(T0 + MINUTE_MS)])                      # 가장 오래된 칸은 받는다
+    assert _attempts(agg, T0 + MINUTE_MS) == 1
+
+
+def test_future_rows_do_not_overwrite_window(clock):
+    agg = MinuteAggregator(minutes=3)
+    agg.add([event_row(T0), event_row(T0)])
+    agg.add([event_row(T0 + 5 * MINUTE_MS), event_row(T0 + MINUTE_MS)])   # 같은 슬롯의 미래 분 / 다음 분
+    assert _attempts(agg, T0) == 2
+    assert _attempts(agg, T0 + 5 * MINUTE_MS) is None
+    assert _attempts(agg, T0 + MINUTE_MS) is None
+
+
+def test_buckets_returns_window_in_time_order(clock):
+    agg = MinuteAggregator(minutes=3)
+    clock[0] = T0 + 4 * MINUTE_MS
+    agg.add([event_row(T0 + m * MINUTE_MS) for m in (4, 0, 2, 3)])
+    minutes = [b.minute for b in agg.buckets(now_ms=clock[0])]
+    assert minutes == [T0 + m * MINUTE_MS for m in (2, 3, 4)]    # 창(3분) 밖의 T0는 빠진다
@@ -0,0 +1,61 @@
+# src/tests/test_metrics_http.py
+"""GET /metrics 캐시/조건부 응답. 앱은 ASGI로 직접 호출(기동 훅·스케줄러는 돌리지 않는다)"""
+import asyncio
+import importlib
+import time
+
+import httpx
+import pytest
+
+from conftest import event_row
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    mp = pytest.MonkeyPatch()
+    mp.setenv("DB_DIR", str(tmp_path_factory.mktemp("server")))
+    mp.delenv("DB_PATH", raising=False)
+    mp.delenv("LCS_ROLE", raising=False)
+    try:
+        yield importlib.import_module("api.server")
+    finally:
+        mp.undo()
+
+
+def _get(app, path, **headers):
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+            return await c.get(path, headers=headers)
+    return asyncio.run(go())
+
+
+def test_etag_and_not_modified(server):
+    r1 = _get(server.app, "/metrics")
+    assert r1.status_code == 200
+    etag = r1.headers["etag"]
+    assert r1.headers.get("last-modified")
+
+    r2 = _get(server.app, "/metrics", **{"If-None-Match": etag})
+    assert r2.status_code == 304
+    assert r2.content == b""
+    assert r2.headers["etag"] == etag
+
+    assert _get(server.app, "/metrics", **{"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_new_events_change_etag(server):
+    etag = _get(server.app, "/metrics").headers["etag"]
+    server.aggregator.add([event_row(int(time.time() * 1000))])     # 열린 분에 새 이벤트
+
+    r = _get(server.app, "/metrics", **{"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert r.json()["timeseries"]
+
+
+def test_etag_is_per_format(server):
+    j = _get(server.app, "/metrics?format=json")
+    c = _get(server.app, "/metrics?format=columns")
+    assert j.status_code == c.status_code == 200
+    assert j.headers["etag"] != c.headers["etag"]
+    assert _get(server.app, "/metrics?format=columns", **{"If-None-Match": j.headers["etag"]}).status_code == 200
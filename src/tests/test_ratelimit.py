@@ -0,0 +1,79 @@
+# src/tests/test_ratelimit.py
+from api.ratelimit import LoginGuard, SlidingWindowLimiter
+
+W = 60.0
+T = 6_000.0          # 창 경계(W의 배수)
+
+
+def test_limit_within_window():
+    lim = SlidingWindowLimiter(3, W)
+    assert [lim.hit("k", T + i) for i in range(3)] == [0, 0, 0]
+    retry = lim.hit("k", T + 3)
+    assert retry > 0
+    assert lim.count("k", T + 3) == 3               # 거절된 시도는 세지 않는다
+
+
+def test_previous_window_slides_out():
+    lim = SlidingWindowLimiter(4, W)
+    for i in range(4):
+        lim.hit("k", T + i)
+    # 다음 창 1/4 지점: 직전 창 4회 × 3/4 = 3 → 1회 더 허용
+    assert lim.count("k", T + W + W / 4) == 3
+    assert lim.hit("k", T + W + W / 4) == 0
+    assert lim.hit("k", T + W + W / 4) > 0
+    # 두 창 넘게 지나면 깨끗이 비워진다
+    assert lim.count("k", T + 3 * W) == 0
+    assert lim.retry_after("k", T + 3 * W) == 0
+
+
+def test_retry_after_is_when_estimate_drops_below_limit():
+    lim = SlidingWindowLimiter(2, W)
+    lim.hit("k", T)
+    lim.hit("k", T + 1)
+    retry = lim.hit("k", T + 10)
+    assert lim.retry_after("k", T + 10) == retry
+    assert lim.hit("k", T + 10 + retry) == 0
+
+
+def test_lru_evicts_idle_keys():
+    lim = SlidingWindowLimiter(1, W, max_keys=2)
+    for k in ("a", "b", "c"):
+        lim.hit(k, T)
+    assert len(lim) == 2 and lim.evictions == 1
+    assert lim.count("a", T) == 0
+
+
+def test_blocked_dimension_does_not_count_in_others():
+    g = LoginGuard(limits={"ip": 10, "user_hash": 1}, window_sec=60)
+    keys = dict(ip="1.1.1.1", user_hash="u")
+    assert g.check(keys, T) == (None, 0)
+    blocked, retry = g.check(keys, T + 1)
+    assert blocked == "RATE_LIMITED" and retry > 0
+    assert g.limiters["ip"].count("1.1.1.1", T + 1) == 1
+
+
+def test_unkeyed_values_are_not_limited():
+    g = LoginGuard(limits={"fingerprint": 1, "user_hash": 1}, window_sec=60)
+    for i in range(5):
+        assert g.check(dict(fingerprint="anon", user_hash=None), T + i) == (None, 0)
+    assert len(g.limiters["fingerprint"]) == 0
+
+
+def test_lockout_after_failures_and_expiry():
+    g = LoginGuard(limits={"user_hash": 100}, window_sec=60, lockout_failures=3, lockout_sec=300)
+    for i in range(3):
+        g.record("u", False, T + i)
+    blocked, retry = g.check(dict(user_hash="u"), T + 10)
+    assert (blocked, retry) == ("LOCKED", 292)
+    assert g.check(dict(user_hash="other"), T + 10) == (None, 0)
+    assert g.check(dict(user_hash="u"), T + 2 + 300) == (None, 0)     # 잠금 해제
+    assert g.info()["locked_users"] == 0
+
+
+def test_success_resets_failure_streak():
+    g = LoginGuard(limits={"user_hash": 100}, window_sec=60, lockout_failures=3)
+    g.record("u", False, T)
+    g.record("u", False, T + 1)
+    g.record("u", True, T + 2)
+    g.record("u", False, T + 3)
+    assert g.check(dict(user_hash="u"), T + 4) == (None, 0)
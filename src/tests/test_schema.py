@@ -0,0 +1,55 @@
+# src/tests/test_schema.py
+import shutil
+import sqlite3
+
+from sqlalchemy import text
+
+from conftest import SRC
+from store.db import make_engine
+from store.partitions import PARTITION_PREFIX, events_source
+from store.schema import MIGRATIONS, migrate
+
+BASELINE_DB = SRC / "data" / "events.sqlite"
+
+
+def _baseline_copy(tmp_path):
+    dst = tmp_path / "baseline.sqlite"
+    shutil.copyfile(BASELINE_DB, dst)
+    with sqlite3.connect(dst) as c:
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        count = c.execute("SELECT COUNT(*) FROM login_events").fetchone()[0]
+    return dst, version, count
+
+
+def test_migrates_shipped_baseline_db(tmp_path):
+    path, version, count = _baseline_copy(tmp_path)
+    assert version == 0 and count > 0
+
+    eng = make_engine(path)
+    try:
+        assert migrate(eng) == MIGRATIONS[-1][0]
+        with eng.begin() as conn:
+            objects = dict(conn.execute(text("SELECT name, type FROM sqlite_master")).fetchall())
+            parts = [n for n in objects if n.startswith(PARTITION_PREFIX)]
+            moved = conn.execute(text(f"SELECT COUNT(*) FROM {events_source(conn, 0)}")).scalar()
+            catalog = conn.execute(text("SELECT COUNT(*) FROM event_partitions")).scalar()
+            rollup_attempts = conn.execute(text("SELECT SUM(attempts) FROM rollup_1h")).scalar()
+        assert "login_events" not in objects            # v5에서 파티션으로 옮기고 v6에서 뷰도 제거
+        assert "login_events_v4" not in objects
+        assert parts and catalog == len(parts)
+        assert moved == count                           # 행 손실/중복 없음
+        assert rollup_attempts == count
+    finally:
+        eng.dispose()
+
+
+def test_migrate_is_idempotent(tmp_path):
+    path, _, count = _baseline_copy(tmp_path)
+    eng = make_engine(path)
+    try:
+        first = migrate(eng)
+        assert migrate(eng) == first
+        with eng.begin() as conn:
+            assert conn.execute(text(f"SELECT COUNT(*) FROM {events_source(conn, 0)}")).scalar() == count
+    finally:
+        eng.dispose()
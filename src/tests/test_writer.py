@@ -0,0 +1,77 @@
+# src/tests/test_writer.py
+import time
+
+import pytest
+from sqlalchemy import text
+
+from conftest import MINUTE_MS, event_row
+from store.partitions import events_source
+from store.writer import BatchWriter
+
+
+def _count(engine) -> int:
+    with engine.begin() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {events_source(conn, 0)}")).scalar()
+
+
+def test_accepts_and_flushes_on_stop(engine):
+    w = BatchWriter(engine, batch_size=2, max_wait_ms=10)
+    seen = []
+    w.add_listener(seen.extend)
+    w.start()
+    now = int(time.time() * 1000)
+    assert all(w.submit(event_row(now + i)) for i in range(5))
+    w.stop()
+
+    assert _count(engine) == 5
+    assert len(seen) == 5
+    s = w.stats()
+    assert s["enqueued"] == 5 and s["rows_written"] == 5 and s["rejected"] == 0
+    assert s["max_batch_size"] <= 2 and not s["running"]
+
+
+def test_rejects_when_queue_full(engine):
+    w = BatchWriter(engine, max_queue=2)          # 소비자를 띄우지 않아 큐가 비지 않는다
+    now = int(time.time() * 1000)
+    assert w.submit(event_row(now))
+    assert w.submit(event_row(now))
+    assert not w.submit(event_row(now))
+    assert not w.submit(event_row(now), timeout=0.01)
+    s = w.stats()
+    assert s["enqueued"] == 2 and s["rejected"] == 2 and s["queue_depth"] == 2
+
+
+def test_failed_hook_rolls_back_whole_batch(engine):
+    w = BatchWriter(engine)
+    fail = [True]
+
+    def hook(conn, rows):
+        if fail[0]:
+            raise RuntimeError("hook failed")
+
+    seen = []
+    w.add_tx_hook(hook)
+    w.add_listener(seen.extend)
+    # 새 파티션 두 개에 걸친 배치: 파티션 생성까지 함께 롤백돼야 한다
+    base = int(time.time() * 1000) // MINUTE_MS * MINUTE_MS
+    rows = [event_row(base), event_row(base - 2 * 24 * 60 * MINUTE_MS)]
+    with pytest.raises(RuntimeError):
+        w.write_batch(rows)
+    assert _count(engine) == 0
+    assert seen == []
+    with engine.begin() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM event_partitions")).scalar() == 0
+
+    fail[0] = False
+    assert w.write_batch(rows) == 2
+    assert _count(engine) == 2
+    assert len(seen) == 2
+
+
+def test_flush_drops_batch_after_retry(engine, monkeypatch):
+    w = BatchWriter(engine)
+    w.add_tx_hook(lambda conn, rows: 1 / 0)
+    monkeypatch.setattr("store.writer.time.sleep", lambda s: None)
+    w._flush([event_row(int(time.time() * 1000))])
+    assert w.stats()["failed_rows"] == 1
+    assert _count(engine) == 0
@@ -0,0 +1,394 @@
+# src/tools/backfill.py
+"""
+대량 합성 이벤트 적재 / 기존 DB 재생.
+
+    # 최근 7일, 평균 분당 2,000건(≈2천만 행)을 DB에 직접 적재
+    python tools/backfill.py generate --db /tmp/big.sqlite --days 7 --per-minute 2000
+
+    # 기존 DB의 이벤트를 60배속으로 /events/batch 에 다시 흘려 넣기(현재 시각으로 재타임스탬프)
+    python tools/backfill.py replay --source data/events.sqlite --base http://127.0.0.1:8000 --speed 60
+
+generate
+- 분별 도착 수는 일중 주기(diurnal) × 포아송, 분 안의 시각은 균등. 채널/IP/fingerprint/사용자는
+  Zipf 가중 풀에서 뽑고, 실패 버스트(소수 공격 IP, 높은 실패율)와 지연 꼬리 구간을 섞는다. 전부 NumPy 벡터 연산.
+- writer 경로(행 단위 롤업 upsert)를 우회해 파티션 테이블에 큰 트랜잭션으로 executemany 하고,
+  같은 트랜잭션에서 롤업을 배열 groupby로 upsert. 새 파티션 인덱스는 적재 후 한 번에 만든다.
+- --incidents-out 이면 주입한 공격 버스트/지연 구간을 라벨 JSON으로 남긴다(tools/backtest.py 정답 데이터).
+- 서버의 보존 작업은 RAW_RETENTION_DAYS보다 오래된 파티션을 지우므로 긴 기간을 적재할 때는 함께 늘린다.
+
+replay
+- 원본 login_events를 시간순 청크로 읽어 원래 간격을 speed배 압축한 일정대로 POST /events/batch.
+  --keep-ts 면 원래 시각을 유지(과거 구간 재적재), 아니면 재생 시작 시각 기준으로 다시 찍는다.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))   # src/
+
+from store.db import iso_from_ms, make_engine  # noqa: E402
+from store.partitions import INSERT_COLUMNS, PARTITION_MS, ensure_partition, partition_bounds  # noqa: E402
+from store.rollup import apply_rollup_arrays  # noqa: E402
+from store.schema import migrate  # noqa: E402
+
+MINUTE_MS = 60_000
+CHANNELS = np.array(["WEB", "MYKT", "MEMBERSHIP"])
+CHANNEL_P = np.array([0.55, 0.3, 0.15])
+FAIL_REASONS = np.array(["INVALID_PW", "LOCKED", "OTP_FAIL"])
+FAIL_REASON_P = np.array([0.8, 0.08, 0.12])
+UAS = np.array([
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/124.0",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14) Chrome/124.0 Mobile",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) Safari/605.1.15",
+    "KTApp/5.2 (Android)",
+    "KTApp/5.2 (iOS)",
+])
+UA_P = np.array([0.3, 0.2, 0.2, 0.1, 0.12, 0.08])
+
+
+# ===== 생성 =====
+def _zipf_weights(n: int, s: float) -> np.ndarray:
+    w = 1.0 / np.arange(1, n + 1) ** s
+    return w / w.sum()
+
+
+def _pool(prefix: str, n: int) -> np.ndarray:
+    return np.array([f"{prefix}{i}" for i in range(n)], dtype=object)
+
+
+def _user_pool(n: int) -> np.ndarray:
+    return np.array([hashlib.sha256(f"user{i}@example.com".encode()).hexdigest() for i in range(n)], dtype=object)
+
+
+def _ip_pool(n: int, rng: np.random.Generator) -> np.ndarray:
+    octets = rng.integers(1, 255, size=(n, 3))
+    return np.array([f"10.{a}.{b}.{c}" for a, b, c in octets], dtype=object)
+
+
+class Generator:
+    """분 단위 도착률 → 행 배열 묶음. 같은 seed면 같은 데이터"""
+
+    def __init__(self, seed: int = 1, users: int = 200_000, ips: int = 100_000, fingerprints: int = 50_000,
+                 fail_rate: float = 0.12, bursts_per_day: float = 6.0, burst_minutes: int = 8,
+                 burst_fail_rate: float = 0.95, slow_per_day: float = 3.0):
+        self.rng = np.random.default_rng(seed)
+        self.users = _user_pool(users)
+        self.ips = _ip_pool(ips, self.rng)
+        self.fps = _pool("fp-", fingerprints)
+        self.attack_ips = np.array([f"203.0.113.{i}" for i in range(1, 9)], dtype=object)
+        self.attack_fps = _pool("bot-", 8)
+        self.user_p = _zipf_weights(users, 1.05)
+        self.ip_p = _zipf_weights(ips, 1.0)
+        self.fp_p = _zipf_weights(fingerprints, 1.0)
+        self.fail_rate = fail_rate
+        self.bursts_per_day = bursts_per_day
+        self.burst_minutes = burst_minutes
+        self.burst_fail_rate = burst_fail_rate
+        self.slow_per_day = slow_per_day
+        self.incidents: list = []       # 주입한 이상 구간 [(start_ms, end_ms, kind)] — 백테스트 정답 라벨
+
+    def minute_counts(self, start_ms: int, minutes: int, per_minute: float) -> np.ndarray:
+        """일중 주기(새벽 저점, 저녁 고점) × 포아송"""
+        t = (start_ms // MINUTE_MS + np.arange(minutes)) % 1440       # UTC 분
+        kst_hour = ((t / 60.0) + 9) % 24                               # 한국 시간 기준 패턴
+        shape = 1.0 + 0.6 * np.sin((kst_hour - 9) / 24 * 2 * np.pi)
+        return self.rng.poisson(per_minute * shape / shape.mean())
+
+    def _windows(self, minutes: int, per_day: float, length: int) -> np.ndarray:
+        """구간 안 무작위 이상 구간(분 인덱스) 마스크"""
+        mask = np.zeros(minutes, dtype=bool)
+        n = self.rng.poisson(per_day * minutes / 1440)
+        for s in self.rng.integers(0, max(1, minutes - length), size=n):
+            mask[s:s + length] = True
+        return mask
+
+    def _record(self, start_ms: int, mask: np.ndarray, kind: str) -> None:
+        edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+        for a, b in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+            self.incidents.append((start_ms + int(a) * MINUTE_MS, start_ms + int(b) * MINUTE_MS, kind))
+
+    def generate(self, start_ms: int, minutes: int, per_minute: float) -> dict:
+        rng = self.rng
+        counts = self.minute_counts(start_ms, minutes, per_minute)
+        burst = self._windows(minutes, self.bursts_per_day, self.burst_minutes)
+        slow = self._windows(minutes, self.slow_per_day, 5)
+        self._record(start_ms, burst, "attack")
+        self._record(start_ms, slow, "slow")
+        # 버스트 분에는 공격 트래픽을 얹는다(평시 대비 +150%)
+        extra = np.where(burst, rng.poisson(counts * 1.5), 0)
+        n_norm, n_att = int(counts.sum()), int(extra.sum())
+        n = n_norm + n_att
+
+        minute_idx = np.concatenate([np.repeat(np.arange(minutes), counts), np.repeat(np.arange(minutes), extra)])
+        ts_ms = start_ms + minute_idx.astype(np.int64) * MINUTE_MS + rng.integers(0, MINUTE_MS, size=n)
+        attack = np.zeros(n, dtype=bool)
+        attack[n_norm:] = True
+
+        channel = CHANNELS[rng.choice(len(CHANNELS), size=n, p=CHANNEL_P)]
+        channel[attack] = "WEB"
+        user = self.users[rng.choice(len(self.users), size=n, p=self.user_p)]
+        # 공격은 계정을 고르게 훑는다(크리덴셜 스터핑)
+        user[attack] = self.users[rng.integers(0, len(self.users), size=n_att)]
+        ip = self.ips[rng.choice(len(self.ips), size=n, p=self.ip_p)]
+        ip[attack] = self.attack_ips[rng.integers(0, len(self.attack_ips), size=n_att)]
+        fp = self.fps[rng.choice(len(self.fps), size=n, p=self.fp_p)]
+        fp[attack] = self.attack_fps[rng.integers(0, len(self.attack_fps), size=n_att)]
+        ua = UAS[rng.choice(len(UAS), size=n, p=UA_P)]
+
+        # 공격은 거의 다 실패, 버스트 중 정상 트래픽도 실패율 2배(잠금/지연 여파)
+        p_fail = np.where(attack, self.burst_fail_rate, self.fail_rate)
+        p_fail = np.where(burst[minute_idx] & ~attack, min(1.0, self.fail_rate * 2), p_fail)
+        fail = rng.random(n) < p_fail
+        result = np.where(fail, "FAIL", "SUCCESS")
+        reason = np.where(fail, FAIL_REASONS[rng.choice(len(FAIL_REASONS), size=n, p=FAIL_REASON_P)], "NONE")
+
+        # 지연: 로그정규(성공 중앙값 ~85ms, 실패 ~130ms), 느린 구간은 4배 + 두꺼운 꼬리
+        median = np.where(fail, 130.0, 85.0)
+        latency = median * rng.lognormal(0.0, 0.35, size=n)
+        latency = np.where(slow[minute_idx], latency * 4 * rng.pareto(3.0, size=n).clip(0, 10) + latency, latency)
+
+        order = np.argsort(ts_ms, kind="stable")
+        ts_ms = ts_ms[order]
+        return dict(
+            ts=iso_from_ms(ts_ms), ts_ms=ts_ms, channel=channel[order], user_hash=user[order], ip=ip[order],
+            ua=ua[order], fingerprint=fp[order], result=result[order], fail_reason=reason[order],
+            latency_ms=np.rint(latency[order]).astype(np.int64),
+        )
+
+
+# ===== 적재 =====
+def _ms_from_iso(s: str) -> int:
+    """ISO 문자열 → epoch ms. 시간대가 없으면 UTC로 본다"""
+    ts = pd.Timestamp(s)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.timestamp() * 1000)
+
+
+def _columns(cols: dict, lo: int, hi: int):
+    """executemany용 행 iterator (numpy → 파이썬 스칼라)"""
+    return zip(*(cols[c][lo:hi].tolist() for c in INSERT_COLUMNS))
+
+
+class BulkLoader:
+    """
+    파티션별 큰 트랜잭션 executemany + 같은 트랜잭션에서 롤업 배열 upsert.
+    비어 있던 파티션은 인덱스를 지웠다가 finish()에서 한 번에 다시 만든다(행마다 B-tree 갱신 회피).
+    """
+
+    def __init__(self, engine, batch: int = 200_000):
+        self.engine = engine
+        self.batch = batch
+        self.loaded: dict = {}
+        self._deferred: set = set()
+
+    def _prepare(self, name: str, start: int, end: int) -> None:
+        if name in self.loaded:
+            return
+        with self.engine.begin() as conn:
+            ensure_partition(conn, name, start, end)
+            if conn.exec_driver_sql(f"SELECT 1 FROM {name} LIMIT 1").first() is None:
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS idx_{name}_ts_ms")
+                self._deferred.add(name)
+        self.loaded[name] = (start, end)
+
+    def load(self, cols: dict) -> int:
+        ts_ms = cols["ts_ms"]
+        if ts_ms.size == 0:
+            return 0
+        part_start = (ts_ms // PARTITION_MS) * PARTITION_MS
+        edges = [0, *(np.flatnonzero(np.diff(part_start)) + 1).tolist(), ts_ms.size]
+        for a, b in zip(edges[:-1], edges[1:]):
+            name, start, end = partition_bounds(int(ts_ms[a]))
+            self._prepare(name, start, end)
+            sql = f"INSERT INTO {name} ({', '.join(INSERT_COLUMNS)}) VALUES ({', '.join('?' * len(INSERT_COLUMNS))})"
+            for lo in range(a, b, self.batch):
+                hi = min(b, lo + self.batch)
+                with self.engine.begin() as conn:
+                    conn.exec_driver_sql(sql, list(_columns(cols, lo, hi)))
+                    apply_rollup_arrays(conn, ts_ms[lo:hi], cols["channel"][lo:hi],
+                                        cols["result"][lo:hi] == "FAIL", cols["latency_ms"][lo:hi])
+        return int(ts_ms.size)
+
+    def finish(self) -> None:
+        """미뤄 둔 인덱스 생성 + 닫힌 파티션은 롤업이 이미 정확하므로 compacted로 표시"""
+        now = int(time.time() * 1000)
+        for name in sorted(self._deferred):
+            with self.engine.begin() as conn:
+                conn.exec_driver_sql(
+                    f"CREATE INDEX IF NOT EXISTS idx_{name}_ts_ms ON {name}(ts_ms, channel, result, latency_ms)")
+        self._deferred.clear()
+        with self.engine.begin() as conn:
+            for name, (_, end) in self.loaded.items():
+                if end <= now:
+                    conn.exec_driver_sql("UPDATE event_partitions SET compacted_ms = ? WHERE name = ?", (now, name))
+
+
+def cmd_generate(args: argparse.Namespace) -> None:
+    engine = make_engine(Path(args.db))
+    migrate(engine)
+    if args.fast:
+        # 적재 중 정전 시 DB가 깨질 수 있다(테스트 DB 전용)
+        from sqlalchemy import event
+
+        @event.listens_for(engine, "connect")
+        def _fast(dbapi_conn, _record):
+            dbapi_conn.execute("PRAGMA synchronous=OFF")
+        engine.dispose()
+
+    end_ms = int(time.time() * 1000) // MINUTE_MS * MINUTE_MS if args.end is None \
+        else _ms_from_iso(args.end)
+    total_minutes = int(args.days * 1440)
+    start_ms = end_ms - total_minutes * MINUTE_MS
+    gen = Generator(seed=args.seed, users=args.users, ips=args.ips, fail_rate=args.fail_rate,
+                    bursts_per_day=args.bursts_per_day)
+    print(f"generate {args.days} days × ~{args.per_minute:.0f}/min → {args.db}", flush=True)
+
+    t0 = time.perf_counter()
+    loader = BulkLoader(engine, batch=args.batch)
+    rows = 0
+    chunk = max(1, int(args.chunk_minutes))
+    for m in range(0, total_minutes, chunk):
+        tg = time.perf_counter()
+        cols = gen.generate(start_ms + m * MINUTE_MS, min(chunk, total_minutes - m), args.per_minute)
+        tl = time.perf_counter()
+        rows += loader.load(cols)
+        el = time.perf_counter() - t0
+        print(f"  {rows:>12,} rows  gen {tl - tg:5.1f}s  load {time.perf_counter() - tl:5.1f}s  "
+              f"({rows / el:,.0f} rows/s)", flush=True)
+    ti = time.perf_counter()
+    loader.finish()
+    print(f"indexed {len(loader.loaded)} partitions in {time.perf_counter() - ti:.1f}s; "
+          f"total {rows:,} rows in {time.perf_counter() - t0:.1f}s", flush=True)
+    if args.incidents_out:
+        incidents = [dict(start=str(iso_from_ms([a])[0]), end=str(iso_from_ms([b])[0]), type=kind)
+                     for a, b, kind in sorted(gen.incidents)]
+        with open(args.incidents_out, "w", encoding="utf-8") as f:
+            json.dump(incidents, f, ensure_ascii=False, indent=2)
+        print(f"{len(incidents)} incident windows → {args.incidents_out}", flush=True)
+
+
+# ===== 재생 =====
+def _source_tables(conn, start_ms: int | None, end_ms: int | None) -> list:
+    """원본의 이벤트 테이블 목록(시간순). v5+ 는 범위와 겹치는 파티션, 그 이전은 단일 login_events 테이블"""
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'event_partitions'").fetchone():
+        return [r[0] for r in conn.execute(
+            "SELECT name FROM event_partitions WHERE end_ms > ? AND start_ms < ? ORDER BY start_ms",
+            (start_ms if start_ms is not None else -(2 ** 62), end_ms if end_ms is not None else 2 ** 62))]
+    return ["login_events"]
+
+
+def _source_rows(path: str, start_ms: int | None, end_ms: int | None, chunk: int):
+    """원본 이벤트(v1 단일 테이블/v5+ 파티션 모두)를 ts_ms 순 청크로. 파티션은 구간이 겹치지 않아 차례로 읽는다"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        for table in _source_tables(conn, start_ms, end_ms):
+            cols = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+            ts_expr = "ts_ms" if "ts_ms" in cols else \
+                "CAST(round((julianday(ts) - 2440587.5) * 86400000.0) AS INTEGER)"
+            where, params = [], []
+            if start_ms is not None:
+                where.append(f"{ts_expr} >= ?")
+                params.append(start_ms)
+            if end_ms is not None:
+                where.append(f"{ts_expr} < ?")
+                params.append(end_ms)
+            cur = conn.execute(f"""
+                SELECT {ts_expr} AS t, channel, user_hash, ip, ua, fingerprint, result, fail_reason, latency_ms
+                  FROM {table} {"WHERE " + " AND ".join(where) if where else ""}
+                 ORDER BY t
+            """, params)
+            while True:
+                batch = cur.fetchmany(chunk)
+                if not batch:
+                    break
+                yield batch
+    finally:
+        conn.close()
+
+
+def cmd_replay(args: argparse.Namespace) -> None:
+    import httpx
+
+    start = None if args.start is None else _ms_from_iso(args.start)
+    end = None if args.end is None else _ms_from_iso(args.end)
+    keys = ("channel", "user_hash", "ip", "ua", "fingerprint", "result", "fail_reason", "latency_ms")
+    sent = rejected = 0
+    t_wall0 = time.time()
+    t_src0 = None
+    with httpx.Client(base_url=args.base.rstrip("/"), timeout=30) as client:
+        for chunk in _source_rows(args.source, start, end, args.read_chunk):
+            ts = np.array([r[0] for r in chunk], dtype=np.int64)
+            if t_src0 is None:
+                t_src0 = int(ts[0])
+            # 원본 경과 시간 / speed 만큼 지난 벽시계 시각에 보낸다
+            due = t_wall0 + (ts - t_src0) / 1000.0 / args.speed
+            new_ts = ts if args.keep_ts else (due * 1000).astype(np.int64)
+            iso = iso_from_ms(new_ts)
+            i = 0
+            while i < len(chunk):
+                now = time.time()
+                if due[i] > now:
+                    time.sleep(min(due[i] - now, 1.0))
+                    continue
+                # 지금까지 도래한 이벤트를 최대 batch건씩 한 요청으로
+                j = min(max(int(np.searchsorted(due, now, side="right")), i + 1), i + args.batch)
+                items = [dict(zip(keys, r[1:]), ts=iso[k]) for k, r in enumerate(chunk[i:j], start=i)]
+                r = client.post("/events/batch", json=items)
+                r.raise_for_status()
+                body = r.json()
+                sent += body.get("accepted", 0)
+                rejected += body.get("rejected", 0)
+                i = j
+            el = time.time() - t_wall0
+            print(f"  replayed {sent:,} (rejected {rejected})  {el:6.1f}s wall  "
+                  f"{(int(ts[-1]) - t_src0) / 1000 / max(el, 1e-9):.0f}x", flush=True)
+    print(f"done: {sent:,} events in {time.time() - t_wall0:.1f}s", flush=True)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    g = sub.add_parser("generate", help="합성 이벤트를 DB에 직접 대량 적재")
+    g.add_argument("--db", default=os.getenv("DB_PATH", "data/events.sqlite"))
+    g.add_argument("--days", type=float, default=7.0)
+    g.add_argument("--per-minute", type=float, default=500.0, help="평균 분당 이벤트 수")
+    g.add_argument("--end", help="마지막 시각(ISO, 기본 현재 분)")
+    g.add_argument("--seed", type=int, default=1)
+    g.add_argument("--users", type=int, default=200_000)
+    g.add_argument("--ips", type=int, default=100_000)
+    g.add_argument("--fail-rate", type=float, default=0.12)
+    g.add_argument("--bursts-per-day", type=float, default=6.0, help="실패 버스트(공격) 빈도")
+    g.add_argument("--chunk-minutes", type=int, default=360, help="한 번에 생성하는 분 수(메모리 상한)")
+    g.add_argument("--batch", type=int, default=200_000, help="트랜잭션당 행 수")
+    g.add_argument("--fast", action="store_true", help="synchronous=OFF (테스트 DB 전용)")
+    g.add_argument("--incidents-out", help="주입한 공격/지연 구간을 라벨 JSON으로 저장(tools/backtest.py --incidents)")
+    g.set_defaults(fn=cmd_generate)
+
+    r = sub.add_parser("replay", help="기존 DB 이벤트를 시간 압축해 /events/batch 로 재생")
+    r.add_argument("--source", required=True, help="원본 SQLite 경로")
+    r.add_argument("--base", default=os.environ.get("TRAFFIC_BASE_URL", "http://127.0.0.1:8080"))
+    r.add_argument("--speed", type=float, default=60.0, help="배속(60 = 1시간을 1분에)")
+    r.add_argument("--start", help="원본 구간 시작(ISO)")
+    r.add_argument("--end", help="원본 구간 끝(ISO)")
+    r.add_argument("--batch", type=int, default=1000, help="요청당 최대 이벤트 수(EVENTS_BATCH_MAX 이하)")
+    r.add_argument("--read-chunk", type=int, default=50_000)
+    r.add_argument("--keep-ts", action="store_true", help="원래 타임스탬프 유지")
+    r.set_defaults(fn=cmd_replay)
+
+    args = ap.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
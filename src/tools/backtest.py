@@ -0,0 +1,482 @@
+# src/tools/backtest.py
+"""
+알림 규칙/ML 탐지기 오프라인 백테스트.
+
+    # 지난 이벤트로 파라미터 격자를 돌려 라벨(사고 구간) 대비 precision/recall/탐지 시간 비교
+    python tools/backtest.py --db data/events.sqlite --incidents incidents.json \\
+        --fail-rate 0.3,0.4,0.5 --min-attempts 20,30 --ml-cutoff 0.55,0.6,0.65 --out bt.json
+
+- 원시 login_events(파티션별 SQL 집계)를 분 시계열(채널 합계)로 한 번 만들고, compute_metrics의
+  규칙을 모든 분에 대해 NumPy로 한꺼번에 평가한다. 평가기는 분당 1회 돌므로 "분 m 평가 = m분이
+  닫힌 직후"로 보고, 탐지 시간(TTD)은 (m+1분) - 사고 시작.
+    FAIL_RATE_SPIKE  fail_rate[m] > 임계값 & attempts[m] >= 하한
+    LATENCY_TAIL     m(또는 m-1)분 p99 >= 하한 & (창 기준 p99 중앙값 × 배수 이상). p99는 정확한 분위수
+                     (서버는 DDSketch 근사)
+    ML_ANOMALY       최근 ML_RECENT_MIN분 최고 이상치 점수 > 컷오프
+- 비싼 부분은 IsolationForest 학습뿐이라, 점수 배열을 한 번 계산해 두고 컷오프 격자는 비교 연산으로 끝낸다.
+  학습은 프로세스 풀(--workers)에서 병렬로 돈다.
+    cached(기본, 서버와 동일)  --retrain-min마다 직전 --history-hours 시간으로 학습한 모델로 점수.
+                               이력이 --min-points분 미만인 구간은 서버처럼 refit으로 대신한다.
+    refit                      모델 없이 compute_metrics를 돌릴 때처럼 평가 분마다 직전 60분으로 재학습.
+                               --ml-stride k면 k분마다만 학습하고 사이 분은 직전 값을 이어 쓴다(근사).
+  contamination은 score_samples(=anom_score)에 영향을 주지 않으므로(predict 경계만 바꾼다) 격자에서 뺐다.
+- 라벨: --incidents JSON([{"start": ISO, "end": ISO, "type": "..."}]) 또는 CSV(start,end[,type]).
+  tools/backfill.py generate --incidents-out 이 만든 파일을 그대로 쓸 수 있다.
+  --target latency_tail=slow 처럼 탐지기별로 맞춰 볼 사고 종류를 고른다(기본 전부).
+  알림은 연속해서 울린 분을 한 건(episode)으로 묶고, 사고 구간(+ --grace-min)과 겹치면 정탐.
+- 결과 행: 알림 분 수/건수, 정탐/오탐, 일당 오탐, precision/recall/F1, TTD 중앙값/p90.
+  현재 설정값(env)은 격자에 항상 포함되고 표에 * 로 표시된다.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.ensemble import IsolationForest
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backfill import _ms_from_iso  # noqa: E402
+from ml.anomaly import (FAIL_RATE_MIN_ATTEMPTS, FAIL_RATE_THRESHOLD, LATENCY_TAIL_MIN_ATTEMPTS,  # noqa: E402
+                        LATENCY_TAIL_P99_MS, LATENCY_TAIL_RATIO, ML_RECENT_MIN, ML_SCORE_CUTOFF)
+from store.db import iso_from_ms, make_engine  # noqa: E402
+from store.partitions import partitions_overlapping  # noqa: E402
+
+MINUTE_MS = 60_000
+WINDOW_MIN = 60                     # compute_metrics 창(분)
+REFIT_MIN_POINTS = 10               # _iforest_scores: 이보다 짧은 창은 점수 0
+IFOREST_PARAMS = dict(n_estimators=100, contamination=0.08, random_state=42)
+DETECTORS = ("fail_rate", "latency_tail", "ml")
+ALERT_TYPES = {"fail_rate": "FAIL_RATE_SPIKE", "latency_tail": "LATENCY_TAIL", "ml": "ML_ANOMALY"}
+
+
+# ===== 분 시계열 =====
+def _weighted_quantile(lat: np.ndarray, n: int, q: float) -> np.ndarray:
+    """(분 인덱스, 지연, 건수) 행 → 분별 q 분위수(데이터 없는 분은 0)"""
+    out = np.zeros(n)
+    if lat.size == 0:
+        return out
+    m, v, c = lat[:, 0].astype(np.int64), lat[:, 1], lat[:, 2]
+    order = np.lexsort((v, m))
+    m, v, c = m[order], v[order], c[order]
+    cum = np.cumsum(c)
+    first = np.searchsorted(m, np.arange(n), side="left")
+    last = np.searchsorted(m, np.arange(n), side="right")
+    has = last > first
+    base = np.where(first > 0, cum[np.maximum(first - 1, 0)], 0.0)
+    total = cum[np.maximum(last - 1, 0)] - base
+    idx = np.searchsorted(cum, base + np.ceil(q * total), side="left")
+    out[has] = v[np.minimum(idx[has], v.size - 1)]
+    return out
+
+
+def load_minutes(engine, start_ms: int, end_ms: int, with_latency: bool = True) -> Dict[str, np.ndarray]:
+    """[start, end) 분 시계열(채널 합계). 겹치는 파티션마다 SQL로 분 집계만 가져온다. 빈 분은 0"""
+    t0 = start_ms // MINUTE_MS
+    n = -(-end_ms // MINUTE_MS) - t0
+    attempts, failures = np.zeros(n), np.zeros(n)
+    lat_sum, lat_cnt = np.zeros(n), np.zeros(n)
+    lat_rows = []
+    params = {"lo": start_ms, "hi": end_ms}
+    with engine.begin() as conn:
+        for name in partitions_overlapping(conn, start_ms, end_ms):
+            rows = conn.execute(text(f"""
+                SELECT ts_ms / 60000 AS minute, COUNT(*), SUM(result = 'FAIL'),
+                       COALESCE(SUM(latency_ms), 0), COUNT(latency_ms)
+                  FROM {name}
+                 WHERE ts_ms >= :lo AND ts_ms < :hi
+                 GROUP BY minute
+            """), params).fetchall()
+            if rows:
+                # Row 그대로 넘기면 numpy가 속성을 하나씩 조회해 매우 느리다
+                arr = np.array([tuple(r) for r in rows], dtype=np.float64)
+                i = arr[:, 0].astype(np.int64) - t0
+                attempts[i] += arr[:, 1]
+                failures[i] += arr[:, 2]
+                lat_sum[i] += arr[:, 3]
+                lat_cnt[i] += arr[:, 4]
+            if with_latency:
+                rows = conn.execute(text(f"""
+                    SELECT ts_ms / 60000 - :t0 AS minute, latency_ms, COUNT(*)
+                      FROM {name}
+                     WHERE ts_ms >= :lo AND ts_ms < :hi AND latency_ms IS NOT NULL
+                     GROUP BY minute, latency_ms
+                """), dict(params, t0=t0)).fetchall()
+                if rows:
+                    lat_rows.append(np.array([tuple(r) for r in rows], dtype=np.float64))
+    lat = np.concatenate(lat_rows) if lat_rows else np.zeros((0, 3))
+    return dict(
+        t0_ms=t0 * MINUTE_MS,
+        attempts=attempts,
+        failures=failures,
+        fail_rate=np.where(attempts > 0, failures / np.maximum(attempts, 1), 0.0),
+        latency_ms=np.where(lat_cnt > 0, lat_sum / np.maximum(lat_cnt, 1), 0.0),
+        p99=_weighted_quantile(lat, n, 0.99) if with_latency else np.zeros(n),
+    )
+
+
+def _features(series: Dict[str, np.ndarray]) -> np.ndarray:
+    """ml.model.FEATURES 순서(attempts, failures, fail_rate, latency_ms)"""
+    return np.column_stack([series["attempts"], series["failures"], series["fail_rate"], series["latency_ms"]])
+
+
+# ===== 규칙 =====
+def fail_rate_fire(series: Dict[str, np.ndarray], threshold: float, min_attempts: int) -> np.ndarray:
+    return (series["fail_rate"] > threshold) & (series["attempts"] >= min_attempts)
+
+
+def latency_inputs(series: Dict[str, np.ndarray], min_attempts: int) -> tuple:
+    """평가 분마다 (후보 분 p99, 창 안 그 이전 분 p99>0 중앙값[없으면 0], 후보 존재 여부)"""
+    p99, attempts = series["p99"], series["attempts"]
+    ok = attempts >= min_attempts
+    prev_ok = np.concatenate([[False], ok[:-1]])
+    use_prev = ~ok & prev_ok
+    p = np.where(p99 > 0, p99, np.nan)
+    # win[m] = p[m-59 .. m]
+    win = sliding_window_view(np.concatenate([np.full(WINDOW_MIN, np.nan), p]), WINDOW_MIN)[1:]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)      # 전부 NaN인 창
+        base_m = np.nanmedian(win[:, :-1], axis=1)
+        base_prev = np.nanmedian(win[:, :-2], axis=1)
+    cand = np.where(ok, p99, np.where(use_prev, np.concatenate([[0.0], p99[:-1]]), 0.0))
+    base = np.nan_to_num(np.where(ok, base_m, base_prev), nan=0.0)
+    return cand, base, ok | use_prev
+
+
+def latency_fire(inputs: tuple, p99_ms: float, ratio: float) -> np.ndarray:
+    cand, base, has = inputs
+    return has & (cand >= p99_ms) & ((base == 0.0) | (cand >= ratio * base))
+
+
+# ===== ML 점수(프로세스 풀) =====
+def _recent_max(scores: np.ndarray, lead: int, recent: int) -> np.ndarray:
+    """scores[0]이 첫 평가 분보다 lead분 앞일 때, 평가 분마다 최근 recent분 최고 점수"""
+    padded = np.concatenate([np.full(recent - 1 - lead, -np.inf), scores])
+    return sliding_window_view(padded, recent).max(axis=1)
+
+
+def _fit_block(task: tuple) -> np.ndarray | None:
+    """cached: 이력으로 한 번 학습 → 블록(앞쪽 recent-1분 포함) 점수. 이력이 모자라면 None"""
+    train, block, min_points = task
+    if len(train) < min_points:
+        return None
+    model = IsolationForest(**IFOREST_PARAMS).fit(train)
+    return -model.score_samples(block)
+
+
+def _refit_chunk(task: tuple) -> np.ndarray:
+    """refit: 평가 분마다 직전 60분 창으로 학습/점수(_iforest_scores와 같음) → 최근 recent분 최고 점수"""
+    feats, evals, recent = task
+    out = np.zeros(len(evals))
+    for i, m in enumerate(evals):
+        win = feats[max(0, m - WINDOW_MIN + 1): m + 1]
+        if len(win) < REFIT_MIN_POINTS:
+            continue
+        model = IsolationForest(**IFOREST_PARAMS).fit(win)
+        out[i] = (-model.score_samples(win[-recent:])).max()
+    return out
+
+
+def _map(fn, tasks: list, workers: int) -> list:
+    if workers <= 1 or len(tasks) <= 1:
+        return [fn(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+
+
+def _refit_tasks(feats: np.ndarray, evals: np.ndarray, recent: int, workers: int) -> list:
+    """평가 분을 워커 수의 몇 배로 쪼갠다(각 조각에는 필요한 창만 잘라 넘긴다)"""
+    size = max(1, -(-len(evals) // max(1, workers * 4)))
+    tasks = []
+    for a in range(0, len(evals), size):
+        part = evals[a:a + size]
+        lo = max(0, int(part[0]) - WINDOW_MIN + 1)
+        tasks.append((feats[lo:int(part[-1]) + 1], part - lo, recent))
+    return tasks
+
+
+def ml_refit(feats: np.ndarray, recent: int, stride: int, workers: int) -> np.ndarray:
+    n = len(feats)
+    evals = np.arange(0, n, max(1, stride))
+    parts = _map(_refit_chunk, _refit_tasks(feats, evals, recent, workers), workers)
+    vals = np.concatenate(parts) if parts else np.zeros(0)
+    out = np.zeros(n)
+    out[evals] = vals
+    if stride > 1:                  # 건너뛴 분은 직전 평가 값
+        out = vals[np.searchsorted(evals, np.arange(n), side="right") - 1]
+    return out
+
+
+def ml_cached(feats: np.ndarray, history_min: int, retrain_min: int, min_points: int,
+              recent: int, workers: int) -> np.ndarray:
+    n = len(feats)
+    starts = list(range(0, n, retrain_min))
+    tasks = []
+    for r in starts:
+        lo = max(0, r - recent + 1)
+        tasks.append((feats[max(0, r - history_min): r], feats[lo:min(n, r + retrain_min)], min_points))
+    out = np.zeros(n)
+    missing = []
+    for r, scores in zip(starts, _map(_fit_block, tasks, workers)):
+        hi = min(n, r + retrain_min)
+        if scores is None:
+            missing.extend(range(r, hi))
+        else:
+            out[r:hi] = _recent_max(scores, r - max(0, r - recent + 1), recent)
+    if missing:
+        # 모델이 아직 없는 구간: 서버는 _iforest_scores(창마다 재학습)로 대신한다
+        evals = np.array(missing)
+        out[evals] = np.concatenate(_map(_refit_chunk, _refit_tasks(feats, evals, recent, workers), workers))
+    return out
+
+
+# ===== 채점 =====
+def load_incidents(path: str) -> List[tuple]:
+    """[(start_ms, end_ms, type)]"""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+    return sorted((_ms_from_iso(r["start"]), _ms_from_iso(r["end"]), r.get("type") or "") for r in rows)
+
+
+def score(fire: np.ndarray, t0_ms: int, incidents: Sequence[tuple] | None, grace_min: int, days: float) -> dict:
+    starts = fire & ~np.concatenate([[False], fire[:-1]])
+    n_ep = int(starts.sum())
+    out = dict(alertMinutes=int(fire.sum()), alerts=n_ep)
+    if incidents is None:
+        return out
+    n = fire.size
+    label = np.zeros(n, dtype=bool)
+    spans = []
+    for s, e, _ in incidents:
+        a = max(0, (s - t0_ms) // MINUTE_MS)
+        b = min(n, -(-(e - t0_ms) // MINUTE_MS) + grace_min)
+        if a < n and b > 0:
+            label[a:b] = True
+            spans.append((a, b, s))
+    ep_id = np.cumsum(starts)
+    hit = np.bincount(ep_id[fire & label], minlength=n_ep + 1)[1:] > 0
+    tp = int(hit.sum())
+    ttd = []
+    for a, b, s in spans:
+        idx = np.flatnonzero(fire[a:b])
+        if idx.size:
+            # m분 평가는 그 분이 닫힌 직후에 나온다
+            ttd.append((t0_ms + (a + int(idx[0]) + 1) * MINUTE_MS - s) / MINUTE_MS)
+    precision = tp / n_ep if n_ep else None
+    recall = len(ttd) / len(spans) if spans else None
+    f1 = (2 * precision * recall / (precision + recall)
+          if precision is not None and recall is not None and precision + recall > 0 else 0.0)
+    out.update(
+        truePositive=tp, falsePositive=n_ep - tp, falsePerDay=round((n_ep - tp) / days, 2) if days else None,
+        incidents=len(spans), detected=len(ttd),
+        precision=None if precision is None else round(precision, 4),
+        recall=None if recall is None else round(recall, 4), f1=round(f1, 4),
+        ttdMedianMin=round(float(np.median(ttd)), 2) if ttd else None,
+        ttdP90Min=round(float(np.percentile(ttd, 90)), 2) if ttd else None,
+    )
+    return out
+
+
+# ===== 실행 =====
+def _grid(values: str, current: float, cast=float) -> list:
+    """쉼표 목록 + 현재 설정값(항상 포함)"""
+    out = {cast(v) for v in values.split(",") if v.strip()}
+    out.add(cast(current))
+    return sorted(out)
+
+
+def _targets(specs: List[str], incidents: List[tuple] | None) -> Dict[str, List[tuple] | None]:
+    if incidents is None:
+        return {d: None for d in DETECTORS}
+    out = {d: incidents for d in DETECTORS}
+    for spec in specs:
+        det, _, kinds = spec.partition("=")
+        if det not in DETECTORS:
+            raise SystemExit(f"--target: unknown detector {det!r} (choose from {', '.join(DETECTORS)})")
+        keep = {k.strip() for k in kinds.split(",") if k.strip()}
+        out[det] = [i for i in incidents if i[2] in keep]
+    return out
+
+
+def run(args: argparse.Namespace) -> dict:
+    engine = make_engine(Path(args.db))
+    with engine.begin() as conn:
+        lo, hi = conn.exec_driver_sql("SELECT MIN(start_ms), MAX(end_ms) FROM event_partitions").one()
+    if lo is None:
+        raise SystemExit("no event partitions in database")
+    start_ms = _ms_from_iso(args.start) if args.start else lo
+    end_ms = _ms_from_iso(args.end) if args.end else min(hi, int(time.time() * 1000) // MINUTE_MS * MINUTE_MS)
+    detectors = [d.strip() for d in args.detectors.split(",") if d.strip()]
+    incidents = load_incidents(args.incidents) if args.incidents else None
+    targets = _targets(args.target or [], incidents)
+
+    tl = time.perf_counter()
+    series = load_minutes(engine, start_ms, end_ms, with_latency="latency_tail" in detectors)
+    n = series["attempts"].size
+    # 앞뒤로 데이터가 없는 분은 잘라낸다(파티션이 하루 단위라 범위 끝이 비어 있는 경우가 많다)
+    nz = np.flatnonzero(series["attempts"])
+    if nz.size == 0:
+        raise SystemExit("no events in range")
+    a, b = int(nz[0]), int(nz[-1]) + 1
+    series = {k: (v[a:b] if isinstance(v, np.ndarray) else v) for k, v in series.items()}
+    series["t0_ms"] += a * MINUTE_MS
+    n, t0 = b - a, series["t0_ms"]
+    days = n / 1440
+    load_sec = time.perf_counter() - tl
+    print(f"loaded {n:,} minutes ({int(series['attempts'].sum()):,} events) "
+          f"{iso_from_ms([t0])[0]} ~ {iso_from_ms([t0 + n * MINUTE_MS])[0]} in {load_sec:.1f}s",
+          file=sys.stderr, flush=True)
+
+    results = []
+    timing = dict(loadSec=round(load_sec, 2))
+
+    if "fail_rate" in detectors:
+        for thr, min_att in itertools.product(_grid(args.fail_rate, FAIL_RATE_THRESHOLD),
+                                              _grid(args.min_attempts, FAIL_RATE_MIN_ATTEMPTS, int)):
+            results.append(dict(detector="fail_rate", params=dict(threshold=thr, min_attempts=min_att),
+                                current=thr == FAIL_RATE_THRESHOLD and min_att == FAIL_RATE_MIN_ATTEMPTS,
+                                **score(fail_rate_fire(series, thr, min_att), t0, targets["fail_rate"],
+                                        args.grace_min, days)))
+
+    if "latency_tail" in detectors:
+        for min_att in _grid(args.lat_min_attempts, LATENCY_TAIL_MIN_ATTEMPTS, int):
+            inputs = latency_inputs(series, min_att)
+            for p99_ms, ratio in itertools.product(_grid(args.lat_p99, LATENCY_TAIL_P99_MS),
+                                                   _grid(args.lat_ratio, LATENCY_TAIL_RATIO)):
+                results.append(dict(
+                    detector="latency_tail", params=dict(p99_ms=p99_ms, ratio=ratio, min_attempts=min_att),
+                    current=(p99_ms == LATENCY_TAIL_P99_MS and ratio == LATENCY_TAIL_RATIO
+                             and min_att == LATENCY_TAIL_MIN_ATTEMPTS),
+                    **score(latency_fire(inputs, p99_ms, ratio), t0, targets["latency_tail"],
+                            args.grace_min, days)))
+
+    if "ml" in detectors:
+        feats = _features(series)
+        recent = max(1, args.ml_recent)
+        variants = {}
+        tm = time.perf_counter()
+        if args.ml_mode == "refit":
+            variants[("refit", None)] = ml_refit(feats, recent, args.ml_stride, args.workers)
+        else:
+            for h in _grid(args.history_hours, float(os.getenv("MODEL_HISTORY_HOURS", "24"))):
+                variants[("cached", h)] = ml_cached(feats, int(h * 60), args.retrain_min, args.min_points,
+                                                    recent, args.workers)
+        timing["mlSec"] = round(time.perf_counter() - tm, 2)
+        print(f"ml scores ({args.ml_mode}, {len(variants)} variant(s), {args.workers} workers) "
+              f"in {timing['mlSec']:.1f}s", file=sys.stderr, flush=True)
+        default_h = float(os.getenv("MODEL_HISTORY_HOURS", "24"))
+        for (mode, h), best in variants.items():
+            for cutoff in _grid(args.ml_cutoff, ML_SCORE_CUTOFF):
+                params = dict(mode=mode, cutoff=cutoff, recent_min=recent)
+                if h is not None:
+                    params["history_hours"] = h
+                results.append(dict(detector="ml", params=params,
+                                    current=cutoff == ML_SCORE_CUTOFF and h in (None, default_h),
+                                    **score(best > cutoff, t0, targets["ml"], args.grace_min, days)))
+
+    return dict(
+        startedAt=datetime.now(timezone.utc).isoformat(),
+        config=dict(db=args.db, start=str(iso_from_ms([t0])[0]), end=str(iso_from_ms([t0 + n * MINUTE_MS])[0]),
+                    minutes=n, incidents=len(incidents) if incidents is not None else None,
+                    graceMin=args.grace_min, mlMode=args.ml_mode, retrainMin=args.retrain_min,
+                    workers=args.workers),
+        timing=timing,
+        results=results,
+    )
+
+
+def _sort_key(r: dict):
+    return (-(r.get("f1") or 0.0), r.get("falsePositive", r["alerts"]), r.get("ttdMedianMin") or 1e9)
+
+
+def print_report(report: dict, top: int) -> None:
+    labeled = report["config"]["incidents"] is not None
+    for det in DETECTORS:
+        rows = [r for r in report["results"] if r["detector"] == det]
+        if not rows:
+            continue
+        rows.sort(key=_sort_key if labeled else lambda r: r["alerts"])
+        shown = rows[:top] + [r for r in rows[top:] if r["current"]]
+        print(f"\n{ALERT_TYPES[det]} ({len(rows)} configs)")
+        if labeled:
+            print(f"  {'params':<52} {'alerts':>6} {'FP/day':>7} {'prec':>6} {'recall':>6} {'F1':>6} "
+                  f"{'TTD p50':>8} {'p90':>6}")
+        else:
+            print(f"  {'params':<52} {'alerts':>6} {'alertMin':>8}")
+        for r in shown:
+            p = ", ".join(f"{k}={v}" for k, v in r["params"].items())
+            mark = "*" if r["current"] else " "
+            if labeled:
+                cell = lambda v, w, f=".2f": f"{v:>{w}{f}}" if v is not None else f"{'-':>{w}}"
+                print(f"{mark} {p:<52} {r['alerts']:>6} {cell(r['falsePerDay'], 7, '.1f')} "
+                      f"{cell(r['precision'], 6)} {cell(r['recall'], 6)} {cell(r['f1'], 6)} "
+                      f"{cell(r['ttdMedianMin'], 8, '.1f')} {cell(r['ttdP90Min'], 6, '.1f')}")
+            else:
+                print(f"{mark} {p:<52} {r['alerts']:>6} {r['alertMinutes']:>8}")
+
+
+def save(report: dict, path: str) -> None:
+    if path.endswith(".csv"):
+        keys = ["detector", "current", "params", "alertMinutes", "alerts", "truePositive", "falsePositive",
+                "falsePerDay", "incidents", "detected", "precision", "recall", "f1", "ttdMedianMin", "ttdP90Min"]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=keys, extrasaction="ignore")
+            w.writeheader()
+            for r in report["results"]:
+                w.writerow(dict(r, params=json.dumps(r["params"])))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"report saved: {path}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=os.getenv("DB_PATH", "data/events.sqlite"))
+    ap.add_argument("--start", help="구간 시작(ISO, 기본 가장 오래된 파티션)")
+    ap.add_argument("--end", help="구간 끝(ISO, 기본 현재)")
+    ap.add_argument("--incidents", help="사고 구간 라벨(JSON 또는 CSV)")
+    ap.add_argument("--target", action="append", metavar="DETECTOR=TYPE[,TYPE]",
+                    help="탐지기별 채점 대상 사고 종류(여러 번 지정 가능)")
+    ap.add_argument("--grace-min", type=int, default=10, help="사고 끝 이후에도 정탐으로 보는 분")
+    ap.add_argument("--detectors", default=",".join(DETECTORS))
+    ap.add_argument("--fail-rate", default="0.2,0.3,0.4,0.5,0.6", help="FAIL_RATE_SPIKE 실패율 임계값 격자")
+    ap.add_argument("--min-attempts", default="10,30,50", help="FAIL_RATE_SPIKE 시도 수 하한 격자")
+    ap.add_argument("--lat-p99", default="200,300,500", help="LATENCY_TAIL p99 하한(ms) 격자")
+    ap.add_argument("--lat-ratio", default="1.5,2,3", help="LATENCY_TAIL 기준 대비 배수 격자")
+    ap.add_argument("--lat-min-attempts", default=str(LATENCY_TAIL_MIN_ATTEMPTS))
+    ap.add_argument("--ml-cutoff", default="0.5,0.55,0.6,0.65,0.7", help="ML_ANOMALY 점수 컷오프 격자")
+    ap.add_argument("--ml-mode", choices=("cached", "refit"), default="cached")
+    ap.add_argument("--history-hours", default="6,24", help="cached: 학습 이력(시간) 격자")
+    ap.add_argument("--retrain-min", type=int, default=int(os.getenv("MODEL_RETRAIN_MIN", "15")))
+    ap.add_argument("--min-points", type=int, default=int(os.getenv("MODEL_MIN_POINTS", "60")))
+    ap.add_argument("--ml-recent", type=int, default=ML_RECENT_MIN, help="최근 N분 최고 점수")
+    ap.add_argument("--ml-stride", type=int, default=1, help="refit: k분마다만 재학습(근사)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="학습 프로세스 수")
+    ap.add_argument("--top", type=int, default=10, help="탐지기별로 보여 줄 상위 설정 수")
+    ap.add_argument("--out", help="결과 저장(.json 또는 .csv)")
+    args = ap.parse_args()
+
+    report = run(args)
+    print_report(report, args.top)
+    if args.out:
+        save(report, args.out)
+
+
+if __name__ == "__main__":
+    main()
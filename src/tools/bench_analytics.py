@@ -0,0 +1,237 @@
+# src/tools/bench_analytics.py
+"""
+분석 경로(ml/anomaly.py) 벤치마크. 네트워크 없이 임시 SQLite에서만 돈다.
+
+    # 10^4 ~ 10^7 건, 단계별 중앙값/최소/최대(ms)와 최대 메모리, JSON 저장
+    python tools/bench_analytics.py --sizes 1e4,1e5,1e6,1e7 --repeat 3 --out bench.json
+    # 이전 결과와 비교해 20% 넘게 느려지거나 메모리가 늘면 종료 코드 1
+    python tools/bench_analytics.py --sizes 1e4,1e5,1e6 --baseline bench.json --threshold 0.2
+
+- 크기마다 임시 디렉터리에 DB를 만들고 backfill.Generator/BulkLoader로 정확히 N건을 넣는다.
+  이벤트는 서버가 보는 모양 그대로 [적재 시각의 분-60분, 그 분)의 닫힌 60분에 두고, 측정하는 단계에는
+  그 분 경계를 now_ms로 고정해 넘긴다(측정이 길어져도 창이 밀리지 않음). 읽은 행 수가 N과 다르면 경고한다.
+- 단계: read(_read_last_minutes) → timeseries(_make_timeseries) → iforest(_iforest_scores),
+  compute_metrics(aggregator/model 없이 원시 행 경로 전체). --aggregator면 MinuteAggregator.rebuild와
+  그 분 버킷으로 돈 compute_metrics도 잰다(10^7에서는 고유값 집합 때문에 메모리를 많이 쓴다).
+- 메모리는 tracemalloc 최대치(NumPy/pandas 할당 포함, SQLite 내부 캐시는 제외). 이 측정 실행이
+  워밍업을 겸하고, 시간은 그 뒤 --repeat회(tracemalloc 끔)의 중앙값으로 비교한다.
+- 회귀 판정: 중앙값이 기준 대비 threshold 넘게 늘고 차이가 --min-delta-ms 이상, 또는
+  최대 메모리가 threshold 넘게 늘고 1MB 이상. 같은 기계/같은 seed 결과끼리 비교한다.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backfill import MINUTE_MS, BulkLoader, Generator  # noqa: E402
+from ml.aggregate import MinuteAggregator  # noqa: E402
+from ml.anomaly import _iforest_scores, _make_timeseries, _read_last_minutes, compute_metrics  # noqa: E402
+from store.db import make_engine  # noqa: E402
+from store.schema import migrate  # noqa: E402
+
+DEFAULT_SIZES = "1e4,1e5,1e6,1e7"
+WINDOW_MIN = 60
+MIN_DELTA_MB = 1.0
+
+
+# ===== 시드 =====
+def _exact(gen: Generator, start_ms: int, n: int) -> dict:
+    """창 60분에 정확히 n건(분별 도착 수는 Generator 그대로, 넘치는 만큼 무작위로 덜어 낸다)"""
+    per_minute = n / WINDOW_MIN * 1.1
+    while True:
+        cols = gen.generate(start_ms, WINDOW_MIN, per_minute)
+        total = cols["ts_ms"].size
+        if total >= n:
+            break
+        per_minute *= 1.2
+    if total > n:
+        keep = np.sort(gen.rng.choice(total, size=n, replace=False))
+        cols = {k: v[keep] for k, v in cols.items()}
+    return cols
+
+
+def seed_db(path: Path, n: int, seed: int) -> tuple:
+    """(engine, 기준 시각 now_ms, 적재 초). 이벤트는 [now_ms-60분, now_ms)"""
+    engine = make_engine(path)
+    migrate(engine)
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def _fast(dbapi_conn, _record):
+        dbapi_conn.execute("PRAGMA synchronous=OFF")     # 버리는 임시 DB
+    engine.dispose()
+
+    now_ms = int(time.time() * 1000) // MINUTE_MS * MINUTE_MS
+    start_ms = now_ms - WINDOW_MIN * MINUTE_MS
+    t0 = time.perf_counter()
+    cols = _exact(Generator(seed=seed), start_ms, n)
+    loader = BulkLoader(engine)
+    loader.load(cols)
+    loader.finish()
+    del cols
+    return engine, now_ms, time.perf_counter() - t0
+
+
+# ===== 측정 =====
+def _peak_mb(fn: Callable[[], object]) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        out = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return out, peak / 2 ** 20
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return times
+
+
+def bench_size(n: int, repeat: int, seed: int, with_aggregator: bool, workdir: str) -> dict:
+    path = Path(workdir) / f"bench_{n}.sqlite"
+    engine, now_ms, seed_sec = seed_db(path, n, seed)
+    print(f"[{n:,}] seeded in {seed_sec:.1f}s ({path.stat().st_size / 2 ** 20:.0f} MB)", file=sys.stderr, flush=True)
+
+    # 앞 단계 결과를 다음 단계 입력으로(메모리 측정 실행이 워밍업을 겸함)
+    df, read_mb = _peak_mb(lambda: _read_last_minutes(engine, minutes=WINDOW_MIN, now_ms=now_ms))
+    frames, ts_mb = _peak_mb(lambda: _make_timeseries(df))
+    _, if_mb = _peak_mb(lambda: _iforest_scores(frames[0]))
+    _, cm_mb = _peak_mb(lambda: compute_metrics(engine, now_ms=now_ms))
+    stages: Dict[str, tuple] = {
+        "read": (lambda: _read_last_minutes(engine, minutes=WINDOW_MIN, now_ms=now_ms), read_mb),
+        "timeseries": (lambda: _make_timeseries(df), ts_mb),
+        "iforest": (lambda: _iforest_scores(frames[0]), if_mb),
+        "compute_metrics": (lambda: compute_metrics(engine, now_ms=now_ms), cm_mb),
+    }
+    if with_aggregator:
+        agg = MinuteAggregator(minutes=WINDOW_MIN)
+        _, rb_mb = _peak_mb(lambda: agg.rebuild(engine, now_ms))
+        _, ca_mb = _peak_mb(lambda: compute_metrics(engine, aggregator=agg, now_ms=now_ms))
+        stages["aggregator_rebuild"] = (lambda: agg.rebuild(engine, now_ms), rb_mb)
+        stages["compute_metrics_agg"] = (lambda: compute_metrics(engine, aggregator=agg, now_ms=now_ms), ca_mb)
+
+    rows_read = len(df)
+    if rows_read != n:
+        print(f"[{n:,}] WARNING: read {rows_read:,} rows (seed/window mismatch?)", file=sys.stderr, flush=True)
+    out = {}
+    for name, (fn, peak) in stages.items():
+        times = _timed(fn, repeat)
+        out[name] = dict(medianMs=round(statistics.median(times), 3), minMs=round(min(times), 3),
+                         maxMs=round(max(times), 3), peakMB=round(peak, 2))
+        print(f"[{n:,}] {name:<20} {out[name]['medianMs']:>10.1f} ms  {peak:>9.1f} MB",
+              file=sys.stderr, flush=True)
+    del df, frames
+    engine.dispose()
+    return dict(size=n, rowsRead=rows_read, seedSec=round(seed_sec, 2), dbBytes=path.stat().st_size,
+                rssMaxMB=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1), stages=out)
+
+
+# ===== 비교 =====
+def compare(report: dict, baseline: dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """회귀 목록(사람이 읽는 문장). 기준에 없는 크기/단계는 건너뛴다"""
+    base = {r["size"]: r["stages"] for r in baseline.get("results", [])}
+    regressions = []
+    print(f"\nvs baseline ({baseline.get('startedAt')}), threshold +{threshold * 100:.0f}%:")
+    for r in report["results"]:
+        old_stages = base.get(r["size"])
+        if old_stages is None:
+            continue
+        for name, new in r["stages"].items():
+            old = old_stages.get(name)
+            if old is None:
+                continue
+            t_old, t_new = old["medianMs"], new["medianMs"]
+            m_old, m_new = old["peakMB"], new["peakMB"]
+            slow = t_new > t_old * (1 + threshold) and t_new - t_old >= min_delta_ms
+            fat = m_new > m_old * (1 + threshold) and m_new - m_old >= MIN_DELTA_MB
+            dt = f"{(t_new - t_old) / t_old * 100:+.1f}%" if t_old else "n/a"
+            dm = f"{(m_new - m_old) / m_old * 100:+.1f}%" if m_old else "n/a"
+            flag = "  REGRESSION" if slow or fat else ""
+            print(f"  {r['size']:>10,} {name:<20} {t_old:>10.1f} → {t_new:<10.1f} ms ({dt:>7})  "
+                  f"{m_old:>8.1f} → {m_new:<8.1f} MB ({dm:>7}){flag}")
+            if slow:
+                regressions.append(f"{r['size']} {name}: time {t_old:.1f} → {t_new:.1f} ms ({dt})")
+            if fat:
+                regressions.append(f"{r['size']} {name}: peak memory {m_old:.1f} → {m_new:.1f} MB ({dm})")
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    names = list(report["results"][0]["stages"]) if report["results"] else []
+    print(f"{'events':>10} " + " ".join(f"{n + '(ms)':>22}" for n in names))
+    for r in report["results"]:
+        print(f"{r['size']:>10,} " + " ".join(f"{r['stages'][n]['medianMs']:>22.1f}" for n in names))
+    print(f"{'peak MB':>10} ")
+    for r in report["results"]:
+        print(f"{r['size']:>10,} " + " ".join(f"{r['stages'][n]['peakMB']:>22.1f}" for n in names))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default=DEFAULT_SIZES, help="창 안 이벤트 수(쉼표 구분, 1e5 표기 가능)")
+    ap.add_argument("--repeat", type=int, default=3, help="단계별 측정 반복 횟수(중앙값)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--aggregator", action="store_true", help="MinuteAggregator 경로도 측정")
+    ap.add_argument("--workdir", help="임시 DB 위치(기본 시스템 임시 디렉터리, 끝나면 삭제)")
+    ap.add_argument("--out", help="결과 JSON 저장 경로")
+    ap.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    ap.add_argument("--threshold", type=float, default=0.2, help="회귀로 볼 증가율(0.2 = 20%%)")
+    ap.add_argument("--min-delta-ms", type=float, default=2.0, help="이보다 작은 시간 차이는 무시")
+    args = ap.parse_args()
+
+    sizes = [int(float(s)) for s in args.sizes.split(",") if s.strip()]
+    report = dict(
+        startedAt=datetime.now(timezone.utc).isoformat(),
+        config=dict(sizes=sizes, repeat=args.repeat, seed=args.seed, aggregator=args.aggregator,
+                    python=platform.python_version(), numpy=np.__version__, pandas=pd.__version__,
+                    sklearn=sklearn.__version__, machine=platform.machine(), cpus=os.cpu_count()),
+        results=[],
+    )
+    with tempfile.TemporaryDirectory(prefix="lcs-bench-", dir=args.workdir) as workdir:
+        for n in sizes:
+            report["results"].append(bench_size(n, max(1, args.repeat), args.seed, args.aggregator, workdir))
+            # 크기별 DB는 다 쓰면 지운다(10^7 ≈ 2GB)
+            for p in Path(workdir).glob(f"bench_{n}.sqlite*"):
+                p.unlink()
+
+    print_report(report)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold, args.min_delta_ms)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"report saved: {args.out}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for r in regressions:
+            print("  " + r)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+# src/tools/loadgen.py
+"""
+/login 부하 생성기 (asyncio + httpx 커넥션 풀, 용량 산정용).
+
+    python tools/loadgen.py --scenario steady --rps 300 --duration 60 --out /tmp/steady.json
+    python tools/loadgen.py --scenario stuffing --rps 200 --baseline /tmp/steady.json
+
+- open-loop: 요청은 목표 RPS 일정(t0 + i/rps)대로 나가고, 느린 응답이 다음 요청을 늦추지 않는다.
+  --concurrency로 동시 요청 수를 제한하며, 자리가 없어 늦게 나간 시간도 지연에 포함한다
+  (latency = 응답 시각 - 예정 시각, coordinated omission 보정. 순수 서버 시간은 service).
+- 시나리오: steady / burst / stuffing(소수 IP의 크리덴셜 스터핑) / outage(한 채널 전부 실패)
+- 결과는 단계별 처리량·오류율·p50/p95/p99/p99.9와 로그 버킷 히스토그램. --out JSON으로 저장하고
+  --baseline으로 이전 실행과 비교한다.
+- 서버 속도 제한(RATE_LIMIT_ENABLED=1)을 켜면 같은 계정/IP 반복은 429가 된다. 순수 용량 측정은 끈 채(기본)로 띄운다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()  # .env 자동 로드
+
+BASE = os.environ.get("TRAFFIC_BASE_URL", "http://127.0.0.1:8080").rstrip("/")
+EMAIL_OK = "user@example.com"
+PASS_OK = "pass123"
+CHANNELS = ["WEB", "MYKT", "MEMBERSHIP"]
+USER_POOL = 100_000
+IP_POOL = 50_000
+QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99, "p99.9": 0.999}
+# 히스토그램 경계(ms): 0.25ms ~ 약 33s, 2배 간격
+HIST_BOUNDS_MS = [0.25 * 2 ** i for i in range(18)]
+
+Body = Callable[[random.Random], dict]
+
+
+# ===== 요청 본문 =====
+def _ip(rng: random.Random) -> str:
+    n = rng.randrange(IP_POOL)
+    return f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"
+
+
+def normal(success_ratio: float = 0.85, channels: List[str] = CHANNELS) -> Body:
+    def body(rng: random.Random) -> dict:
+        ok = rng.random() < success_ratio
+        return {
+            "email": EMAIL_OK if ok else f"user{rng.randrange(USER_POOL)}@example.com",
+            "password": PASS_OK if ok else "wrong",
+            "channel": rng.choice(channels),
+            "fingerprint": f"fp-{rng.randrange(5000)}",
+            "ip": _ip(rng),
+        }
+    return body
+
+
+def stuffing(ips: int = 3) -> Body:
+    """소수 IP/fingerprint에서 서로 다른 계정으로 틀린 비밀번호를 연달아 시도"""
+    def body(rng: random.Random) -> dict:
+        k = rng.randrange(ips)
+        return {
+            "email": f"victim{rng.randrange(USER_POOL)}@example.com",
+            "password": "hunter2",
+            "channel": "WEB",
+            "fingerprint": f"bot-{k}",
+            "ip": f"203.0.113.{k + 1}",
+        }
+    return body
+
+
+def outage(channel: str, success_ratio: float) -> Body:
+    """channel은 인증 백엔드 장애로 전부 실패, 나머지 채널은 평소대로"""
+    others = normal(success_ratio, [c for c in CHANNELS if c != channel] or CHANNELS)
+
+    def body(rng: random.Random) -> dict:
+        if rng.random() < 1 / len(CHANNELS):
+            b = others(rng)
+            b.update(channel=channel, email=f"user{rng.randrange(USER_POOL)}@example.com", password="down")
+            return b
+        return others(rng)
+    return body
+
+
+def mix(a: Body, b: Body, share_b: float) -> Body:
+    def body(rng: random.Random) -> dict:
+        return b(rng) if rng.random() < share_b else a(rng)
+    return body
+
+
+@dataclass
+class Phase:
+    name: str
+    duration: float
+    rps: float
+    body: Body
+    latency: List[float] = field(default_factory=list)     # 예정 시각 기준(ms)
+    service: List[float] = field(default_factory=list)     # 실제 송신 기준(ms)
+    status: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    sent: int = 0
+    elapsed: float = 0.0
+
+
+def build_scenario(name: str, rps: float, duration: float, success_ratio: float,
+                   burst_factor: float, attack_share: float, outage_channel: str) -> List[Phase]:
+    base = normal(success_ratio)
+    third = duration / 3
+    if name == "steady":
+        return [Phase("steady", duration, rps, base)]
+    if name == "burst":
+        return [Phase("baseline", third, rps, base),
+                Phase("burst", third, rps * burst_factor, base),
+                Phase("recovery", third, rps, base)]
+    if name == "stuffing":
+        return [Phase("baseline", third, rps, base),
+                Phase("stuffing", third, rps * (1 + attack_share), mix(base, stuffing(), attack_share / (1 + attack_share))),
+                Phase("recovery", third, rps, base)]
+    if name == "outage":
+        return [Phase("baseline", third, rps, base),
+                Phase("outage", third, rps, outage(outage_channel, success_ratio)),
+                Phase("recovery", third, rps, base)]
+    raise SystemExit(f"unknown scenario: {name} (steady|burst|stuffing|outage)")
+
+
+SCENARIOS = ("steady", "burst", "stuffing", "outage")
+
+
+# ===== 실행 =====
+async def _one(client: httpx.AsyncClient, phase: Phase, body: dict, t_sched: float, sem: asyncio.Semaphore) -> None:
+    t_send = time.perf_counter()
+    try:
+        r = await client.post("/login", json=body)
+        phase.status[r.status_code] += 1
+    except httpx.HTTPError as e:
+        phase.errors[type(e).__name__] += 1
+    finally:
+        done = time.perf_counter()
+        phase.latency.append((done - t_sched) * 1000.0)
+        phase.service.append((done - t_send) * 1000.0)
+        sem.release()
+
+
+async def _run_phase(client: httpx.AsyncClient, phase: Phase, sem: asyncio.Semaphore,
+                     rng: random.Random, tasks: set, progress: bool) -> None:
+    interval = 1.0 / phase.rps
+    start = time.perf_counter()
+    next_report = start + 1.0
+    i = 0
+    while True:
+        t_sched = start + i * interval
+        if t_sched - start >= phase.duration:
+            break
+        delay = t_sched - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await sem.acquire()
+        task = asyncio.create_task(_one(client, phase, phase.body(rng), t_sched, sem))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        phase.sent += 1
+        i += 1
+        if progress and time.perf_counter() >= next_report:
+            next_report += 1.0
+            done = len(phase.latency)
+            print(f"[{phase.name}] t={time.perf_counter() - start:5.1f}s sent={phase.sent} done={done} "
+                  f"in-flight={len(tasks)}", file=sys.stderr, flush=True)
+    phase.elapsed = time.perf_counter() - start
+
+
+async def run(base: str, phases: List[Phase], concurrency: int, timeout: float, seed: int,
+              progress: bool = True) -> None:
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    sem = asyncio.Semaphore(concurrency)
+    tasks: set = set()
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=timeout) as client:
+        for phase in phases:
+            await _run_phase(client, phase, sem, rng, tasks, progress)
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout + 1)
+
+
+# ===== 리포트 =====
+def _summary(latency: List[float], service: List[float], status: Counter, errors: Counter,
+             sent: int, elapsed: float) -> dict:
+    lat = np.asarray(latency, dtype=np.float64)
+    svc = np.asarray(service, dtype=np.float64)
+    done = int(lat.size)
+    ok = sum(n for code, n in status.items() if code < 400)
+    failed = sum(n for code, n in status.items() if code >= 500) + sum(errors.values())
+    counts, _ = np.histogram(lat, bins=[0.0] + HIST_BOUNDS_MS + [np.inf]) if done else (np.zeros(len(HIST_BOUNDS_MS) + 1), None)
+    return dict(
+        sent=sent,
+        completed=done,
+        ok=ok,
+        elapsedSec=round(elapsed, 3),
+        throughputRps=round(done / elapsed, 1) if elapsed else 0.0,
+        errorRate=round(failed / done, 5) if done else 0.0,
+        status={str(k): v for k, v in sorted(status.items())},
+        errors=dict(errors),
+        latencyMs={k: round(float(np.quantile(lat, q)), 3) if done else None for k, q in QUANTILES.items()}
+                  | {"mean": round(float(lat.mean()), 3) if done else None,
+                     "max": round(float(lat.max()), 3) if done else None},
+        serviceMs={k: round(float(np.quantile(svc, q)), 3) if done else None for k, q in QUANTILES.items()},
+        histogram=dict(boundsMs=HIST_BOUNDS_MS + ["+Inf"], counts=[int(c) for c in counts]),
+    )
+
+
+def build_report(args: argparse.Namespace, phases: List[Phase], started_at: str) -> dict:
+    out = dict(
+        tool="loadgen",
+        startedAt=started_at,
+        config=dict(base=args.base, scenario=args.scenario, rps=args.rps, duration=args.duration,
+                    concurrency=args.concurrency, timeout=args.timeout, seed=args.seed,
+                    successRatio=args.success_ratio),
+        phases=[],
+    )
+    for p in phases:
+        out["phases"].append(dict(name=p.name, targetRps=round(p.rps, 1), durationSec=round(p.duration, 3),
+                                  **_summary(p.latency, p.service, p.status, p.errors, p.sent, p.elapsed)))
+    status: Counter = Counter()
+    errors: Counter = Counter()
+    for p in phases:
+        status.update(p.status)
+        errors.update(p.errors)
+    out["total"] = _summary([x for p in phases for x in p.latency], [x for p in phases for x in p.service],
+                            status, errors, sum(p.sent for p in phases), sum(p.elapsed for p in phases))
+    return out
+
+
+def _fmt_row(name: str, s: dict) -> str:
+    lat = s["latencyMs"]
+    cell = lambda v: f"{v:9.1f}" if v is not None else f"{'-':>9}"
+    return (f"{name:<10} {s['completed']:>8} {s['throughputRps']:>9.1f} {s['errorRate'] * 100:>7.2f}% "
+            + " ".join(cell(lat[k]) for k in QUANTILES))
+
+
+def print_report(report: dict, baseline: dict | None = None) -> None:
+    head = f"{'phase':<10} {'done':>8} {'rps':>9} {'err':>8} " + " ".join(f"{k + '(ms)':>9}" for k in QUANTILES)
+    print(head)
+    for p in report["phases"]:
+        print(_fmt_row(p["name"], p))
+    print(_fmt_row("TOTAL", report["total"]))
+    status = report["total"]["status"]
+    if status:
+        print("status:", ", ".join(f"{k}={v}" for k, v in status.items()))
+    if report["total"]["errors"]:
+        print("errors:", ", ".join(f"{k}={v}" for k, v in report["total"]["errors"].items()))
+    if baseline:
+        print(f"\nvs baseline ({baseline.get('startedAt')}, {baseline.get('config', {}).get('scenario')}):")
+        b, c = baseline["total"], report["total"]
+        rows = [("throughputRps", b["throughputRps"], c["throughputRps"]),
+                ("errorRate", b["errorRate"], c["errorRate"])]
+        rows += [(f"latency {k}", b["latencyMs"].get(k), c["latencyMs"].get(k)) for k in QUANTILES]
+        for name, old, new in rows:
+            if old is None or new is None:
+                continue
+            delta = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"  {name:<14} {old:>10} → {new:<10} ({delta})")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base", default=BASE, help="API base URL (TRAFFIC_BASE_URL)")
+    ap.add_argument("--scenario", choices=SCENARIOS, default="steady")
+    ap.add_argument("--rps", type=float, default=200.0, help="기준 목표 RPS(open-loop)")
+    ap.add_argument("--duration", type=float, default=30.0, help="시나리오 전체 길이(초)")
+    ap.add_argument("--concurrency", type=int, default=256, help="동시 요청/커넥션 상한")
+    ap.add_argument("--timeout", type=float, default=5.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--success-ratio", type=float, default=0.85)
+    ap.add_argument("--burst-factor", type=float, default=5.0, help="burst 단계 RPS 배수")
+    ap.add_argument("--attack-share", type=float, default=1.0, help="stuffing 단계에 더하는 공격 RPS(기준 대비)")
+    ap.add_argument("--outage-channel", default="MYKT", choices=CHANNELS)
+    ap.add_argument("--out", help="리포트 JSON 저장 경로")
+    ap.add_argument("--baseline", help="비교할 이전 리포트 JSON")
+    ap.add_argument("--quiet", action="store_true", help="초당 진행 로그 끄기")
+    args = ap.parse_args()
+
+    phases = build_scenario(args.scenario, args.rps, args.duration, args.success_ratio,
+                            args.burst_factor, args.attack_share, args.outage_channel)
+    started_at = datetime.now(timezone.utc).isoformat()
+    print(f"loadgen → {args.base} scenario={args.scenario} "
+          + ", ".join(f"{p.name}:{p.rps:.0f}rps×{p.duration:.0f}s" for p in phases), file=sys.stderr)
+    asyncio.run(run(args.base, phases, args.concurrency, args.timeout, args.seed, progress=not args.quiet))
+
+    report = build_report(args, phases, started_at)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"report saved: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# src/tools/openai_stub.py
+"""
+Azure OpenAI chat completions 로컬 스텁 (오프라인 테스트용).
+
+    python tools/openai_stub.py --port 8790 --delay 2
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8790 AZURE_OPENAI_API_KEY=stub uvicorn api.server:app
+
+v1(/openai/v1/chat/completions)과 preview(/openai/deployments/<name>/chat/completions) 경로 모두 응답한다.
+"""
+import argparse
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CALLS = 0
+
+
+def _fake_summary(prompt: str) -> str:
+    # 프롬프트에 담긴 JSON에서 알림 유형만 뽑아 결정적인 요약 생성
+    types = sorted(set(re.findall(r'"type":\s*"([A-Z_]+)"', prompt)))
+    if not types:
+        return "로그인 서비스는 건강한 상태입니다. (stub)"
+    return f"- 요약: {', '.join(types)} 알림 발생 (stub #{CALLS})\n- 원인: 테스트\n- 조치: 확인 필요"
+
+
+class Handler(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail = False
+
+    def do_POST(self):
+        global CALLS
+        if not self.path.startswith("/openai/"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        CALLS += 1
+        time.sleep(self.delay)
+        if self.fail:
+            self.send_error(500)
+            return
+        prompt = (body.get("messages") or [{}])[-1].get("content", "")
+        out = json.dumps({
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": _fake_summary(prompt)}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 20},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, fmt, *args):
+        print(f"[openai-stub] {self.command} {self.path} (calls={CALLS})", flush=True)
+
+
+def serve(port: int = 8790, delay: float = 0.0, fail: bool = False) -> ThreadingHTTPServer:
+    Handler.delay, Handler.fail = delay, fail
+    return ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Azure OpenAI 스텁 서버")
+    ap.add_argument("--port", type=int, default=8790)
+    ap.add_argument("--delay", type=float, default=0.0, help="응답 지연(초)")
+    ap.add_argument("--fail", action="store_true", help="항상 500 응답")
+    args = ap.parse_args()
+    print(f"openai stub on http://127.0.0.1:{args.port}", flush=True)
+    serve(args.port, args.delay, args.fail).serve_forever()